@@ -0,0 +1,337 @@
+"""Scriptable load generator for the lab1/lab2 servers.
+
+Opens N concurrent connections to one of the servers, replays a weighted
+command mix (as fast as possible or at a target rate) and prints a JSON
+report with throughput, latency percentiles, errors and connect times.
+
+    python bench/loadgen.py mcms --port 5000 -c 50 -d 10 \\
+        --mix "5*add 1 2" --mix "analyze hello world"
+    python bench/loadgen.py mcms --mix "BATCH; add 1 2; mul 3 4; analyze hi"
+    python bench/loadgen.py mcss -c 20 -n 1000
+    python bench/loadgen.py u --port 12345 -c 10 --mix TIME --mix "ECHO hi"
+    python bench/loadgen.py rpc --port 6000 --mix "check palindrome 12321"
+    python bench/loadgen.py rpc --port 6000 --mix "multiply 32" --rate 50
+"""
+
+import argparse
+import json
+import random
+import socket
+import sys
+import threading
+import time
+import xmlrpc.client
+
+DEFAULT_PORTS = {"mcms": 5000, "mcss": 5000, "u": 12345, "rpc": 6000}
+DEFAULT_MIX = {
+    "mcms": ["add 1 2"],
+    "mcss": ["hello"],
+    "u": ["TIME"],
+    "rpc": ["check palindrome 12321"],
+}
+
+
+# ---------------------------
+# Target adapters: connect() once per connection, request() per command
+# ---------------------------
+class LineTarget:
+    # MCMS / MCSS: newline-terminated requests and replies
+    def __init__(self, host, port, timeout):
+        self.addr = (host, port)
+        self.timeout = timeout
+        self.sock = None
+        self.buf = b""
+
+    def connect(self):
+        self.sock = socket.create_connection(self.addr, timeout=self.timeout)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def readline(self):
+        while b"\n" not in self.buf:
+            data = self.sock.recv(65536)
+            if not data:
+                raise ConnectionError("server closed connection")
+            self.buf += data
+        line, self.buf = self.buf.split(b"\n", 1)
+        return line
+
+    def read_reply(self, command):
+        # Consume the whole reply to command; returns its first line
+        return self.readline()
+
+    def request(self, command):
+        self.sock.sendall(command.encode() + b"\n")
+        first = self.read_reply(command)
+        if first == b"BUSY":
+            raise ConnectionError("rejected by admission control (BUSY)")
+        if first.startswith(b"ERROR"):
+            raise RuntimeError(first.decode(errors="replace"))
+
+    def close(self):
+        if self.sock:
+            self.sock.close()
+
+
+class MCMSTarget(LineTarget):
+    # A mix entry "BATCH; cmd1; cmd2; ..." is sent as one "BATCH n" block
+    # (n counted from the entry) and timed as a single request
+    def request(self, command):
+        parts = [p.strip() for p in command.split(";")]
+        if len(parts) > 1 and parts[0].split(None, 1)[0].lower() == "batch":
+            inner = [p for p in parts[1:] if p]
+            command = "\n".join([f"BATCH {len(inner)}", *inner])
+        super().request(command)
+
+    def read_reply(self, command):
+        # How many lines follow depends on the first one: an error is a
+        # single line whatever the command
+        lines = command.split("\n")
+        head = lines[0].split(None, 1)[0].lower() if lines[0].strip() else ""
+        first = self.readline()
+        if head == "batch" and len(lines) > 1:
+            if first.startswith(b"BATCH "):
+                # "BATCH n" header, then each inner command's reply
+                for line in lines[1:]:
+                    self.read_reply(line)
+        elif head == "analyze" and first == b"ANALYSIS:":
+            for _ in range(4):
+                self.readline()
+        return first
+
+
+class UTarget:
+    # lab1 U_server: name handshake, then one unframed reply per message
+    def __init__(self, host, port, timeout):
+        self.addr = (host, port)
+        self.timeout = timeout
+        self.sock = None
+
+    def connect(self):
+        self.sock = socket.create_connection(self.addr, timeout=self.timeout)
+        self.sock.recv(1024)  # "Enter your name: "
+        self.sock.sendall(b"loadgen")
+        self.sock.recv(1024)  # welcome message
+
+    def request(self, command):
+        self.sock.sendall(command.encode())
+        reply = self.sock.recv(1024)
+        if not reply:
+            raise ConnectionError("server closed connection")
+        if reply.startswith(b"Invalid"):
+            raise RuntimeError(reply.decode(errors="replace"))
+
+    def close(self):
+        if self.sock:
+            self.sock.close()
+
+
+class RPCTarget:
+    # lab1 XML-RPC servers: "check <op> <n>" or "multiply <size>"
+    def __init__(self, host, port, timeout):
+        self.url = f"http://{host}:{port}/"
+        self.proxy = None
+        self._matrices = {}
+
+    def connect(self):
+        # ServerProxy reuses its HTTP connection while the server keeps it alive
+        self.proxy = xmlrpc.client.ServerProxy(self.url)
+
+    def request(self, command):
+        parts = command.split()
+        method = parts[0]
+        if method == "multiply":
+            n = int(parts[1])
+            if n not in self._matrices:
+                rnd = random.Random(n)
+                self._matrices[n] = [
+                    [rnd.randint(0, 9) for _ in range(n)] for _ in range(n)
+                ]
+            m = self._matrices[n]
+            result = self.proxy.multiply(m, m)
+        else:
+            args = [int(a) if a.lstrip("-").isdigit() else a for a in parts[1:]]
+            result = getattr(self.proxy, method)(*args)
+        if result is None:
+            raise RuntimeError(f"{method} returned None")
+
+    def close(self):
+        if self.proxy:
+            self.proxy("close")()
+
+
+TARGETS = {"mcms": MCMSTarget, "mcss": LineTarget, "u": UTarget, "rpc": RPCTarget}
+
+
+# ---------------------------
+# Load loop
+# ---------------------------
+def parse_mix(specs):
+    # "3*add 1 2" -> weight 3; plain commands have weight 1
+    commands, weights = [], []
+    for spec in specs:
+        weight, sep, command = spec.partition("*")
+        if sep and weight.strip().isdigit():
+            weights.append(int(weight))
+            commands.append(command.strip())
+        else:
+            weights.append(1)
+            commands.append(spec)
+    return commands, weights
+
+
+def percentiles(values, ps=(50, 90, 99, 99.9)):
+    if not values:
+        return {}
+    values = sorted(values)
+    out = {}
+    for p in ps:
+        k = min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))
+        out[f"p{p:g}"] = round(values[k] * 1000, 4)
+    out["max"] = round(values[-1] * 1000, 4)
+    out["mean"] = round(sum(values) / len(values) * 1000, 4)
+    return out
+
+
+def run(args):
+    commands, weights = parse_mix(args.mix or DEFAULT_MIX[args.target])
+    target_cls = TARGETS[args.target]
+    port = args.port or DEFAULT_PORTS[args.target]
+
+    # per-connection pacing for --rate (requests/sec across all connections)
+    interval = args.connections / args.rate if args.rate else 0.0
+    deadline = None
+    start_barrier = threading.Barrier(args.connections + 1)
+    lock = threading.Lock()
+    latencies, connect_times, errors = [], [], []
+    counts = {"ok": 0, "failed": 0, "connect_failed": 0}
+
+    def worker(idx):
+        rnd = random.Random(args.seed + idx)
+        target = target_cls(args.host, port, args.timeout)
+        local_lat = []
+        local_err = []
+        ok = 0
+        t0 = time.perf_counter()
+        try:
+            target.connect()
+            connect_time = time.perf_counter() - t0
+        except Exception as e:
+            with lock:
+                counts["connect_failed"] += 1
+                errors.append(f"connect: {e}")
+            start_barrier.wait()
+            return
+        start_barrier.wait()
+
+        sent = 0
+        next_at = time.perf_counter() + rnd.random() * interval
+        try:
+            while True:
+                if args.requests and sent >= args.requests:
+                    break
+                now = time.perf_counter()
+                if deadline and now >= deadline:
+                    break
+                if interval:
+                    if next_at > now:
+                        time.sleep(next_at - now)
+                    next_at += interval
+                command = rnd.choices(commands, weights)[0]
+                t = time.perf_counter()
+                try:
+                    target.request(command)
+                    local_lat.append(time.perf_counter() - t)
+                    ok += 1
+                except (OSError, ConnectionError) as e:
+                    local_err.append(f"{command}: {e}")
+                    break  # connection is gone
+                except Exception as e:
+                    local_lat.append(time.perf_counter() - t)
+                    local_err.append(f"{command}: {e}")
+                sent += 1
+        finally:
+            try:
+                target.close()
+            except Exception:
+                pass
+            with lock:
+                latencies.extend(local_lat)
+                connect_times.append(connect_time)
+                counts["ok"] += ok
+                counts["failed"] += len(local_err)
+                errors.extend(local_err[:10])
+
+    threads = [
+        threading.Thread(target=worker, args=(i,), daemon=True)
+        for i in range(args.connections)
+    ]
+    for t in threads:
+        t.start()
+    start_barrier.wait()
+    started = time.perf_counter()
+    if args.duration:
+        deadline = started + args.duration
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+
+    total = counts["ok"] + counts["failed"]
+    return {
+        "target": args.target,
+        "address": f"{args.host}:{port}",
+        "connections": args.connections,
+        "mix": dict(zip(commands, weights)),
+        "target_rate": args.rate,
+        "duration_s": round(elapsed, 3),
+        "requests": total,
+        "ok": counts["ok"],
+        "errors": counts["failed"],
+        "connect_errors": counts["connect_failed"],
+        "throughput_rps": round(total / elapsed, 1) if elapsed else 0.0,
+        "latency_ms": percentiles(latencies),
+        "connect_ms": percentiles(connect_times, ps=(50, 99)),
+        "error_samples": errors[:10],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Load generator for the lab1/lab2 servers",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__,
+    )
+    parser.add_argument("target", choices=sorted(TARGETS))
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=None)
+    parser.add_argument("-c", "--connections", type=int, default=10)
+    parser.add_argument(
+        "-n", "--requests", type=int, default=0, help="requests per connection"
+    )
+    parser.add_argument("-d", "--duration", type=float, default=0, help="seconds")
+    parser.add_argument(
+        "--rate", type=float, default=0, help="total requests/sec (0 = max)"
+    )
+    parser.add_argument(
+        "--mix",
+        action="append",
+        help='command to replay, optionally weighted as "N*command" (repeatable)',
+    )
+    parser.add_argument("--timeout", type=float, default=10.0)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--out", help="also write the JSON report to this file")
+    args = parser.parse_args()
+
+    if not args.requests and not args.duration:
+        args.requests = 1000
+
+    report = run(args)
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(text + "\n")
+    return 0 if not report["connect_errors"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
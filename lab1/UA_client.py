@@ -1,5 +1,10 @@
+import argparse
 import json
+import random
 import socket
+import time
+
+import matrix_protocol as mp
 
 
 def input_matrix(name):
@@ -15,20 +20,86 @@ def input_matrix(name):
     return matrix
 
 
-A = input_matrix("A")
-B = input_matrix("B")
+def random_matrix(n):
+    return [[random.randint(0, 9) for _ in range(n)] for _ in range(n)]
+
+
+def multiply_json(client, A, B):
+    client.sendall(json.dumps({"A": A, "B": B}).encode())
+    client.shutdown(socket.SHUT_WR)  # EOF marks the end of the reply
+
+    chunks = []
+    while True:
+        data = client.recv(65536)
+        if not data:
+            break
+        chunks.append(data)
+    response = json.loads(b"".join(chunks).decode())
+    if "error" in response:
+        raise mp.ProtocolError(response["error"])
+    return response["result"]
+
+
+def multiply_binary(client, A, B):
+    # The connection must already have sent MAGIC; it can be reused
+    mp.send_matrix(client, A)
+    mp.send_matrix(client, B)
+    return mp.recv_matrix(client)
+
 
-client = socket.socket()
-client.connect(("localhost", 5000))
+def server_stats(client):
+    client.sendall(json.dumps({"stats": True}).encode())
+    client.shutdown(socket.SHUT_WR)
+    return json.loads(client.makefile("rb").read())["stats"]
 
-client.send(json.dumps({"A": A, "B": B}).encode())
 
-response = json.loads(client.recv(8192).decode())
-client.close()
+def main():
+    parser = argparse.ArgumentParser(description="Socket matrix client")
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=5000)
+    parser.add_argument("--json", action="store_true", help="use the legacy JSON request")
+    parser.add_argument("--size", type=int, help="send random NxN matrices instead of prompting")
+    parser.add_argument("--repeat", type=int, default=1, help="send the same request N times on one connection")
+    parser.add_argument("--stats", action="store_true", help="print the server's cache statistics")
+    args = parser.parse_args()
 
-if "error" in response:
-    print("Error:", response["error"])
-else:
+    if args.stats:
+        with socket.create_connection((args.host, args.port)) as client:
+            print(json.dumps(server_stats(client), indent=2))
+        return
+
+    if args.size:
+        A, B = random_matrix(args.size), random_matrix(args.size)
+    else:
+        A = input_matrix("A")
+        B = input_matrix("B")
+
+    client = socket.socket()
+    client.connect((args.host, args.port))
+
+    try:
+        if args.json:
+            result = multiply_json(client, A, B)
+        else:
+            client.sendall(mp.MAGIC)
+            for i in range(args.repeat):
+                start = time.perf_counter()
+                result = multiply_binary(client, A, B)
+                if args.size:
+                    elapsed = time.perf_counter() - start
+                    print(f"#{i + 1}: {len(result)}x{len(result[0])} result in {elapsed:.3f}s")
+    except mp.ProtocolError as e:
+        print("Error:", e)
+        return
+    finally:
+        client.close()
+
+    if args.size:
+        return
     print("\nResultant Matrix:")
-    for row in response["result"]:
+    for row in result:
         print(row)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,43 +1,154 @@
+import argparse
 import json
 import socket
+from concurrent.futures import ThreadPoolExecutor
 
+import matmul
+import matrix_protocol as mp
+from matrix_cache import DEFAULT_MAX_BYTES, MatrixCache
+
+BACKEND = "auto"  # see matmul.BACKENDS
+WORKERS = 1  # > 1 splits large products across a process pool (0 = all cores)
+THREADS = 8  # concurrent client connections
+
+parallel = None
+cache = None
 
-def multiply(A, B):
-    rA, cA = len(A), len(A[0])
-    rB, cB = len(B), len(B[0])
 
-    if cA != rB:
+def compute(A, B):
+    try:
+        if parallel is not None:
+            return parallel.multiply(A, B, BACKEND)
+        return matmul.multiply(A, B, BACKEND)
+    except matmul.ShapeError:
         return None
 
-    result = [[0 for _ in range(cB)] for _ in range(rA)]
 
-    for i in range(rA):
-        for j in range(cB):
-            for k in range(cA):
-                result[i][j] += A[i][k] * B[k][j]
+def multiply(A, B):
+    if cache is None:
+        return compute(A, B)
+    return cache.multiply(A, B, compute)
+
+
+def stats():
+    return cache.stats() if cache is not None else {}
+
+
+def recv_json(conn, data=b""):
+    # Read until the buffered bytes form a complete JSON document
+    buf = bytearray(data)
+    while True:
+        if buf.rstrip().endswith(b"}"):
+            try:
+                return json.loads(buf)
+            except ValueError:
+                pass
+        chunk = conn.recv(65536)
+        if not chunk:
+            return json.loads(buf)  # raises for a truncated request
+        buf += chunk
+
+
+def serve_json(conn, data):
+    payload = recv_json(conn, data)
+    if payload.get("stats"):
+        conn.sendall(json.dumps({"stats": stats()}).encode())
+        return
+
+    A = payload["A"]
+    B = payload["B"]
+
+    result = multiply(A, B)
+
+    if result is None:
+        response = {"error": "Invalid matrix dimensions"}
+    else:
+        response = {"result": matmul.to_rows(result)}
+
+    conn.sendall(json.dumps(response).encode())
+
+
+def serve_binary(conn):
+    # A binary connection stays open for any number of (A, B) requests
+    while True:
+        try:
+            A = mp.recv_matrix(conn)
+        except EOFError:
+            return  # client is done
+        try:
+            B = mp.recv_matrix(conn)
+        except mp.ProtocolError as e:
+            mp.send_error(conn, str(e))
+            return
+
+        result = multiply(A, B)
+
+        if result is None:
+            mp.send_error(conn, "Invalid matrix dimensions")
+            continue
+        try:
+            mp.send_matrix(conn, result)
+        except mp.ProtocolError as e:  # e.g. the product overflows int64
+            mp.send_error(conn, str(e))
+
+
+def serve(conn, addr):
+    # Binary clients start with MAGIC; anything else is a JSON request
+    try:
+        head = conn.recv(len(mp.MAGIC), socket.MSG_WAITALL)
+        if head == mp.MAGIC:
+            serve_binary(conn)
+        elif head:
+            serve_json(conn, head)
+    except mp.ProtocolError as e:
+        try:
+            mp.send_error(conn, str(e))
+        except OSError:
+            pass
+    except (OSError, EOFError, ValueError, KeyError) as e:
+        print(f"[{addr[0]}:{addr[1]}] {type(e).__name__}: {e}")
+    finally:
+        conn.close()
 
-    return result
 
+def main():
+    global parallel, cache
 
-server = socket.socket()
-server.bind(("localhost", 5000))
-server.listen(1)
+    parser = argparse.ArgumentParser(description="Socket matrix server")
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=5000)
+    parser.add_argument("--threads", type=int, default=THREADS)
+    parser.add_argument("--workers", type=int, default=WORKERS, help="process pool size for large products (0 = all cores)")
+    parser.add_argument("--cache-mb", type=float, default=DEFAULT_MAX_BYTES / 2**20, help="result cache size (0 disables it)")
+    args = parser.parse_args()
 
-print("Socket Matrix Server running...")
+    if args.workers != 1:
+        parallel = matmul.ParallelMultiplier(args.workers or None)
+    if args.cache_mb > 0:
+        cache = MatrixCache(int(args.cache_mb * 2**20))
 
-conn, addr = server.accept()
-data = conn.recv(8192).decode()
+    server = socket.socket()
+    server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    server.bind((args.host, args.port))
+    server.listen(128)
 
-payload = json.loads(data)
-A = payload["A"]
-B = payload["B"]
+    print(f"Socket Matrix Server running on {args.host}:{args.port}...")
 
-result = multiply(A, B)
+    pool = ThreadPoolExecutor(max_workers=args.threads)
+    try:
+        while True:
+            conn, addr = server.accept()
+            pool.submit(serve, conn, addr)
+    except KeyboardInterrupt:
+        print("\nShutting down...")
+    finally:
+        server.close()
+        pool.shutdown(wait=False, cancel_futures=True)
+        if parallel is not None:
+            parallel.close()
+        if cache is not None:
+            print("Cache:", cache.stats())
 
-if result is None:
-    response = {"error": "Invalid matrix dimensions"}
-else:
-    response = {"result": result}
 
-conn.send(json.dumps(response).encode())
-conn.close()
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,354 @@
+import multiprocessing
+import os
+import threading
+from array import array
+from itertools import chain, repeat
+from multiprocessing import resource_tracker, shared_memory
+from numbers import Integral, Real
+from operator import mul
+
+try:
+    import numpy as np
+except ImportError:  # pure-Python backend only
+    np = None
+
+BACKENDS = ("auto", "loop", "python", "numpy")
+
+BLOCK = 64  # columns of B per block in the pure-Python backend
+NUMPY_MIN_WORK = 16**3  # below this many multiply-adds the call overhead wins
+INT64_MAX = 2**63 - 1
+PARALLEL_MIN_WORK = 96**3  # smaller products are not worth a pool round trip
+BLOCKS_PER_WORKER = 4  # row blocks per worker, to even out uneven progress
+
+
+class ShapeError(ValueError):
+    pass
+
+
+class FlatMatrix:
+    # A rows x cols matrix kept row-major in one array('q') or array('d'),
+    # as matrix_protocol receives it. The backends read the array directly
+    # (NumPy through a zero-copy view) and return a FlatMatrix when both
+    # operands are flat. Indexing and iteration yield rows as lists.
+    __slots__ = ("rows", "cols", "data")
+
+    def __init__(self, rows, cols, data):
+        self.rows = rows
+        self.cols = cols
+        self.data = data
+
+    def __len__(self):
+        return self.rows
+
+    def __getitem__(self, i):
+        if not -self.rows <= i < self.rows:
+            raise IndexError("matrix row out of range")
+        i %= self.rows
+        return self.data[i * self.cols : (i + 1) * self.cols].tolist()
+
+    def __iter__(self):
+        cols = self.cols
+        return (self.data[i * cols : (i + 1) * cols].tolist() for i in range(self.rows))
+
+    def tolist(self):
+        return list(self)
+
+    def columns(self):
+        return [self.data[j :: self.cols] for j in range(self.cols)]
+
+
+def to_rows(M):
+    # list of rows for a FlatMatrix, M itself otherwise
+    return M.tolist() if isinstance(M, FlatMatrix) else M
+
+
+def _flat_result(rows, typecode):
+    # Pack a list-of-rows result as a FlatMatrix; an int result that
+    # overflows int64 stays a list of exact Python ints
+    try:
+        data = array(typecode, chain.from_iterable(rows))
+    except OverflowError:
+        return rows
+    return FlatMatrix(len(rows), len(rows[0]), data)
+
+
+# ---------------------------
+# Validation
+# ---------------------------
+def shape(M, name="matrix"):
+    if isinstance(M, FlatMatrix):
+        if not M.rows:
+            raise ShapeError(f"{name} must be a non-empty list of rows")
+        if not M.cols:
+            raise ShapeError(f"{name} has empty rows")
+        return M.rows, M.cols
+    if not isinstance(M, (list, tuple)) or not M:
+        raise ShapeError(f"{name} must be a non-empty list of rows")
+    cols = len(M[0])
+    if not cols:
+        raise ShapeError(f"{name} has empty rows")
+    for row in M:
+        if len(row) != cols:
+            raise ShapeError(f"{name} rows have different lengths")
+    return len(M), cols
+
+
+def check_shapes(A, B):
+    rA, cA = shape(A, "A")
+    rB, cB = shape(B, "B")
+    if cA != rB:
+        raise ShapeError(f"cannot multiply {rA}x{cA} by {rB}x{cB}")
+    return rA, cA, cB
+
+
+def dtype_of(A, B):
+    # "int" when every element is an integer, "float" when all are real
+    # numbers, otherwise None (left to the exact Python backends)
+    kind = "int"
+    for M in (A, B):
+        if isinstance(M, FlatMatrix):
+            if M.data.typecode == "d":
+                kind = "float"
+            continue
+        for row in M:
+            for x in row:
+                if isinstance(x, Integral):
+                    continue
+                if isinstance(x, Real):
+                    kind = "float"
+                    continue
+                return None
+    return kind
+
+
+def _absmax(M):
+    if isinstance(M, FlatMatrix):
+        return max(map(abs, M.data))
+    return max(abs(x) for row in M for x in row)
+
+
+def _fits_int64(A, B, inner):
+    # int64 accumulation is exact if every element fits in int64 and
+    # |a|max * |b|max * inner cannot overflow (the product alone passes when
+    # one operand is all zeros)
+    amax, bmax = _absmax(A), _absmax(B)
+    return amax <= INT64_MAX and bmax <= INT64_MAX and amax * bmax * inner <= INT64_MAX
+
+
+# ---------------------------
+# Backends
+# ---------------------------
+def multiply_loop(A, B):
+    # Reference triple loop (the original lab implementation)
+    rA, cA, cB = check_shapes(A, B)
+    A, B = to_rows(A), to_rows(B)
+    result = [[0 for _ in range(cB)] for _ in range(rA)]
+    for i in range(rA):
+        for j in range(cB):
+            for k in range(cA):
+                result[i][j] += A[i][k] * B[k][j]
+    return result
+
+
+def multiply_python(A, B, block=BLOCK):
+    # Transpose B once so every dot product walks two contiguous rows, and
+    # take B's columns a block at a time so every row of A is multiplied
+    # against the same block while it is still hot
+    rA, _, cB = check_shapes(A, B)
+    flat = isinstance(A, FlatMatrix) and isinstance(B, FlatMatrix)
+    if flat:
+        typecode = "d" if "d" in (A.data.typecode, B.data.typecode) else "q"
+    BT = B.columns() if isinstance(B, FlatMatrix) else list(zip(*B))
+    A = to_rows(A)
+    result = [list(repeat(0, cB)) for _ in range(rA)]
+    for j0 in range(0, cB, block):
+        cols = BT[j0 : j0 + block]
+        for row, out in zip(A, result):
+            for j, col in enumerate(cols, j0):
+                out[j] = sum(map(mul, row, col))
+    if flat:
+        return _flat_result(result, typecode)
+    return result
+
+
+def multiply_numpy(A, B, dtype=None):
+    if np is None:
+        raise RuntimeError("numpy is not installed")
+    _, inner, _ = check_shapes(A, B)
+    if dtype is None:
+        dtype = dtype_of(A, B)
+    if dtype == "int" and _fits_int64(A, B, inner):
+        npdtype = np.int64
+    else:
+        npdtype = np.float64
+    C = _as_ndarray(A, npdtype) @ _as_ndarray(B, npdtype)
+    if isinstance(A, FlatMatrix) and isinstance(B, FlatMatrix):
+        typecode = "q" if npdtype is np.int64 else "d"
+        return FlatMatrix(C.shape[0], C.shape[1], array(typecode, C.tobytes()))
+    return C.tolist()
+
+
+def _as_ndarray(M, npdtype):
+    if isinstance(M, FlatMatrix):
+        view = np.frombuffer(M.data, dtype=np.int64 if M.data.typecode == "q" else np.float64)
+        return view.reshape(M.rows, M.cols).astype(npdtype, copy=False)
+    return np.asarray(M, dtype=npdtype)
+
+
+def choose_backend(A, B):
+    rA, cA, cB = check_shapes(A, B)
+    if np is None or rA * cA * cB < NUMPY_MIN_WORK:
+        return "python"
+    dtype = dtype_of(A, B)
+    if dtype == "float":
+        return "numpy"
+    if dtype == "int" and _fits_int64(A, B, cA):
+        return "numpy"
+    # big integers (or non-numbers) need Python's exact arithmetic
+    return "python"
+
+
+def multiply(A, B, backend="auto"):
+    if backend == "auto":
+        backend = choose_backend(A, B)
+    if backend == "numpy":
+        return multiply_numpy(A, B)
+    if backend == "python":
+        return multiply_python(A, B)
+    if backend == "loop":
+        return multiply_loop(A, B)
+    raise ValueError(f"unknown backend: {backend}")
+
+
+# ---------------------------
+# Parallel (process pool + shared memory)
+# ---------------------------
+# The parent copies A (row-major) and B (transposed, so each column is
+# contiguous) into shared memory once; tasks only carry segment names and a
+# row range, and every worker writes its rows of C straight into a shared
+# result segment, so no matrix is pickled per task.
+_untrack = False
+
+
+def _worker_init(untrack):
+    global _untrack
+    _untrack = untrack
+
+
+def _attach(name):
+    shm = shared_memory.SharedMemory(name=name)
+    if _untrack:
+        # spawned workers have their own resource tracker, which would
+        # otherwise unlink the parent's segment when the worker exits
+        resource_tracker.unregister(shm._name, "shared_memory")
+    return shm
+
+
+def _rows_numpy(a, bt, c, typecode, rA, inner, cB, r0, r1):
+    dtype = np.int64 if typecode == "q" else np.float64
+    A = np.frombuffer(a, dtype=dtype).reshape(rA, inner)
+    BT = np.frombuffer(bt, dtype=dtype).reshape(cB, inner)
+    C = np.frombuffer(c, dtype=dtype).reshape(rA, cB)
+    np.matmul(A[r0:r1], BT.T, out=C[r0:r1])
+
+
+def _rows_python(a, bt, c, typecode, rA, inner, cB, r0, r1):
+    cols = [bt[j * inner : (j + 1) * inner].tolist() for j in range(cB)]
+    for i in range(r0, r1):
+        row = a[i * inner : (i + 1) * inner].tolist()
+        c[i * cB : (i + 1) * cB] = array(typecode, [sum(map(mul, row, col)) for col in cols])
+
+
+def _multiply_rows(task):
+    names, typecode, rA, inner, cB, r0, r1 = task
+    segments = [_attach(name) for name in names]
+    # segments may be page-rounded on some platforms, so view exact lengths
+    counts = (rA * inner, cB * inner, rA * cB)
+    views = [shm.buf[: n * 8].cast(typecode) for shm, n in zip(segments, counts)]
+    try:
+        kernel = _rows_numpy if np is not None else _rows_python
+        kernel(*views, typecode, rA, inner, cB, r0, r1)
+    finally:
+        for view in views:
+            view.release()
+        for shm in segments:
+            shm.close()
+    return r1 - r0
+
+
+def _to_shared(values, typecode):
+    data = array(typecode, values)
+    shm = shared_memory.SharedMemory(create=True, size=max(len(data) * data.itemsize, 1))
+    shm.buf[: len(data) * data.itemsize] = memoryview(data).cast("B")
+    return shm
+
+
+class ParallelMultiplier:
+    # Row-block parallel multiply, the process-pool counterpart of the
+    # OpenMP "parallel for" in lab5/pmm.c
+    def __init__(self, workers=None, min_work=PARALLEL_MIN_WORK):
+        self.workers = workers or os.cpu_count() or 1
+        self.min_work = min_work
+        self._pool = None
+        self._pool_lock = threading.Lock()  # server threads may race to create it
+
+    def _get_pool(self):
+        with self._pool_lock:
+            if self._pool is None:
+                untrack = multiprocessing.get_start_method() != "fork"
+                self._pool = multiprocessing.Pool(
+                    self.workers, initializer=_worker_init, initargs=(untrack,)
+                )
+            return self._pool
+
+    def multiply(self, A, B, backend="auto"):
+        rA, inner, cB = check_shapes(A, B)
+        dtype = dtype_of(A, B)
+        if dtype == "int" and _fits_int64(A, B, inner):
+            typecode = "q"
+        elif dtype == "float":
+            typecode = "d"
+        else:
+            typecode = None  # big ints / non-numbers stay in exact Python
+        if typecode is None or self.workers < 2 or rA * inner * cB < self.min_work:
+            return multiply(A, B, backend)
+
+        segments = []
+        try:
+            a = _to_shared(A.data if isinstance(A, FlatMatrix) else chain.from_iterable(A), typecode)
+            segments.append(a)
+            BT = B.columns() if isinstance(B, FlatMatrix) else zip(*B)
+            bt = _to_shared(chain.from_iterable(BT), typecode)
+            segments.append(bt)
+            c = shared_memory.SharedMemory(create=True, size=rA * cB * 8)
+            segments.append(c)
+
+            step = max(1, -(-rA // (self.workers * BLOCKS_PER_WORKER)))
+            names = (a.name, bt.name, c.name)
+            tasks = [
+                (names, typecode, rA, inner, cB, r0, min(r0 + step, rA))
+                for r0 in range(0, rA, step)
+            ]
+            self._get_pool().map(_multiply_rows, tasks)
+
+            if isinstance(A, FlatMatrix) and isinstance(B, FlatMatrix):
+                data = array(typecode)
+                data.frombytes(c.buf[: rA * cB * 8])
+                return FlatMatrix(rA, cB, data)
+            flat = c.buf[: rA * cB * 8].cast(typecode)
+            try:
+                values = flat.tolist()
+            finally:
+                flat.release()
+            return [values[i * cB : (i + 1) * cB] for i in range(rA)]
+        finally:
+            for shm in segments:
+                shm.close()
+                shm.unlink()
+
+    def close(self):
+        with self._pool_lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.close()
+            pool.join()
@@ -0,0 +1,187 @@
+"""Benchmark the matrix-multiply backends in matmul.py.
+
+Multiplies random n x n integer (or --float) matrices with the original
+triple loop and each backend and prints a table of best-of-N timings.
+Slow backends are skipped above a size cap so the full 8..2048 sweep
+finishes in reasonable time.
+
+    python lab1/matmul_bench.py
+    python lab1/matmul_bench.py --sizes 64 128 256 --loop-max 256 --float
+    python lab1/matmul_bench.py --scaling --sizes 256 512 --workers 1 2 4 8
+    python lab1/matmul_bench.py --check
+
+--check compares every backend (and the parallel multiply) with the triple
+loop on random shapes and on edge cases such as ints beyond int64.
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+import matmul
+
+DEFAULT_SIZES = [8, 16, 32, 64, 128, 256, 512, 1024, 2048]
+
+
+def random_matrix(n, rnd, floats):
+    if floats:
+        return [[rnd.random() for _ in range(n)] for _ in range(n)]
+    return [[rnd.randint(0, 9) for _ in range(n)] for _ in range(n)]
+
+
+def best_time(fn, budget=0.5, max_repeat=20):
+    # Best of several runs; large sizes run once
+    best = None
+    spent = 0.0
+    for _ in range(max_repeat):
+        t = time.perf_counter()
+        fn()
+        dt = time.perf_counter() - t
+        best = dt if best is None else min(best, dt)
+        spent += dt
+        if spent >= budget:
+            break
+    return best
+
+
+def fmt(seconds):
+    if seconds is None:
+        return "skipped"
+    if seconds < 1e-3:
+        return f"{seconds * 1e6:.0f} us"
+    if seconds < 1:
+        return f"{seconds * 1e3:.1f} ms"
+    return f"{seconds:.2f} s"
+
+
+def default_workers():
+    counts, w = [], 1
+    cores = os.cpu_count() or 1
+    while w < cores:
+        counts.append(w)
+        w *= 2
+    return counts + [cores]
+
+
+def scaling(args):
+    # ParallelMultiplier over worker counts; 1 worker is the serial backend
+    sizes = args.sizes if args.sizes != DEFAULT_SIZES else [256, 512]
+    workers = args.workers or default_workers()
+    print(f"cores: {os.cpu_count()}  backend: {'numpy' if matmul.np else 'python'}\n")
+    header = f"{'n':>6} | {'workers':>7} | {'time':>10} | {'speedup':>7} | {'efficiency':>10}"
+    print(header)
+    print("-" * len(header))
+
+    rnd = random.Random(args.seed)
+    for n in sizes:
+        A = random_matrix(n, rnd, args.float)
+        B = random_matrix(n, rnd, args.float)
+        base = None
+        for w in workers:
+            pm = matmul.ParallelMultiplier(w, min_work=0)
+            try:
+                pm.multiply(A, B)  # start the pool outside the timing
+                t = best_time(lambda: pm.multiply(A, B), budget=1.0, max_repeat=5)
+            finally:
+                pm.close()
+            base = base or t
+            print(
+                f"{n:>6} | {w:>7} | {fmt(t):>10} | {base / t:>6.2f}x |"
+                f" {base / t / w * 100:>9.0f}%"
+            )
+            sys.stdout.flush()
+
+
+def check(args):
+    # Every backend must agree exactly with the reference triple loop
+    rnd = random.Random(args.seed)
+    big = matmul.INT64_MAX + 1
+    cases = [
+        ("huge A, zero B", [[big, -big], [3, big * 5]], [[0, 0, 0], [0, 0, 0]]),
+        ("zero A, huge B", [[0, 0]], [[big, 1], [2, -big]]),
+        ("int64 edge", [[matmul.INT64_MAX]], [[1]]),
+        ("overflowing products", [[2**40, 2**40]], [[2**40], [2**40]]),
+    ]
+    for _ in range(50):
+        r, k, c = rnd.randint(1, 40), rnd.randint(1, 40), rnd.randint(1, 40)
+        A = [[rnd.randint(-9, 9) for _ in range(k)] for _ in range(r)]
+        B = [[rnd.randint(-9, 9) for _ in range(c)] for _ in range(k)]
+        cases.append((f"random {r}x{k} @ {k}x{c}", A, B))
+
+    backends = ["python", "auto"] + (["numpy"] if matmul.np is not None else [])
+    pm = matmul.ParallelMultiplier(2, min_work=0)
+    try:
+        for name, A, B in cases:
+            expected = matmul.multiply_loop(A, B)
+            got = {b: matmul.multiply(A, B, b) for b in backends}
+            got["parallel"] = pm.multiply(A, B)
+            for backend, C in got.items():
+                # forced numpy falls back to float64 outside int64
+                exact = backend != "numpy" or matmul._fits_int64(A, B, len(B))
+                if exact and C != expected:
+                    raise SystemExit(f"{backend} disagrees with the triple loop on {name}")
+    finally:
+        pm.close()
+    print(f"{len(cases)} cases: {', '.join(backends)} and parallel match the triple loop")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="matmul backend benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--loop-max", type=int, default=256, help="largest n for the triple loop")
+    parser.add_argument("--python-max", type=int, default=1024, help="largest n for the blocked Python backend")
+    parser.add_argument("--float", action="store_true", help="float64 instead of small ints")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--scaling", action="store_true", help="time the parallel multiply across worker counts")
+    parser.add_argument("--workers", type=int, nargs="+", help="worker counts for --scaling")
+    parser.add_argument("--check", action="store_true", help="check every backend against the triple loop")
+    args = parser.parse_args()
+
+    if args.check:
+        check(args)
+        return
+    if args.scaling:
+        scaling(args)
+        return
+
+    limits = {"loop": args.loop_max, "python": args.python_max, "numpy": None}
+    backends = ["loop", "python"]
+    if matmul.np is not None:
+        backends.append("numpy")
+    else:
+        print("numpy not installed: numpy backend skipped\n")
+    columns = backends + ["auto"]
+
+    rnd = random.Random(args.seed)
+    header = f"{'n':>6} | " + " | ".join(f"{c:>10}" for c in columns) + " | speedup  (auto)"
+    print(header)
+    print("-" * len(header))
+
+    for n in args.sizes:
+        A = random_matrix(n, rnd, args.float)
+        B = random_matrix(n, rnd, args.float)
+        times = {}
+        for name in backends:
+            limit = limits[name]
+            if limit is not None and n > limit:
+                times[name] = None
+                continue
+            times[name] = best_time(lambda: matmul.multiply(A, B, name))
+        auto = matmul.choose_backend(A, B)
+        times["auto"] = times.get(auto)
+
+        base = times["loop"]
+        fastest = times["auto"]
+        if base and fastest:
+            speedup = f"{base / fastest:>7.1f}x"
+        else:
+            speedup = "      -"
+        cells = " | ".join(f"{fmt(times[c]):>10}" for c in columns)
+        print(f"{n:>6} | {cells} | {speedup}  ({auto})")
+        sys.stdout.flush()
+
+
+if __name__ == "__main__":
+    main()
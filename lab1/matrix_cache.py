@@ -0,0 +1,116 @@
+import hashlib
+import sys
+import threading
+from array import array
+from collections import OrderedDict
+from itertools import chain
+
+from matmul import FlatMatrix
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+
+def _digest_matrix(h, M):
+    if isinstance(M, FlatMatrix):
+        # same key as the equivalent int64/float64 list of rows
+        h.update(f"{M.rows}x{M.cols}:".encode())
+        h.update(M.data.typecode.encode() + M.data.tobytes())
+        return
+    rows = len(M)
+    cols = len(M[0]) if rows else 0
+    h.update(f"{rows}x{cols}:".encode())
+    flat = list(chain.from_iterable(M))
+    # Pack plain int64/float64 grids; anything else (big ints, mixed
+    # types) falls back to repr, which is slower but still exact
+    for typecode, kind in (("q", int), ("d", float)):
+        if all(type(x) is kind for x in flat):
+            try:
+                h.update(typecode.encode() + array(typecode, flat).tobytes())
+                return
+            except OverflowError:
+                break
+    h.update(b"r" + repr(flat).encode())
+
+
+def content_key(A, B) -> bytes:
+    h = hashlib.blake2b(digest_size=20)
+    _digest_matrix(h, A)
+    h.update(b"|")
+    _digest_matrix(h, B)
+    return h.digest()
+
+
+def matrix_nbytes(M) -> int:
+    # Approximate memory held by a result (list of rows or FlatMatrix)
+    if isinstance(M, FlatMatrix):
+        return sys.getsizeof(M) + sys.getsizeof(M.data)
+    size = sys.getsizeof(M)
+    for row in M:
+        size += sys.getsizeof(row) + sum(map(sys.getsizeof, row))
+    return size
+
+
+class MatrixCache:
+    # LRU of multiplication results keyed by a content hash of (A, B),
+    # evicting least recently used entries once max_bytes is exceeded
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (result, nbytes)
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, result):
+        nbytes = matrix_nbytes(result)
+        if nbytes > self.max_bytes:
+            return  # would evict everything else and still not fit
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._entries[key] = (result, nbytes)
+            self._bytes += nbytes
+            while self._bytes > self.max_bytes:
+                _, (_, size) = self._entries.popitem(last=False)
+                self._bytes -= size
+                self.evictions += 1
+
+    def multiply(self, A, B, compute):
+        # Cached compute(A, B); None results (bad shapes) are not stored
+        key = content_key(A, B)
+        result = self.get(key)
+        if result is None:
+            result = compute(A, B)
+            if result is not None:
+                self.put(key, result)
+        return result
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
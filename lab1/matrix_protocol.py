@@ -0,0 +1,121 @@
+import struct
+import sys
+from array import array
+from itertools import chain
+
+from matmul import FlatMatrix
+
+# A binary client opens the connection with MAGIC (a JSON request never
+# starts with a NUL byte) and then sends two matrix frames, A and B; the
+# server answers with one matrix frame (or an error frame).
+MAGIC = b"\x00MTX1"
+
+# dtype (u8), rows (u32), cols (u32), then rows*cols row-major little-endian
+# values. An error frame has dtype DTYPE_ERROR and rows = message length.
+HEADER = struct.Struct("<BII")
+MAX_PAYLOAD = 1024 * 1024 * 1024
+MAX_ERROR = 64 * 1024  # longest accepted error message in bytes
+
+DTYPE_ERROR = 0
+DTYPE_INT64 = 1
+DTYPE_FLOAT64 = 2
+
+TYPECODES = {DTYPE_INT64: "q", DTYPE_FLOAT64: "d"}
+ITEMSIZE = 8
+
+INT64_MIN, INT64_MAX = -(2**63), 2**63 - 1
+
+
+class ProtocolError(ValueError):
+    pass
+
+
+# ---------------------------
+# Socket helpers
+# ---------------------------
+def recv_exact_into(sock, view):
+    # Fill a writable memoryview from the socket without intermediate copies.
+    # EOFError if the peer closed before sending anything (a clean end of
+    # the request stream), ConnectionError if it closed mid-frame.
+    got = 0
+    total = len(view)
+    while got < total:
+        n = sock.recv_into(view[got:])
+        if not n:
+            if not got:
+                raise EOFError("connection closed")
+            raise ConnectionError("connection closed mid-frame")
+        got += n
+
+
+def recv_exact(sock, n) -> bytes:
+    buf = bytearray(n)
+    recv_exact_into(sock, memoryview(buf))
+    return bytes(buf)
+
+
+# ---------------------------
+# Frames
+# ---------------------------
+def dtype_for(M) -> int:
+    # int64 when every value is an int that fits, otherwise float64
+    ints = True
+    for row in M:
+        for x in row:
+            if isinstance(x, int):
+                if not INT64_MIN <= x <= INT64_MAX:
+                    raise ProtocolError("integer value does not fit in int64")
+            elif isinstance(x, float):
+                ints = False
+            else:
+                raise ProtocolError(f"unsupported element type: {type(x).__name__}")
+    return DTYPE_INT64 if ints else DTYPE_FLOAT64
+
+
+def send_matrix(sock, M, dtype=None):
+    if isinstance(M, FlatMatrix):
+        data = M.data
+        dtype = DTYPE_INT64 if data.typecode == "q" else DTYPE_FLOAT64
+        if sys.byteorder == "big":
+            data = array(data.typecode, data)
+            data.byteswap()
+        sock.sendall(HEADER.pack(dtype, M.rows, M.cols))
+        sock.sendall(memoryview(data).cast("B"))
+        return
+    rows = len(M)
+    cols = len(M[0]) if rows else 0
+    if dtype is None:
+        dtype = dtype_for(M)
+    data = array(TYPECODES[dtype], chain.from_iterable(M))
+    if len(data) != rows * cols:
+        raise ProtocolError("matrix rows have different lengths")
+    if sys.byteorder == "big":
+        data.byteswap()  # wire format is little-endian
+    sock.sendall(HEADER.pack(dtype, rows, cols))
+    sock.sendall(memoryview(data).cast("B"))
+
+
+def send_error(sock, message):
+    body = message.encode()
+    sock.sendall(HEADER.pack(DTYPE_ERROR, len(body), 0) + body)
+
+
+def recv_matrix(sock):
+    # Returns the matrix as a FlatMatrix over the received array (no
+    # per-element boxing); raises ProtocolError for an error frame or an
+    # invalid header
+    dtype, rows, cols = HEADER.unpack(recv_exact(sock, HEADER.size))
+    if dtype == DTYPE_ERROR:
+        if rows > MAX_ERROR:
+            raise ProtocolError(f"error message of {rows} bytes exceeds the {MAX_ERROR}-byte limit")
+        raise ProtocolError(recv_exact(sock, rows).decode("utf-8", "replace"))
+    if dtype not in TYPECODES:
+        raise ProtocolError(f"unknown dtype {dtype}")
+    count = rows * cols
+    if count * ITEMSIZE > MAX_PAYLOAD:
+        raise ProtocolError(f"{rows}x{cols} matrix exceeds the payload limit")
+    data = array(TYPECODES[dtype], [0]) * count  # preallocated, filled in place
+    recv_exact_into(sock, memoryview(data).cast("B"))
+    if sys.byteorder == "big":
+        data.byteswap()  # wire format is little-endian
+    return FlatMatrix(rows, cols, data)
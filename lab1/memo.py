@@ -0,0 +1,149 @@
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+DEFAULT_MAX_ENTRIES = 1_000_000
+
+
+class Memo:
+    # Size-bounded LRU of (operation, number) -> result with hit/miss
+    # counters. With a path, the contents are snapshotted to SQLite (in LRU
+    # order) and loaded back at startup, so a restarted server keeps its
+    # hot keys.
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, path=None):
+        self.max_entries = max_entries
+        self.path = path
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.loaded = 0
+        self.last_snapshot = None
+        if path:
+            self.load()
+
+    def lookup(self, key, compute):
+        # compute(*key) on a miss; keys must be (str, int) tuples
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+        value = compute(*key)
+        self._store(key, value)
+        return value
+
+    def lookup_many(self, op, numbers, compute):
+        # Batch version of lookup(): one lock round per batch, not per number
+        entries = self._entries
+        results = []
+        missing = []
+        with self._lock:
+            for n in numbers:
+                key = (op, n)
+                if key in entries:
+                    entries.move_to_end(key)
+                    results.append(entries[key])
+                else:
+                    missing.append(len(results))
+                    results.append(None)
+            self.hits += len(results) - len(missing)
+            self.misses += len(missing)
+        if missing:
+            computed = [(i, compute(op, numbers[i])) for i in missing]
+            with self._lock:
+                for i, value in computed:
+                    results[i] = value
+                    self._put((op, numbers[i]), value)
+        return results
+
+    def _store(self, key, value):
+        with self._lock:
+            self._put(key, value)
+
+    def _put(self, key, value):
+        # caller holds the lock
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "loaded_from_disk": self.loaded,
+                "snapshot_file": self.path or "",
+                "last_snapshot": self.last_snapshot or "",
+            }
+
+    # ---------------------------
+    # Persistence
+    # ---------------------------
+    def _connect(self):
+        db = sqlite3.connect(self.path)
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS memo ("
+            "rank INTEGER PRIMARY KEY, op TEXT, n TEXT, result INTEGER)"
+        )
+        return db
+
+    def load(self):
+        db = self._connect()
+        try:
+            # numbers are stored as text so big ints survive the round trip
+            rows = db.execute(
+                "SELECT op, n, result FROM memo ORDER BY rank DESC LIMIT ?",
+                (self.max_entries,),
+            ).fetchall()
+        finally:
+            db.close()
+        loaded = 0
+        with self._lock:
+            for op, n, result in reversed(rows):
+                try:
+                    key = (op, int(n))
+                except (TypeError, ValueError):
+                    continue  # not an int key (older snapshots stored any type)
+                self._entries[key] = None if result is None else bool(result)
+                loaded += 1
+            self.loaded = loaded
+
+    def snapshot(self):
+        # Rewrite the file with the current contents, least recent first
+        with self._lock:
+            items = list(self._entries.items())
+        db = self._connect()
+        try:
+            with db:
+                db.execute("DELETE FROM memo")
+                db.executemany(
+                    "INSERT INTO memo (rank, op, n, result) VALUES (?, ?, ?, ?)",
+                    (
+                        (rank, op, str(n), None if value is None else int(value))
+                        for rank, ((op, n), value) in enumerate(items)
+                    ),
+                )
+        finally:
+            db.close()
+        self.last_snapshot = time.strftime("%Y-%m-%d %H:%M:%S")
+        return len(items)
+
+    def start_autosave(self, interval):
+        # Snapshot every interval seconds from a daemon thread
+        def run():
+            while True:
+                time.sleep(interval)
+                self.snapshot()
+
+        threading.Thread(target=run, daemon=True).start()
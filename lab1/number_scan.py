@@ -0,0 +1,113 @@
+import multiprocessing
+import os
+from functools import lru_cache
+
+OPS = ("palindrome", "armstrong")
+
+LOW_DIGITS = 3
+LOW = 10**LOW_DIGITS
+PARALLEL_MIN_SPAN = 10_000_000  # smaller armstrong scans stay in-process
+CHUNK_SPAN = 5_000_000  # numbers per pool task (a multiple of LOW)
+
+
+# ---------------------------
+# Palindromes: build them from their first half
+# ---------------------------
+def palindromes(lo, hi):
+    # Every palindrome in [lo, hi), ascending. There are only ~2*sqrt(hi)
+    # of them, so generating beats testing each integer.
+    lo = max(lo, 0)
+    if lo >= hi:
+        return
+    for length in range(len(str(lo)), len(str(hi - 1)) + 1):
+        half_len = (length + 1) // 2
+        first = 0 if length == 1 else 10 ** (half_len - 1)
+        # skip halves whose palindrome is certainly below lo
+        if len(str(lo)) == length:
+            first = max(first, int(str(lo)[:half_len]))
+        for half in range(first, 10**half_len):
+            s = str(half)
+            n = int(s + s[-1 - (length % 2) :: -1]) if length > 1 else half
+            if n >= hi:
+                return
+            if n >= lo:
+                yield n
+
+
+# ---------------------------
+# Armstrong numbers: digit-power tables per length
+# ---------------------------
+@lru_cache(maxsize=None)
+def digit_powers(length):
+    return tuple(d**length for d in range(10))
+
+
+@lru_cache(maxsize=None)
+def _tables(length):
+    # chunk[i]: digit-power sum of the LOW_DIGITS-digit block i (leading
+    # zeros contribute 0). by_offset groups low blocks by chunk[l] - l, so
+    # for a high part h with digit-power sum s, the Armstrong numbers
+    # h*LOW + l are exactly the l with chunk[l] - l == h*LOW - s.
+    powers = digit_powers(length)
+    chunk = [0] * LOW
+    for i in range(LOW):
+        chunk[i] = chunk[i // 10] + powers[i % 10]
+    by_offset = {}
+    for low, s in enumerate(chunk):
+        by_offset.setdefault(s - low, []).append(low)
+    return chunk, by_offset
+
+
+def _armstrong_length(length, lo, hi):
+    chunk, by_offset = _tables(length)
+    get = by_offset.get
+    for h in range(lo // LOW, (hi - 1) // LOW + 1):
+        s = 0
+        x = h
+        while x:
+            s += chunk[x % LOW]
+            x //= LOW
+        lows = get(h * LOW - s)
+        if lows:
+            base = h * LOW
+            for low in lows:
+                n = base + low
+                if lo <= n < hi:
+                    yield n
+
+
+def armstrongs(lo, hi):
+    # Every Armstrong number in [lo, hi), ascending
+    lo = max(lo, 0)
+    if lo >= hi:
+        return
+    for length in range(len(str(lo)), len(str(hi - 1)) + 1):
+        start = max(lo, 10 ** (length - 1) if length > 1 else 0)
+        stop = min(hi, 10**length)
+        yield from _armstrong_length(length, start, stop)
+
+
+def _armstrong_chunk(bounds):
+    return list(armstrongs(*bounds))
+
+
+# ---------------------------
+# Public entry point
+# ---------------------------
+def scan(op, lo, hi, workers=None):
+    # Yield every number in [lo, hi) matching op. Large armstrong ranges are
+    # split across a process pool; results still arrive in ascending order.
+    if op == "palindrome":
+        yield from palindromes(lo, hi)
+        return
+    if op != "armstrong":
+        raise ValueError(f"unknown operation: {op}")
+
+    workers = workers or os.cpu_count() or 1
+    if workers < 2 or hi - lo < PARALLEL_MIN_SPAN:
+        yield from armstrongs(lo, hi)
+        return
+    edges = list(range(lo, hi, CHUNK_SPAN)) + [hi]
+    with multiprocessing.Pool(workers) as pool:
+        for found in pool.imap(_armstrong_chunk, zip(edges, edges[1:])):
+            yield from found
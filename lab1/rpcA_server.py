@@ -1,37 +1,36 @@
-from xmlrpc.server import SimpleXMLRPCServer
+import matmul
+from matrix_cache import DEFAULT_MAX_BYTES, MatrixCache
+from rpc_common import make_server
 
+BACKEND = "auto"  # see matmul.BACKENDS
 
-def multiply(A, B):
-    result = [[0 for _ in range(len(B[0]))] for _ in range(len(A))]
-    for i in range(len(A)):
-        for j in range(len(B[0])):
-            for k in range(len(B)):
-                result[i][j] += A[i][k] * B[k][j]
-    return result
+cache = MatrixCache(DEFAULT_MAX_BYTES)
 
 
-from xmlrpc.server import SimpleXMLRPCServer
+def compute(A, B):
+    try:
+        return matmul.multiply(A, B, BACKEND)
+    except matmul.ShapeError:
+        return None
 
 
 def multiply(A, B):
-    rA, cA = len(A), len(A[0])
-    rB, cB = len(B), len(B[0])
+    return cache.multiply(A, B, compute)
 
-    if cA != rB:
-        return None
 
-    result = [[0 for _ in range(cB)] for _ in range(rA)]
+def multiply_many(pairs):
+    # [[A, B], ...] -> [A @ B or None, ...] in one round trip
+    return [multiply(A, B) for A, B in pairs]
 
-    for i in range(rA):
-        for j in range(cB):
-            for k in range(cA):
-                result[i][j] += A[i][k] * B[k][j]
 
-    return result
+def cache_stats():
+    return cache.stats()
 
 
-server = SimpleXMLRPCServer(("localhost", 6000))
+server = make_server(("localhost", 6000))
 print("RPC Matrix Server running...")
 
 server.register_function(multiply, "multiply")
+server.register_function(multiply_many, "multiply_many")
+server.register_function(cache_stats, "cache_stats")
 server.serve_forever()
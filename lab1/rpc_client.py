@@ -1,31 +1,97 @@
+import argparse
+import time
 import xmlrpc.client
 
-proxy = xmlrpc.client.ServerProxy("http://127.0.0.1:6000/")
+CHUNK = 50_000  # numbers per check_many call
 
-print("Choose: palindrome / armstrong / exit")
 
-while True:
-    op = input("\nEnter choice: ").strip().lower()
+def check_range(proxy, op, lo, hi, multicall=False):
+    # Check every number in [lo, hi) with as few round trips as possible;
+    # returns the numbers for which the check is true
+    matches = []
+    for start in range(lo, hi, CHUNK):
+        numbers = list(range(start, min(start + CHUNK, hi)))
+        if multicall:
+            # system.multicall: many check() calls in one HTTP request
+            batch = xmlrpc.client.MultiCall(proxy)
+            for n in numbers:
+                batch.check(op, n)
+            results = batch()
+        else:
+            results = proxy.check_many(op, numbers)
+        matches.extend(n for n, ok in zip(numbers, results) if ok)
+    return matches
 
-    if op == "exit":
-        print("Exiting program.")
-        break
 
-    if op not in ("palindrome", "armstrong"):
-        print("Invalid choice, try again.")
-        continue
+def interactive(proxy):
+    print("Choose: palindrome / armstrong / exit")
 
-    num = input("Enter number: ").strip()
+    while True:
+        op = input("\nEnter choice: ").strip().lower()
 
-    if not num.isdigit():
-        print("Only digits allowed.")
-        continue
+        if op == "exit":
+            print("Exiting program.")
+            break
 
-    num = int(num)
+        if op not in ("palindrome", "armstrong"):
+            print("Invalid choice, try again.")
+            continue
 
-    result = proxy.check(op, num)
+        num = input("Enter number: ").strip()
 
-    if op == "palindrome":
-        print("Palindrome result:", "YES" if result else "NO")
-    else:
-        print("Armstrong result:", "YES" if result else "NO")
+        if not num.isdigit():
+            print("Only digits allowed.")
+            continue
+
+        num = int(num)
+
+        result = proxy.check(op, num)
+
+        if op == "palindrome":
+            print("Palindrome result:", "YES" if result else "NO")
+        else:
+            print("Armstrong result:", "YES" if result else "NO")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Palindrome / Armstrong RPC client")
+    parser.add_argument("--url", default="http://127.0.0.1:6000/")
+    parser.add_argument(
+        "--range",
+        nargs=3,
+        metavar=("OP", "LO", "HI"),
+        help="check every number in [LO, HI) in batches instead of prompting",
+    )
+    parser.add_argument(
+        "--scan",
+        nargs=3,
+        metavar=("OP", "LO", "HI"),
+        help="let the server enumerate matches in [LO, HI) (fast, any size)",
+    )
+    parser.add_argument("--multicall", action="store_true", help="batch with system.multicall instead of check_many")
+    args = parser.parse_args()
+
+    # One ServerProxy = one persistent HTTP/1.1 connection for every call
+    with xmlrpc.client.ServerProxy(args.url) as proxy:
+        if args.scan:
+            op, lo, hi = args.scan
+            start = time.perf_counter()
+            matches = [int(n) for n in proxy.scan(op, lo, hi)]
+            elapsed = time.perf_counter() - start
+            print(f"{len(matches)} {op} numbers in [{lo}, {hi}) ({elapsed:.2f}s)")
+            print(matches[:50] if len(matches) > 50 else matches)
+            return
+        if not args.range:
+            interactive(proxy)
+            return
+
+        op, lo, hi = args.range[0], int(args.range[1]), int(args.range[2])
+        start = time.perf_counter()
+        matches = check_range(proxy, op, lo, hi, args.multicall)
+        elapsed = time.perf_counter() - start
+        print(f"{len(matches)} {op} numbers in [{lo}, {hi}) ({elapsed:.2f}s)")
+        print(matches[:50] if len(matches) > 50 else matches)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,25 @@
+from socketserver import ThreadingMixIn
+from xmlrpc.server import SimpleXMLRPCRequestHandler, SimpleXMLRPCServer
+
+
+class KeepAliveRequestHandler(SimpleXMLRPCRequestHandler):
+    # HTTP/1.1 keeps the connection open between calls, so a ServerProxy
+    # reuses one TCP connection instead of reconnecting per call
+    protocol_version = "HTTP/1.1"
+
+
+class ThreadedXMLRPCServer(ThreadingMixIn, SimpleXMLRPCServer):
+    # One thread per connection (not per call)
+    daemon_threads = True
+    allow_reuse_address = True
+    request_queue_size = 128
+
+
+def make_server(addr, **kwargs):
+    # Threaded keep-alive server with system.multicall and introspection
+    kwargs.setdefault("allow_none", True)
+    kwargs.setdefault("logRequests", False)
+    server = ThreadedXMLRPCServer(addr, requestHandler=KeepAliveRequestHandler, **kwargs)
+    server.register_introspection_functions()
+    server.register_multicall_functions()
+    return server
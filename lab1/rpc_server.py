@@ -1,4 +1,13 @@
-from xmlrpc.server import SimpleXMLRPCServer
+import argparse
+
+import number_scan
+from memo import DEFAULT_MAX_ENTRIES, Memo
+from rpc_common import make_server
+
+MAXINT = 2**31 - 1  # largest int XML-RPC can carry
+MEMOIZED = ("check", "check_many")
+
+memo = None
 
 
 def is_palindrome(n):
@@ -8,12 +17,15 @@ def is_palindrome(n):
 
 def is_armstrong(n):
     s = str(n)
-    power = len(s)
-    total = sum(int(d) ** power for d in s)
+    powers = number_scan.digit_powers(len(s))
+    total = sum(powers[int(d)] for d in s)
     return total == n
 
 
-def check(operation, number):
+CHECKS = {"palindrome": is_palindrome, "armstrong": is_armstrong}
+
+
+def compute(operation, number):
     if operation == "palindrome":
         return is_palindrome(number)
     elif operation == "armstrong":
@@ -22,8 +34,80 @@ def check(operation, number):
         return None
 
 
-server = SimpleXMLRPCServer(("0.0.0.0", 6000))
-print("RPC Server running...")
+def check(operation, number):
+    """check(operation, number) -> bool ("palindrome" or "armstrong")"""
+    # only int arguments are memoized; the snapshot stores them as decimal text
+    if memo is None or operation not in CHECKS or type(number) is not int:
+        return compute(operation, number)
+    return memo.lookup((operation, number), compute)
+
+
+def check_many(operation, numbers):
+    """check_many(operation, numbers) -> [bool, ...] in one round trip"""
+    if operation not in CHECKS:
+        return None
+    if memo is None or not all(type(n) is int for n in numbers):
+        fn = CHECKS[operation]
+        return [fn(n) for n in numbers]
+    return memo.lookup_many(operation, numbers, compute)
+
+
+def cache_stats():
+    return memo.stats() if memo is not None else {}
+
+
+def scan(operation, lo, hi):
+    # Every matching number in [lo, hi); bounds and results beyond MAXINT
+    # travel as decimal strings
+    if operation not in number_scan.OPS:
+        return None
+    found = number_scan.scan(operation, int(lo), int(hi))
+    return [n if n <= MAXINT else str(n) for n in found]
+
+
+def main():
+    global memo
+
+    parser = argparse.ArgumentParser(description="Palindrome / Armstrong RPC server")
+    parser.add_argument("--port", type=int, default=6000)
+    parser.add_argument("--memo-size", type=int, default=DEFAULT_MAX_ENTRIES, help="memoized results (0 disables the memo)")
+    parser.add_argument("--memo-file", help="SQLite snapshot loaded at startup and saved on exit")
+    parser.add_argument("--snapshot-interval", type=float, default=60.0, help="seconds between snapshots")
+    args = parser.parse_args()
+
+    if args.memo_size > 0:
+        memo = Memo(args.memo_size, args.memo_file)
+        if memo.loaded:
+            print(f"Loaded {memo.loaded} memoized results from {args.memo_file}")
+        if args.memo_file and args.snapshot_interval > 0:
+            memo.start_autosave(args.snapshot_interval)
+
+    server = make_server(("0.0.0.0", args.port))
+    print("RPC Server running...")
+
+    server.register_function(check, "check")
+    server.register_function(check_many, "check_many")
+    server.register_function(scan, "scan")
+    server.register_function(cache_stats, "cache_stats")
+
+    def method_help(name):
+        # system.methodHelp, plus live memo statistics for memoized methods
+        text = server.system_methodHelp(name)
+        if name in MEMOIZED and memo is not None:
+            stats = memo.stats()
+            text += "\n\nMemo: " + ", ".join(f"{k}={v}" for k, v in stats.items())
+        return text
+
+    server.register_function(method_help, "system.methodHelp")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nShutting down...")
+    finally:
+        if memo is not None and memo.path:
+            print(f"Saved {memo.snapshot()} memoized results to {memo.path}")
+
 
-server.register_function(check, "check")
-server.serve_forever()
+if __name__ == "__main__":
+    main()
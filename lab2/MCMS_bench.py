@@ -0,0 +1,310 @@
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+import MCMS_protocol
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SERVER = os.path.join(HERE, "MCMS_server.py")
+
+
+# ---------------------------
+# Helpers
+# ---------------------------
+def free_port():
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(port, *extra):
+    # stdin stays open so the admin console keeps waiting instead of hitting EOF
+    proc = subprocess.Popen(
+        [sys.executable, SERVER, str(port), *extra],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    deadline = time.time() + 10
+    while time.time() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.5).close()
+            return proc
+        except OSError:
+            time.sleep(0.05)
+    proc.kill()
+    raise RuntimeError(f"server on port {port} did not come up")
+
+
+def stop_server(proc):
+    try:
+        proc.stdin.write(b"exit\n")
+        proc.stdin.flush()
+        proc.wait(5)
+    except Exception:
+        proc.kill()
+
+
+def proc_stats(pid):
+    # Linux only: thread count and resident memory of the server process
+    stats = {"threads": "n/a", "rss_kb": "n/a"}
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("Threads:"):
+                    stats["threads"] = int(line.split()[1])
+                elif line.startswith("VmRSS:"):
+                    stats["rss_kb"] = int(line.split()[1])
+    except OSError:
+        pass
+    return stats
+
+
+def recv_lines(sock, buf, count):
+    # Read until `count` newline-terminated lines are buffered; returns leftover
+    while buf.count(b"\n") < count:
+        data = sock.recv(65536)
+        if not data:
+            raise ConnectionError("server closed connection")
+        buf += data
+    return buf
+
+
+def run_clients(port, clients, requests, command="add 1 2", reply_lines=1):
+    # Each client does `requests` sequential round trips; returns commands/sec
+    line = (command + "\n").encode()
+    errors = []
+
+    def worker():
+        try:
+            with socket.create_connection(("127.0.0.1", port)) as s:
+                buf = b""
+                for _ in range(requests):
+                    s.sendall(line)
+                    buf = recv_lines(s, buf, reply_lines)
+                    for _ in range(reply_lines):
+                        buf = buf[buf.index(b"\n") + 1 :]
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker) for _ in range(clients)]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - t0
+    return clients * requests / elapsed, errors
+
+
+def run_pipelined(port, clients, requests, depth, explicit=False, command="add 1 2"):
+    # Each client writes `depth` commands at once (optionally wrapped in a
+    # BATCH header) and waits for all replies before the next window
+    window = (command + "\n").encode() * depth
+    expected = depth
+    if explicit:
+        window = f"BATCH {depth}\n".encode() + window
+        expected += 1  # "BATCH n" header line
+    rounds = max(1, requests // depth)
+    errors = []
+
+    def worker():
+        try:
+            with socket.create_connection(("127.0.0.1", port)) as s:
+                for _ in range(rounds):
+                    s.sendall(window)
+                    buf = recv_lines(s, b"", expected)
+                    if buf.count(b"\n") != expected:
+                        raise RuntimeError("unexpected number of reply lines")
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker) for _ in range(clients)]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - t0
+    return clients * rounds * depth / elapsed, errors
+
+
+def recv_exact(sock, n):
+    buf = bytearray(n)
+    view = memoryview(buf)
+    got = 0
+    while got < n:
+        k = sock.recv_into(view[got:])
+        if not k:
+            raise ConnectionError("server closed connection")
+        got += k
+    return buf
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return 0.0
+    k = min(len(sorted_values) - 1, int(round(p / 100 * (len(sorted_values) - 1))))
+    return sorted_values[k]
+
+
+def protocol_round_trips(port, binary, requests, depth):
+    # Returns (latencies in seconds for depth=1 round trips, cmds/s pipelined)
+    with socket.create_connection(("127.0.0.1", port)) as s:
+        s.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        if binary:
+            s.sendall(MCMS_protocol.MAGIC)
+            recv_exact(s, len(MCMS_protocol.MAGIC))
+            one = MCMS_protocol.encode(
+                MCMS_protocol.OP_ADD, MCMS_protocol.PAIR.pack(1.5, 2.25)
+            )
+            reply_size = MCMS_protocol.HEADER.size + MCMS_protocol.DOUBLE.size
+        else:
+            one = b"add 1.5 2.25\n"
+            reply_size = len(b"RESULT: 3.75\n")
+
+        latencies = []
+        for _ in range(requests):
+            t0 = time.perf_counter()
+            s.sendall(one)
+            recv_exact(s, reply_size)
+            latencies.append(time.perf_counter() - t0)
+
+        window = one * depth
+        rounds = max(1, requests // depth)
+        t0 = time.perf_counter()
+        for _ in range(rounds):
+            s.sendall(window)
+            recv_exact(s, reply_size * depth)
+        rate = rounds * depth / (time.perf_counter() - t0)
+
+    latencies.sort()
+    return latencies, rate
+
+
+# ---------------------------
+# Benchmarks
+# ---------------------------
+def bench_engines(args):
+    print(
+        f"{'engine':<10}{'idle conns':>12}{'threads':>10}{'rss (KB)':>12}"
+        f"{'setup (s)':>12}{'cmds/s':>12}{'errors':>8}"
+    )
+    for engine in ("threads", "asyncio"):
+        port = free_port()
+        proc = start_server(port, "--engine", engine)
+        idle = []
+        try:
+            t0 = time.perf_counter()
+            for _ in range(args.idle):
+                idle.append(socket.create_connection(("127.0.0.1", port)))
+            setup = time.perf_counter() - t0
+            time.sleep(0.5)  # let the server settle all accepted connections
+            stats = proc_stats(proc.pid)
+
+            rate, errors = run_clients(port, args.clients, args.requests)
+            print(
+                f"{engine:<10}{args.idle:>12}{stats['threads']:>10}{stats['rss_kb']:>12}"
+                f"{setup:>12.3f}{rate:>12.0f}{len(errors):>8}"
+            )
+        finally:
+            for s in idle:
+                s.close()
+            stop_server(proc)
+
+
+def bench_batch(args):
+    scenarios = [
+        ("batching off", ["--no-batching"], False),
+        ("auto batching", [], False),
+        ("BATCH n", [], True),
+    ]
+    print(f"{'mode':<16}{'depth':>8}{'cmds/s':>12}{'errors':>8}")
+    for name, flags, explicit in scenarios:
+        port = free_port()
+        proc = start_server(port, "--engine", args.engine, *flags)
+        try:
+            rate, errors = run_pipelined(
+                port, args.clients, args.requests, args.depth, explicit
+            )
+            print(f"{name:<16}{args.depth:>8}{rate:>12.0f}{len(errors):>8}")
+        finally:
+            stop_server(proc)
+
+
+def bench_protocol(args):
+    port = free_port()
+    proc = start_server(port, "--engine", args.engine)
+    print(
+        f"{'protocol':<10}{'p50 (us)':>10}{'p99 (us)':>10}{'max (us)':>10}"
+        f"{'pipelined cmds/s':>18}"
+    )
+    try:
+        for name, binary in (("text", False), ("binary", True)):
+            lat, rate = protocol_round_trips(port, binary, args.requests, args.depth)
+            print(
+                f"{name:<10}{percentile(lat, 50) * 1e6:>10.1f}"
+                f"{percentile(lat, 99) * 1e6:>10.1f}{lat[-1] * 1e6:>10.1f}{rate:>18.0f}"
+            )
+    finally:
+        stop_server(proc)
+
+
+def bench_workers(args):
+    # CPU-bound analyze requests: one process vs N SO_REUSEPORT workers
+    command = "analyze " + " ".join(["lorem ipsum dolor sit amet"] * args.words)
+    print(f"{'workers':<10}{'clients':>10}{'cmds/s':>12}{'errors':>8}")
+    for workers in (0, args.workers):
+        port = free_port()
+        proc = start_server(port, "--engine", args.engine, "--workers", str(workers))
+        try:
+            time.sleep(0.5)  # all workers bound
+            rate, errors = run_clients(
+                port, args.clients, args.requests, command, reply_lines=5
+            )
+            print(f"{workers or 1:<10}{args.clients:>10}{rate:>12.0f}{len(errors):>8}")
+        finally:
+            stop_server(proc)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="MCMS server benchmarks")
+    sub = parser.add_subparsers(dest="bench", required=True)
+
+    p = sub.add_parser("engines", help="thread-per-connection vs asyncio engine")
+    p.add_argument("--idle", type=int, default=1000, help="idle connections held open")
+    p.add_argument("--clients", type=int, default=8, help="active clients")
+    p.add_argument("--requests", type=int, default=2000, help="round trips per client")
+    p.set_defaults(func=bench_engines)
+
+    p = sub.add_parser("batch", help="pipelined commands with batching on/off")
+    p.add_argument("--engine", default="threads")
+    p.add_argument("--clients", type=int, default=4)
+    p.add_argument("--requests", type=int, default=50000, help="commands per client")
+    p.add_argument("--depth", type=int, default=500, help="commands per write")
+    p.set_defaults(func=bench_batch)
+
+    p = sub.add_parser("protocol", help="text vs binary protocol latency/throughput")
+    p.add_argument("--engine", default="threads")
+    p.add_argument("--requests", type=int, default=20000)
+    p.add_argument("--depth", type=int, default=500, help="commands per write")
+    p.set_defaults(func=bench_protocol)
+
+    p = sub.add_parser("workers", help="single process vs SO_REUSEPORT workers")
+    p.add_argument("--engine", default="threads")
+    p.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    p.add_argument("--clients", type=int, default=16)
+    p.add_argument("--requests", type=int, default=200, help="round trips per client")
+    p.add_argument("--words", type=int, default=2000, help="size of each analyze text")
+    p.set_defaults(func=bench_workers)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
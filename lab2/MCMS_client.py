@@ -1,27 +1,71 @@
+import argparse
 import socket
-import sys
+
+import MCMS_protocol
 
 
 class Client:
-    def __init__(self, host: str, port: int):
+    def __init__(self, host: str, port: int, binary: bool = False):
         self.host = host
         self.port = port
+        self.binary = binary
         self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
 
     def connect(self):
         self.socket.connect((self.host, self.port))
-        print(f"Connected to {self.host}:{self.port}")
-        print("Type commands (add, sub, mul, div, analyze). Type 'quit' to exit.")
+        if self.binary:
+            self.socket.sendall(MCMS_protocol.MAGIC)
+            if self._recv_exact(len(MCMS_protocol.MAGIC)) != MCMS_protocol.MAGIC:
+                raise ConnectionError("Server does not support the binary protocol")
+        print(
+            f"Connected to {self.host}:{self.port}"
+            f" ({'binary' if self.binary else 'text'} protocol)"
+        )
+        print(
+            "Type commands (add, sub, mul, div, analyze, "
+            "vadd, vsub, vmul, vdiv, vdot, sum, mean, min, max). Type 'quit' to exit."
+        )
 
     def send(self, message: str):
+        if self.binary:
+            op, payload = MCMS_protocol.encode_command(message)
+            self.send_frame(op, payload)
+            return
         self.socket.sendall((message + "\n").encode())
 
     def receive(self) -> str:
+        if self.binary:
+            return MCMS_protocol.decode_response(*self.receive_frame())
         data = self.socket.recv(8192)
         if not data:
             raise ConnectionError("Server closed connection")
         return data.decode().rstrip()
 
+    # ----- binary protocol -----
+    def send_frame(self, op: int, payload: bytes = b""):
+        self.socket.sendall(MCMS_protocol.encode(op, payload))
+
+    def receive_frame(self) -> tuple:
+        # Returns (opcode, status, payload) of the next response
+        header = self._recv_exact(MCMS_protocol.HEADER.size)
+        op, status, length = MCMS_protocol.HEADER.unpack(header)
+        return op, status, bytes(self._recv_exact(length))
+
+    def request(self, op: int, payload: bytes = b"") -> tuple:
+        self.send_frame(op, payload)
+        return self.receive_frame()
+
+    def _recv_exact(self, n: int) -> bytearray:
+        buf = bytearray(n)
+        view = memoryview(buf)
+        got = 0
+        while got < n:
+            k = self.socket.recv_into(view[got:])
+            if not k:
+                raise ConnectionError("Server closed connection")
+            got += k
+        return buf
+
     def close(self):
         self.socket.close()
         print("Connection closed.")
@@ -51,14 +95,15 @@ class Client:
 
 # ===== Entry point =====
 def main():
-    if len(sys.argv) != 3:
-        print("Usage: python client.py <host> <port>")
-        sys.exit(1)
-
-    host = sys.argv[1]
-    port = int(sys.argv[2])
-
-    client = Client(host, port)
+    parser = argparse.ArgumentParser(description="MCMS client")
+    parser.add_argument("host")
+    parser.add_argument("port", type=int)
+    parser.add_argument(
+        "--binary", action="store_true", help="use the binary length-prefixed protocol"
+    )
+    args = parser.parse_args()
+
+    client = Client(args.host, args.port, binary=args.binary)
     client.run()
 
 
@@ -0,0 +1,276 @@
+import json
+import threading
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Latency histograms are log-bucketed over nanoseconds: values below 16 get
+# their own bucket, above that each power of two is split into 8 sub-buckets
+# (~12% relative error), so recording is a couple of integer operations.
+SUB_BUCKET_BITS = 3
+SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+
+PERCENTILES = (50, 90, 99)
+
+
+def bucket_index(ns: int) -> int:
+    e = max(ns.bit_length() - SUB_BUCKET_BITS - 1, 0)
+    return (e << SUB_BUCKET_BITS) + (ns >> e)
+
+
+def bucket_upper(index: int) -> int:
+    # Largest value that falls into the bucket
+    if index < 2 * SUB_BUCKETS:
+        return index
+    e = (index >> SUB_BUCKET_BITS) - 1
+    m = index - (e << SUB_BUCKET_BITS)
+    return ((m + 1) << e) - 1
+
+
+# ---------------------------
+# Snapshot helpers (plain dicts, so worker snapshots can be merged)
+# ---------------------------
+def _new_histogram():
+    return {"count": 0, "sum": 0, "max": 0, "buckets": {}}
+
+
+def _merge_histogram(into, h):
+    into["count"] += h["count"]
+    into["sum"] += h["sum"]
+    into["max"] = max(into["max"], h["max"])
+    buckets = into["buckets"]
+    for k, v in h["buckets"].items():
+        k = int(k)  # JSON turns keys into strings
+        buckets[k] = buckets.get(k, 0) + v
+
+
+def percentile(h, p) -> int:
+    # Upper bound (ns) of the bucket holding the p-th percentile
+    if not h["count"]:
+        return 0
+    rank = p / 100 * h["count"]
+    seen = 0
+    for k in sorted(h["buckets"], key=int):
+        seen += h["buckets"][k]
+        if seen >= rank:
+            return min(bucket_upper(int(k)), h["max"])
+    return h["max"]
+
+
+def summarize(h) -> dict:
+    out = {"count": h["count"], "max_us": h["max"] / 1000}
+    out["mean_us"] = h["sum"] / h["count"] / 1000 if h["count"] else 0.0
+    for p in PERCENTILES:
+        out[f"p{p}_us"] = percentile(h, p) / 1000
+    return out
+
+
+def empty_snapshot():
+    return {
+        "active_connections": 0,
+        "commands": {},
+        "errors": {},
+        "ports": {},
+        "latency": {"handle": _new_histogram(), "send": _new_histogram()},
+    }
+
+
+def merge(snapshots) -> dict:
+    total = empty_snapshot()
+    for snap in snapshots:
+        total["active_connections"] += snap["active_connections"]
+        for key in ("commands", "errors"):
+            for name, n in snap[key].items():
+                total[key][name] = total[key].get(name, 0) + n
+        for port, counters in snap["ports"].items():
+            dst = total["ports"].setdefault(str(port), {})
+            for name, n in counters.items():
+                dst[name] = dst.get(name, 0) + n
+        for name, h in snap["latency"].items():
+            _merge_histogram(total["latency"][name], h)
+    return total
+
+
+# ---------------------------
+# Live metrics (one per process)
+# ---------------------------
+class Metrics:
+    PORT_COUNTERS = ("connections", "active", "commands", "bytes_in", "bytes_out")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._active = 0
+        self._commands = defaultdict(int)
+        self._errors = defaultdict(int)
+        self._ports = defaultdict(lambda: dict.fromkeys(self.PORT_COUNTERS, 0))
+        self._hist = {"handle": _new_histogram(), "send": _new_histogram()}
+
+    def _observe(self, name, ns):
+        h = self._hist[name]
+        h["count"] += 1
+        h["sum"] += ns
+        if ns > h["max"]:
+            h["max"] = ns
+        k = bucket_index(ns)
+        h["buckets"][k] = h["buckets"].get(k, 0) + 1
+
+    def connection_opened(self, port):
+        with self._lock:
+            self._active += 1
+            counters = self._ports[port]
+            counters["connections"] += 1
+            counters["active"] += 1
+
+    def connection_closed(self, port):
+        with self._lock:
+            self._active -= 1
+            self._ports[port]["active"] -= 1
+
+    def record_commands(self, port, timings):
+        # timings: [(command name, handle ns, is_error), ...] for one read
+        if not timings:
+            return
+        with self._lock:
+            self._ports[port]["commands"] += len(timings)
+            commands = self._commands
+            h = self._hist["handle"]
+            buckets = h["buckets"]
+            total = 0
+            peak = h["max"]
+            for name, ns, error in timings:
+                commands[name] += 1
+                if error:
+                    self._errors[name] += 1
+                total += ns
+                if ns > peak:
+                    peak = ns
+                # inlined bucket_index()
+                e = ns.bit_length() - SUB_BUCKET_BITS - 1
+                k = (e << SUB_BUCKET_BITS) + (ns >> e) if e > 0 else ns
+                buckets[k] = buckets.get(k, 0) + 1
+            h["count"] += len(timings)
+            h["sum"] += total
+            h["max"] = peak
+
+    def record_io(self, port, bytes_in, bytes_out=0, send_ns=None):
+        with self._lock:
+            counters = self._ports[port]
+            counters["bytes_in"] += bytes_in
+            counters["bytes_out"] += bytes_out
+            if send_ns is not None:
+                self._observe("send", send_ns)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "active_connections": self._active,
+                "commands": dict(self._commands),
+                "errors": dict(self._errors),
+                "ports": {str(p): dict(c) for p, c in self._ports.items()},
+                "latency": {
+                    name: {**h, "buckets": dict(h["buckets"])}
+                    for name, h in self._hist.items()
+                },
+            }
+
+
+# ---------------------------
+# Output formats
+# ---------------------------
+def format_text(snap) -> str:
+    lines = [f"Active connections: {snap['active_connections']}"]
+    for name, h in snap["latency"].items():
+        s = summarize(h)
+        lines.append(
+            f"  {name:<7} n={s['count']:<9} p50={s['p50_us']:.1f}us "
+            f"p90={s['p90_us']:.1f}us p99={s['p99_us']:.1f}us max={s['max_us']:.1f}us"
+        )
+    if snap["commands"]:
+        lines.append("Commands:")
+        for name, n in sorted(snap["commands"].items()):
+            lines.append(f"  {name:<10} {n:>10}  errors {snap['errors'].get(name, 0)}")
+    if snap["ports"]:
+        lines.append("Ports:")
+        for port, c in sorted(snap["ports"].items(), key=lambda kv: int(kv[0])):
+            lines.append(
+                f"  {port}: active {c['active']} | connections {c['connections']}"
+                f" | commands {c['commands']} | in {c['bytes_in']} B"
+                f" | out {c['bytes_out']} B"
+            )
+    return "\n".join(lines)
+
+
+def to_json(snap) -> str:
+    out = {k: v for k, v in snap.items() if k != "latency"}
+    out["latency"] = {name: summarize(h) for name, h in snap["latency"].items()}
+    return json.dumps(out, indent=2, sort_keys=True)
+
+
+def to_prometheus(snap) -> str:
+    lines = [
+        "# TYPE mcms_active_connections gauge",
+        f"mcms_active_connections {snap['active_connections']}",
+        "# TYPE mcms_commands_total counter",
+    ]
+    for name, n in sorted(snap["commands"].items()):
+        lines.append(f'mcms_commands_total{{command="{name}"}} {n}')
+    lines.append("# TYPE mcms_command_errors_total counter")
+    for name, n in sorted(snap["errors"].items()):
+        lines.append(f'mcms_command_errors_total{{command="{name}"}} {n}')
+    for counter in Metrics.PORT_COUNTERS:
+        kind = "gauge" if counter == "active" else "counter"
+        metric = f"mcms_port_{counter}" + ("" if kind == "gauge" else "_total")
+        lines.append(f"# TYPE {metric} {kind}")
+        for port, c in sorted(snap["ports"].items()):
+            lines.append(f'{metric}{{port="{port}"}} {c[counter]}')
+    for name, h in snap["latency"].items():
+        metric = f"mcms_{name}_latency_seconds"
+        lines.append(f"# TYPE {metric} histogram")
+        seen = 0
+        for k in sorted(h["buckets"], key=int):
+            seen += h["buckets"][k]
+            le = bucket_upper(int(k)) / 1e9
+            lines.append(f'{metric}_bucket{{le="{le:.9g}"}} {seen}')
+        lines.append(f'{metric}_bucket{{le="+Inf"}} {h["count"]}')
+        lines.append(f"{metric}_sum {h['sum'] / 1e9:.9g}")
+        lines.append(f"{metric}_count {h['count']}")
+    return "\n".join(lines) + "\n"
+
+
+# ---------------------------
+# Local admin HTTP endpoint
+# ---------------------------
+class MetricsEndpoint:
+    # GET /metrics -> Prometheus text, GET /metrics.json -> JSON
+    def __init__(self, source, host="127.0.0.1", port=9100):
+        self.source = source  # callable returning a snapshot dict
+        self.host = host
+        self.port = port
+
+    def start(self):
+        source = self.source
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path == "/metrics":
+                    body = to_prometheus(source())
+                    ctype = "text/plain; version=0.0.4"
+                elif self.path == "/metrics.json":
+                    body = to_json(source())
+                    ctype = "application/json"
+                else:
+                    self.send_error(404)
+                    return
+                data = body.encode()
+                self.send_response(200)
+                self.send_header("Content-Type", ctype)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass  # keep the admin console readable
+
+        server = ThreadingHTTPServer((self.host, self.port), Handler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        print(f"Metrics on http://{self.host}:{self.port}/metrics (and /metrics.json)")
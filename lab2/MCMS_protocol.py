@@ -0,0 +1,190 @@
+import struct
+
+import MCMS_vector
+from MCMS_vector import format_number
+
+# A binary client opens the connection with MAGIC (text commands never start
+# with a NUL byte) and the server answers with the same bytes. After that
+# every message in both directions is HEADER + payload.
+MAGIC = b"\x00MCMSBIN1"
+
+# opcode (u8), status (u8, 0 = ok in responses), payload length (u32)
+HEADER = struct.Struct("<BBI")
+MAX_PAYLOAD = 256 * 1024 * 1024
+
+STATUS_OK = 0
+STATUS_ERROR = 1
+
+# ---------------------------
+# Opcodes
+# ---------------------------
+OP_ADD = 1  # payload <dd  -> <d
+OP_SUB = 2
+OP_MUL = 3
+OP_DIV = 4
+OP_ANALYZE = 5  # payload UTF-8 text -> <III word/char counts + UPPER text
+OP_VADD = 6  # payload: two float64 frames -> one frame
+OP_VSUB = 7
+OP_VMUL = 8
+OP_VDIV = 9
+OP_VDOT = 10  # payload: two float64 frames -> <d
+OP_SUM = 11  # payload: one float64 frame -> <d
+OP_MEAN = 12
+OP_MIN = 13
+OP_MAX = 14
+OP_TEXT = 32  # payload: a text protocol command -> its UTF-8 text reply
+OP_QUIT = 255
+
+SCALAR_OPS = {OP_ADD: "add", OP_SUB: "sub", OP_MUL: "mul", OP_DIV: "div"}
+VECTOR_OPS = {
+    OP_VADD: "vadd",
+    OP_VSUB: "vsub",
+    OP_VMUL: "vmul",
+    OP_VDIV: "vdiv",
+    OP_VDOT: "vdot",
+}
+REDUCE_OPS = {OP_SUM: "sum", OP_MEAN: "mean", OP_MIN: "min", OP_MAX: "max"}
+
+OP_NAMES = {
+    **SCALAR_OPS,
+    **VECTOR_OPS,
+    **REDUCE_OPS,
+    OP_ANALYZE: "analyze",
+    OP_TEXT: "text",
+    OP_QUIT: "quit",
+}
+OPCODES = {name: op for op, name in OP_NAMES.items()}
+
+PAIR = struct.Struct("<dd")
+DOUBLE = struct.Struct("<d")
+ANALYSIS = struct.Struct("<III")
+
+
+class ProtocolError(ValueError):
+    pass
+
+
+def encode(op, payload=b"", status=STATUS_OK) -> bytes:
+    return HEADER.pack(op, status, len(payload)) + payload
+
+
+# ---------------------------
+# Incoming frame buffer
+# ---------------------------
+class FrameBuffer:
+    def __init__(self, max_payload=MAX_PAYLOAD):
+        self.max_payload = max_payload
+        self._buf = bytearray()
+
+    def feed(self, data) -> list:
+        # Returns the complete (opcode, status, payload) messages received so far
+        buf = self._buf
+        buf += data
+        frames = []
+        pos = 0
+        while len(buf) - pos >= HEADER.size:
+            op, status, length = HEADER.unpack_from(buf, pos)
+            if length > self.max_payload:
+                raise ProtocolError(f"payload of {length} bytes exceeds limit")
+            end = pos + HEADER.size + length
+            if end > len(buf):
+                break
+            frames.append((op, status, bytes(buf[pos + HEADER.size : end])))
+            pos = end
+        if pos:
+            del buf[:pos]
+        return frames
+
+
+# ---------------------------
+# Server side
+# ---------------------------
+def handle(op, payload):
+    # Returns (status, payload, summary) where summary is the log text
+    try:
+        if op in SCALAR_OPS:
+            if len(payload) != PAIR.size:
+                raise ProtocolError("arithmetic requires 2 float64 operands")
+            a, b = PAIR.unpack(payload)
+            if op == OP_ADD:
+                res = a + b
+            elif op == OP_SUB:
+                res = a - b
+            elif op == OP_MUL:
+                res = a * b
+            else:
+                if b == 0:
+                    raise ProtocolError("division by zero")
+                res = a / b
+            return STATUS_OK, DOUBLE.pack(res), f"RESULT: {format_number(res)}"
+
+        if op in VECTOR_OPS or op in REDUCE_OPS:
+            name = OP_NAMES[op]
+            vectors = MCMS_vector.unpack_frames(payload)
+            result = MCMS_vector.compute(name, vectors)
+            if isinstance(result, float):
+                summary = f"RESULT: {format_number(result)}"
+                return STATUS_OK, DOUBLE.pack(result), summary
+            summary = f"RESULT: vector of {len(result)}"
+            return STATUS_OK, MCMS_vector.pack_frame(result), summary
+
+        if op == OP_ANALYZE:
+            s = payload.decode("utf-8", "replace")
+            if not s:
+                raise ProtocolError("analyze requires a string")
+            counts = ANALYSIS.pack(len(s.split()), len(s), len(s.replace(" ", "")))
+            return STATUS_OK, counts + s.upper().encode(), "ANALYSIS:"
+
+        raise ProtocolError("unknown opcode")
+
+    except ValueError as e:  # ProtocolError / VectorError
+        return STATUS_ERROR, f"ERROR: {e}".encode(), f"ERROR: {e}"
+
+
+# ---------------------------
+# Client side helpers
+# ---------------------------
+def encode_command(text: str) -> tuple:
+    # Translate a text protocol command into (opcode, payload)
+    parts = text.strip().split(None, 1)
+    name = parts[0].lower() if parts else ""
+    args = parts[1] if len(parts) > 1 else ""
+
+    if name in ("exit", "quit"):
+        return OP_QUIT, b""
+    try:
+        if name in SCALAR_OPS.values():
+            a, b = (float(x) for x in args.split())
+            return OPCODES[name], PAIR.pack(a, b)
+        if name in VECTOR_OPS.values() or name in REDUCE_OPS.values():
+            vectors, _ = MCMS_vector.parse_operands(args)
+            return OPCODES[name], b"".join(map(MCMS_vector.pack_frame, vectors))
+    except ValueError:
+        pass  # let the server produce the usual error message
+    if name == "analyze":
+        return OP_ANALYZE, args.encode()
+    return OP_TEXT, text.encode()
+
+
+def decode_response(op, status, payload) -> str:
+    # Render a binary response the way the text protocol would print it
+    if status != STATUS_OK:
+        return payload.decode("utf-8", "replace")
+    if op == OP_QUIT:
+        return "BYE"
+    if op == OP_TEXT:
+        return payload.decode("utf-8", "replace")
+    if op == OP_ANALYZE:
+        words, chars, chars_ns = ANALYSIS.unpack_from(payload)
+        return (
+            "ANALYSIS:\n"
+            f"UPPERCASE: {payload[ANALYSIS.size:].decode('utf-8', 'replace')}\n"
+            f"WORDS: {words}\n"
+            f"CHARS(including spaces): {chars}\n"
+            f"CHARS(excluding spaces): {chars_ns}"
+        )
+    if op in SCALAR_OPS or op in REDUCE_OPS or op == OP_VDOT:
+        (res,) = DOUBLE.unpack(payload)
+        return f"RESULT: {format_number(res)}"
+    (vec,) = MCMS_vector.unpack_frames(payload)
+    return f"RESULT: {MCMS_vector.format_vector(vec, False)}"
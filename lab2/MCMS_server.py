@@ -1,50 +1,186 @@
+import argparse
+import asyncio
+import itertools
+import multiprocessing
+import os
+import queue
 import socket
-import sys
 import threading
+import time
 import traceback
 from collections import defaultdict, deque
 from datetime import datetime
 
+import MCMS_metrics
+import MCMS_protocol
+import MCMS_vector
+
+RECV_SIZE = 65536
+DEFAULT_MAX_LINE = 64 * 1024  # bytes
+MAX_BATCH = 100_000
+DEFAULT_BACKLOG = 32
+DEFAULT_IDLE_TIMEOUT = 300  # seconds
+ADMISSION_POLICIES = ("reject", "queue")
+DEFAULT_LOG_ROTATE_BYTES = 10 * 1024 * 1024
+DEFAULT_LOG_BACKUPS = 3
+
 
 # ---------------------------
 # Task logger
 # ---------------------------
 class TaskLogger:
-    def __init__(self, max_entries=1000):
-        self._lock = threading.Lock()
-        self._logs = deque(maxlen=max_entries)
+    # Writers never take a lock: itertools.count hands out ring slots
+    # atomically (under the GIL) and each record is stored as one immutable
+    # (seq, mono_ns, epoch, port, peer, command, result) tuple, so a slot
+    # always holds a whole record from a single writer, even when a large
+    # batch wraps the ring while another writer is preempted. (At worst the
+    # preempted writer then replaces a newer record with its older one.)
+    # Timestamps are stored raw and only formatted on read. The ring only
+    # backs snapshot() and the `logs` admin command; with a log file, every
+    # batch is also queued whole for the flusher, so the file misses nothing.
+    def __init__(
+        self,
+        max_entries=1000,
+        path=None,
+        rotate_bytes=DEFAULT_LOG_ROTATE_BYTES,
+        backups=DEFAULT_LOG_BACKUPS,
+        flush_interval=1.0,
+    ):
+        self.max_entries = max_entries
+        self._ring = [None] * max_entries
+        self._seq = itertools.count()
+        self._cleared = 0  # records below this seq are hidden from snapshot()
+        self._unflushed = None  # deque of record lists, drained by the flusher
+
+        self.flusher = None
+        if path:
+            self._unflushed = deque()
+            self.flusher = LogFlusher(self._unflushed, path, rotate_bytes, backups, flush_interval)
+            self.flusher.start()
 
     def log(self, port, peer, command, result):
-        entry = {
-            "time": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            "port": port,
-            "peer": peer,
-            "command": command,
-            "result": result,
-        }
-        with self._lock:
-            self._logs.append(entry)
+        self.log_many(port, peer, [(command, result)])
+
+    def log_many(self, port, peer, items):
+        # one pair of timestamps for a whole batch
+        mono = time.monotonic_ns()
+        epoch = time.time()
+        ring = self._ring
+        size = self.max_entries
+        seq_counter = self._seq
+        rows = [(next(seq_counter), mono, epoch, port, peer, command, result) for command, result in items]
+        for row in rows:
+            ring[row[0] % size] = row
+        if self._unflushed is not None:
+            self._unflushed.append(rows)  # deque.append is atomic
+
+    def records(self, since=0):
+        # (seq, mono_ns, epoch, port, peer, command, result) tuples with
+        # seq >= since, oldest first
+        out = [row for row in self._ring if row is not None and row[0] >= since]
+        out.sort()
+        return out
 
     def snapshot(self, n=None):
-        with self._lock:
-            items = list(self._logs)
-        if n is None:
-            return items
-        if n <= 0:
+        if n is not None and n <= 0:
             return []
-        return items[-n:]
+        rows = self.records(self._cleared)
+        if n is not None:
+            rows = rows[-n:]
+        return [
+            {
+                "time": format_epoch(epoch),
+                "port": port,
+                "peer": peer,
+                "command": command,
+                "result": result,
+            }
+            for _, _, epoch, port, peer, command, result in rows
+        ]
 
     def clear(self):
-        with self._lock:
-            self._logs.clear()
+        self._cleared = max((row[0] for row in self._ring if row is not None), default=-1) + 1
+
+    def close(self):
+        if self.flusher:
+            self.flusher.stop()
+
+
+def format_epoch(epoch):
+    return datetime.fromtimestamp(epoch).strftime("%Y-%m-%d %H:%M:%S")
+
+
+class LogFlusher:
+    # Background thread that drains the TaskLogger's flush queue into a file
+    # in batches and rotates it like logging.handlers.RotatingFileHandler
+    def __init__(self, pending, path, rotate_bytes, backups, interval):
+        self.pending = pending  # deque of record lists from TaskLogger.log_many
+        self.path = path
+        self.rotate_bytes = rotate_bytes
+        self.backups = backups
+        self.interval = interval
+        self.written = 0
+        self.dropped = 0  # records lost to a failed write
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.flush()
+        self.flush()
+
+    def flush(self):
+        pending = self.pending
+        rows = []
+        while pending:
+            rows.extend(pending.popleft())
+        if not rows:
+            return
+
+        data = "".join(
+            f"[{format_epoch(epoch)}] Port {port} | {peer} | {command} -> {result}\n"
+            for _, _, epoch, port, peer, command, result in rows
+        ).encode()
+        try:
+            if (
+                self.rotate_bytes
+                and os.path.exists(self.path)
+                and os.path.getsize(self.path) + len(data) > self.rotate_bytes
+            ):
+                self._rotate()
+            with open(self.path, "ab") as f:
+                f.write(data)
+            self.written += len(rows)
+        except OSError as e:
+            self.dropped += len(rows)
+            print(f"[Logger] cannot write {self.path}: {e}")
+
+    def _rotate(self):
+        # path -> path.1 -> path.2 ... -> path.<backups> (oldest dropped)
+        for i in range(self.backups - 1, 0, -1):
+            src = f"{self.path}.{i}"
+            if os.path.exists(src):
+                os.replace(src, f"{self.path}.{i + 1}")
+        if self.backups > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
 
 
 # ---------------------------
 # Shutdown signal
 # ---------------------------
 class ShutdownSignal:
-    def __init__(self):
-        self.event = threading.Event()
+    def __init__(self, event=None):
+        # a multiprocessing.Event can be passed in to share it with workers
+        self.event = event if event is not None else threading.Event()
 
     def stop(self):
         self.event.set()
@@ -82,6 +218,9 @@ class ClientRegistry:
 # ---------------------------
 # Request handler
 # ---------------------------
+KNOWN_COMMANDS = {"add", "sub", "mul", "div", "analyze"} | MCMS_vector.COMMANDS
+
+
 class RequestHandler:
     @staticmethod
     def handle(request: str) -> str:
@@ -89,6 +228,11 @@ class RequestHandler:
         if not request:
             return "ERROR: empty request"
 
+        # vector commands can carry long operand lists, so they skip split()
+        head = request.split(None, 1)
+        if head[0].lower() in MCMS_vector.COMMANDS:
+            return MCMS_vector.handle(head[0].lower(), head[1] if len(head) > 1 else "")
+
         parts = request.split()
         cmd = parts[0].lower()
 
@@ -131,6 +275,334 @@ class RequestHandler:
         return "ERROR: unknown command"
 
 
+# ---------------------------
+# Line framer (per-connection stream buffering)
+# ---------------------------
+class LineFramer:
+    def __init__(self, max_line=DEFAULT_MAX_LINE):
+        self.max_line = max_line
+        self._buf = bytearray()
+        self._discarding = False  # dropping the rest of an over-long line
+
+    def feed(self, data) -> list:
+        # Returns the complete lines received so far; an over-long line is
+        # reported as None. A partial line (or partial UTF-8 character) stays
+        # buffered until the rest of it arrives.
+        buf = self._buf
+        buf += data
+        lines = []
+
+        if self._discarding:
+            nl = buf.find(b"\n")
+            if nl < 0:
+                buf.clear()
+                return lines
+            del buf[: nl + 1]
+            self._discarding = False
+
+        # "\n" never occurs inside a multi-byte UTF-8 sequence, so everything
+        # up to the last newline decodes on its own in a single pass.
+        end = buf.rfind(b"\n") + 1
+        if end:
+            with memoryview(buf) as view:
+                text = str(view[:end], "utf-8", "replace")
+            parts = text.split("\n")[:-1]
+            if max(map(len, parts)) * 4 > self.max_line:
+                # max_line counts bytes and a character takes up to 4 of
+                # them, so measure the lines in buf between newline offsets
+                start = 0
+                for i in range(len(parts)):
+                    nl = buf.index(b"\n", start)
+                    if nl - start > self.max_line:
+                        parts[i] = None
+                    start = nl + 1
+            del buf[:end]  # bytearray drops its head without moving the tail
+
+            for line in parts:
+                lines.append(None if line is None else line.rstrip("\r"))
+
+        if len(buf) > self.max_line:
+            lines.append(None)
+            buf.clear()
+            self._discarding = True
+
+        return lines
+
+
+# ---------------------------
+# Client session (engine-independent protocol state)
+# ---------------------------
+class ClientSession:
+    def __init__(
+        self,
+        port,
+        peer,
+        logger: TaskLogger,
+        max_line=DEFAULT_MAX_LINE,
+        batching=True,
+        metrics: MCMS_metrics.Metrics = None,
+    ):
+        self.port = port
+        self.peer = peer
+        self.logger = logger
+        self.metrics = metrics
+        self._timings = []  # (command name, handle ns, is error) for metrics
+        self.framer = LineFramer(max_line)
+        self.batching = batching  # one pass / one log call / one write per read
+        self.closed = False  # set once the client sent exit/quit
+
+        # "text" or "binary", decided by the first bytes of the connection
+        self.mode = None
+        self._greeting = b""
+        self._frames = None
+
+        # explicit "BATCH n" block being collected
+        self._batch_size = 0
+        self._batch = []
+
+    def feed(self, data: bytes) -> list:
+        # Process one chunk read from the socket and return the reply chunks
+        # to send (empty until at least one complete line has arrived).
+        # With batching on there is at most one chunk per read.
+        replies = []
+        if self.mode is None:
+            data = self._negotiate(data)
+            if self.mode is None:
+                return []
+            if self.mode == "binary":
+                replies.append(MCMS_protocol.MAGIC)  # acknowledge the handshake
+        if self.mode == "binary":
+            return self._feed_binary(data, replies)
+
+        responses = []
+        entries = []  # (command, first result line) to log
+
+        for line in self.framer.feed(data):
+            if line is None:
+                responses.append(f"ERROR: line exceeds {self.framer.max_line} bytes")
+                continue
+
+            command = line.strip()
+            if not command:
+                continue
+
+            if command.lower() in ("exit", "quit"):
+                # log the quit command as a task as well
+                responses.append("BYE")
+                entries.append((command, "BYE"))
+                self.closed = True
+                break
+
+            if self._batch_size:
+                self._batch.append(command)
+                if len(self._batch) == self._batch_size:
+                    responses.append(self._run_batch(entries))
+                continue
+
+            if command.split(None, 1)[0].lower() == "batch":
+                error = self._start_batch(command)
+                if error:
+                    responses.append(error)
+                continue
+
+            # handle request
+            result = self._execute(command)
+            responses.append(result)
+            entries.append((command, result))
+
+            if not self.batching:
+                self._log(entries)
+                entries = []
+
+        self._log(entries)
+        self._record_timings()
+
+        if not responses:
+            return []
+        if self.batching:
+            return [("\n".join(responses) + "\n").encode()]
+        return [(r + "\n").encode() for r in responses]
+
+    def _negotiate(self, data):
+        # Returns the bytes that follow the handshake (if any)
+        magic = MCMS_protocol.MAGIC
+        pending = self._greeting + bytes(data)
+        if len(pending) < len(magic) and magic.startswith(pending):
+            self._greeting = pending  # wait for the rest of the magic
+            return b""
+
+        self._greeting = b""
+        if pending.startswith(magic):
+            self.mode = "binary"
+            self._frames = MCMS_protocol.FrameBuffer()
+            return pending[len(magic) :]
+        self.mode = "text"
+        return pending
+
+    def _feed_binary(self, data, replies):
+        proto = MCMS_protocol
+        entries = []
+
+        try:
+            frames = self._frames.feed(data)
+        except proto.ProtocolError as e:
+            # the stream can't be resynchronised after a bad header
+            self.closed = True
+            replies.append(proto.encode(0, f"ERROR: {e}".encode(), proto.STATUS_ERROR))
+            return replies
+
+        for op, _, payload in frames:
+            if op == proto.OP_QUIT:
+                replies.append(proto.encode(proto.OP_QUIT))
+                entries.append(("quit", "BYE"))
+                self.closed = True
+                break
+
+            if op == proto.OP_TEXT:
+                command = payload.decode("utf-8", "replace").strip()
+                result = self._execute(command)
+                replies.append(proto.encode(op, result.encode()))
+            else:
+                t0 = time.perf_counter_ns()
+                status, body, result = proto.handle(op, payload)
+                if self.metrics is not None:
+                    self._timings.append(
+                        (
+                            proto.OP_NAMES.get(op, "unknown"),
+                            time.perf_counter_ns() - t0,
+                            status != proto.STATUS_OK,
+                        )
+                    )
+                replies.append(proto.encode(op, body, status))
+                command = f"{proto.OP_NAMES.get(op, op)} (binary, {len(payload)} bytes)"
+            entries.append((command, result))
+
+            if not self.batching:
+                self._log(entries)
+                entries = []
+
+        self._log(entries)
+        self._record_timings()
+
+        if self.batching and len(replies) > 1:
+            return [b"".join(replies)]
+        return replies
+
+    def _start_batch(self, command):
+        parts = command.split()
+        if len(parts) != 2:
+            return "ERROR: usage BATCH <n>"
+        try:
+            n = int(parts[1])
+        except ValueError:
+            return "ERROR: batch size must be an integer"
+        if not 1 <= n <= MAX_BATCH:
+            return f"ERROR: batch size must be between 1 and {MAX_BATCH}"
+        self._batch_size = n
+        return None
+
+    def _run_batch(self, entries):
+        # Evaluate a complete BATCH block in one pass; the reply is a
+        # "BATCH n" header followed by the n results
+        commands = self._batch
+        results = [self._execute(c) for c in commands]
+        entries.extend(zip(commands, results))
+        self._batch = []
+        self._batch_size = 0
+        return "\n".join([f"BATCH {len(results)}", *results])
+
+    def _execute(self, command):
+        if self.metrics is None:
+            return RequestHandler.handle(command)
+        t0 = time.perf_counter_ns()
+        result = RequestHandler.handle(command)
+        elapsed = time.perf_counter_ns() - t0
+        end = command.find(" ")
+        name = (command if end < 0 else command[:end]).lower()
+        if name not in KNOWN_COMMANDS:
+            name = "unknown"  # keep the metric label set bounded
+        self._timings.append((name, elapsed, result[:5] == "ERROR"))
+        return result
+
+    def _record_timings(self):
+        if self._timings:
+            self.metrics.record_commands(self.port, self._timings)
+            self._timings = []
+
+    def _log(self, entries):
+        if not entries:
+            return
+        # store only the first line of each result for brevity
+        self.logger.log_many(
+            self.port,
+            self.peer,
+            [(command, result.split("\n", 1)[0]) for command, result in entries],
+        )
+
+
+# ---------------------------
+# Connection pool (bounded workers + admission control)
+# ---------------------------
+class ConnectionPool:
+    def __init__(self, size, queue_size=0, admission="reject"):
+        if admission not in ADMISSION_POLICIES:
+            raise ValueError(f"unknown admission policy: {admission}")
+        self.size = size
+        self.admission = admission
+        # "reject" answers BUSY as soon as every worker is taken,
+        # "queue" lets up to queue_size connections wait for a worker
+        self.queue_size = queue_size if admission == "queue" else 0
+
+        self._lock = threading.Lock()
+        self._queue = queue.Queue()
+        self.busy = 0
+        self.waiting = 0
+        self.peak_busy = 0
+        self.accepted = 0
+        self.rejected = 0
+
+    def start(self):
+        for _ in range(self.size):
+            threading.Thread(target=self._worker, daemon=True).start()
+
+    def submit(self, handler, conn, addr) -> bool:
+        # Returns False (and counts a reject) when the pool is saturated
+        with self._lock:
+            if self.busy + self.waiting >= self.size + self.queue_size:
+                self.rejected += 1
+                return False
+            self.waiting += 1
+            self.accepted += 1
+        self._queue.put((handler, conn, addr))
+        return True
+
+    def _worker(self):
+        while True:
+            handler, conn, addr = self._queue.get()
+            with self._lock:
+                self.waiting -= 1
+                self.busy += 1
+                self.peak_busy = max(self.peak_busy, self.busy)
+            try:
+                handler(conn, addr)
+            finally:
+                with self._lock:
+                    self.busy -= 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                "size": self.size,
+                "busy": self.busy,
+                "peak_busy": self.peak_busy,
+                "queued": self.waiting,
+                "queue_size": self.queue_size,
+                "admission": self.admission,
+                "accepted": self.accepted,
+                "rejected": self.rejected,
+            }
+
+
 # ---------------------------
 # Server (per-port)
 # ---------------------------
@@ -142,12 +614,24 @@ class Server:
         registry: ClientRegistry,
         shutdown: ShutdownSignal,
         logger: TaskLogger,
+        reuse_port=False,
+        backlog=DEFAULT_BACKLOG,
+        idle_timeout=DEFAULT_IDLE_TIMEOUT,
+        pool: ConnectionPool = None,
+        metrics: MCMS_metrics.Metrics = None,
+        **session_opts,
     ):
         self.host = host
         self.port = port
         self.registry = registry
         self.shutdown = shutdown
         self.logger = logger
+        self.reuse_port = reuse_port  # let several worker processes bind the port
+        self.backlog = backlog
+        self.idle_timeout = idle_timeout
+        self.pool = pool  # None: one thread per connection
+        self.metrics = metrics
+        self.session_opts = session_opts  # forwarded to ClientSession
 
     def start(self):
         threading.Thread(target=self._run, daemon=True).start()
@@ -156,12 +640,14 @@ class Server:
         sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
         try:
+            if self.reuse_port:
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
             sock.bind((self.host, self.port))
         except OSError as e:
             print(f"[Port {self.port}] bind error: {e}")
             return
 
-        sock.listen(32)
+        sock.listen(self.backlog)
         sock.settimeout(1.0)
 
         print(f"[Port {self.port}] Server listening on {self.host}:{self.port}")
@@ -175,11 +661,14 @@ class Server:
                 except OSError:
                     break
 
-                threading.Thread(
-                    target=self._client_thread,
-                    args=(conn, addr),
-                    daemon=True,
-                ).start()
+                if self.pool is None:
+                    threading.Thread(
+                        target=self._client_thread,
+                        args=(conn, addr),
+                        daemon=True,
+                    ).start()
+                elif not self.pool.submit(self._client_thread, conn, addr):
+                    self._reject(conn, addr)
         finally:
             try:
                 sock.close()
@@ -187,17 +676,32 @@ class Server:
                 pass
             print(f"[Port {self.port}] Server stopped.")
 
+    def _reject(self, conn: socket.socket, addr):
+        print(f"[Port {self.port}] Busy, rejected: {addr[0]}:{addr[1]}")
+        try:
+            conn.settimeout(1.0)
+            conn.sendall(b"BUSY\n")
+        except OSError:
+            pass
+        finally:
+            conn.close()
+
     def _client_thread(self, conn: socket.socket, addr):
         peer = f"{addr[0]}:{addr[1]}"
         print(f"[Port {self.port}] Connected: {peer}")
         self.registry.add(self.port, peer)
+        if self.metrics:
+            self.metrics.connection_opened(self.port)
+        session = ClientSession(
+            self.port, peer, self.logger, metrics=self.metrics, **self.session_opts
+        )
 
         try:
             with conn:
-                conn.settimeout(300)  # idle timeout
+                conn.settimeout(self.idle_timeout)
                 while not self.shutdown.is_set():
                     try:
-                        data = conn.recv(4096)
+                        data = conn.recv(RECV_SIZE)
                     except socket.timeout:
                         # Idle timeout — close connection
                         break
@@ -208,42 +712,22 @@ class Server:
                         # client closed connection
                         break
 
-                    text = data.decode(errors="ignore")
-                    responses = []
-
-                    for line in text.splitlines():
-                        if not line:
-                            continue
-
-                        if line.strip().lower() in ("exit", "quit"):
-                            # log the quit command as a task as well
-                            result = "BYE"
-                            responses.append(result)
-                            try:
-                                conn.sendall(("\n".join(responses) + "\n").encode())
-                            except Exception:
-                                pass
-                            self.logger.log(self.port, peer, line.strip(), result)
-                            return
-
-                        # handle request
-                        result = RequestHandler.handle(line)
-                        responses.append(result)
-
-                        # Log the task (store only first line of result for brevity)
-                        first_result_line = (
-                            result.splitlines()[0]
-                            if isinstance(result, str)
-                            else str(result)
-                        )
-                        self.logger.log(
-                            self.port, peer, line.strip(), first_result_line
-                        )
-
-                    # send all responses for this recv
+                    # send all responses for the lines completed by this recv
+                    replies = session.feed(data)
+                    t0 = time.perf_counter_ns()
                     try:
-                        conn.sendall(("\n".join(responses) + "\n").encode())
-                    except BrokenPipeError:
+                        for chunk in replies:
+                            conn.sendall(chunk)
+                    except (BrokenPipeError, ConnectionResetError):
+                        break
+                    finally:
+                        if self.metrics:
+                            send_ns = time.perf_counter_ns() - t0 if replies else None
+                            self.metrics.record_io(
+                                self.port, len(data), sum(map(len, replies)), send_ns
+                            )
+
+                    if session.closed:
                         break
 
         except Exception:
@@ -251,19 +735,157 @@ class Server:
 
         finally:
             self.registry.remove(self.port, peer)
+            if self.metrics:
+                self.metrics.connection_closed(self.port)
             print(f"[Port {self.port}] Disconnected: {peer}")
 
 
+# ---------------------------
+# Event-loop server (all ports, one thread)
+# ---------------------------
+class AsyncServerGroup:
+    def __init__(
+        self,
+        host,
+        ports,
+        registry: ClientRegistry,
+        shutdown: ShutdownSignal,
+        logger: TaskLogger,
+        reuse_port=False,
+        backlog=DEFAULT_BACKLOG,
+        idle_timeout=DEFAULT_IDLE_TIMEOUT,
+        metrics: MCMS_metrics.Metrics = None,
+        **session_opts,
+    ):
+        self.host = host
+        self.ports = list(ports)
+        self.registry = registry
+        self.shutdown = shutdown
+        self.logger = logger
+        self.reuse_port = reuse_port  # let several worker processes bind the ports
+        self.backlog = backlog
+        self.idle_timeout = idle_timeout
+        self.metrics = metrics
+        self.session_opts = session_opts  # forwarded to ClientSession
+        self._connections = set()
+
+    def start(self):
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def _run(self):
+        asyncio.run(self._serve())
+
+    async def _serve(self):
+        servers = []
+        for port in self.ports:
+            try:
+                srv = await asyncio.start_server(
+                    lambda r, w, port=port: self._client_task(port, r, w),
+                    self.host,
+                    port,
+                    backlog=self.backlog,
+                    reuse_address=True,
+                    reuse_port=self.reuse_port or None,
+                )
+            except OSError as e:
+                print(f"[Port {port}] bind error: {e}")
+                continue
+            servers.append((port, srv))
+            print(f"[Port {port}] Server listening on {self.host}:{port} (asyncio)")
+
+        try:
+            # ShutdownSignal is a threading.Event, so poll it from the loop
+            while not self.shutdown.is_set():
+                await asyncio.sleep(0.5)
+        finally:
+            for port, srv in servers:
+                srv.close()
+            for task in list(self._connections):
+                task.cancel()
+            for port, srv in servers:
+                await srv.wait_closed()
+                print(f"[Port {port}] Server stopped.")
+
+    async def _client_task(self, port, reader, writer):
+        task = asyncio.current_task()
+        self._connections.add(task)
+
+        addr = writer.get_extra_info("peername")
+        peer = f"{addr[0]}:{addr[1]}"
+        print(f"[Port {port}] Connected: {peer}")
+        self.registry.add(port, peer)
+        if self.metrics:
+            self.metrics.connection_opened(port)
+        session = ClientSession(
+            port, peer, self.logger, metrics=self.metrics, **self.session_opts
+        )
+
+        try:
+            while not self.shutdown.is_set():
+                try:
+                    data = await asyncio.wait_for(
+                        reader.read(RECV_SIZE), self.idle_timeout
+                    )
+                except asyncio.TimeoutError:
+                    # Idle timeout — close connection
+                    break
+                except ConnectionResetError:
+                    break
+
+                if not data:
+                    # client closed connection
+                    break
+
+                replies = session.feed(data)
+                t0 = time.perf_counter_ns()
+                try:
+                    for chunk in replies:
+                        writer.write(chunk)
+                        await writer.drain()
+                except (BrokenPipeError, ConnectionResetError):
+                    break
+                finally:
+                    if self.metrics:
+                        send_ns = time.perf_counter_ns() - t0 if replies else None
+                        self.metrics.record_io(
+                            port, len(data), sum(map(len, replies)), send_ns
+                        )
+
+                if session.closed:
+                    break
+
+        except asyncio.CancelledError:
+            pass
+
+        except Exception:
+            traceback.print_exc()
+
+        finally:
+            self._connections.discard(task)
+            self.registry.remove(port, peer)
+            if self.metrics:
+                self.metrics.connection_closed(port)
+            writer.close()
+            print(f"[Port {port}] Disconnected: {peer}")
+
+
 # ---------------------------
 # Admin console
 # ---------------------------
 class AdminConsole:
     def __init__(
-        self, registry: ClientRegistry, logger: TaskLogger, shutdown: ShutdownSignal
+        self,
+        registry: ClientRegistry,
+        logger: TaskLogger,
+        shutdown: ShutdownSignal,
+        pool_stats=None,
+        stats=None,
     ):
         self.registry = registry
         self.logger = logger
         self.shutdown = shutdown
+        self.pool_stats = pool_stats  # callable -> {label: ConnectionPool.stats()}
+        self.stats = stats  # callable -> MCMS_metrics snapshot
 
     def start(self):
         threading.Thread(target=self._run, daemon=True).start()
@@ -331,37 +953,319 @@ class AdminConsole:
                 print("Logs cleared.")
                 continue
 
+            if cmd == "pool":
+                stats = self.pool_stats() if self.pool_stats else {}
+                if not stats:
+                    print("No connection pool (thread-per-connection or asyncio).")
+                    continue
+                for label, st in stats.items():
+                    print(
+                        f"  {label}: busy {st['busy']}/{st['size']} (peak {st['peak_busy']})"
+                        f" | queued {st['queued']}/{st['queue_size']} ({st['admission']})"
+                        f" | accepted {st['accepted']} | rejected {st['rejected']}"
+                    )
+                continue
+
+            if cmd == "stats":
+                if not self.stats:
+                    print("Metrics are disabled.")
+                else:
+                    print(MCMS_metrics.format_text(self.stats()))
+                flusher = getattr(self.logger, "flusher", None)
+                if flusher:
+                    print(
+                        f"Log file {flusher.path}: {flusher.written} records written,"
+                        f" {flusher.dropped} lost to write errors"
+                    )
+                continue
+
             print(f"Unknown admin command: {cmd}")
 
 
+# ---------------------------
+# Worker processes (SO_REUSEPORT)
+# ---------------------------
+class ForwardingRegistry:
+    # Worker-side ClientRegistry: reports changes to the parent process
+    def __init__(self, events, worker_id):
+        self.events = events
+        self.worker_id = worker_id
+
+    def add(self, port, peer):
+        self.events.put(("add", self.worker_id, port, peer))
+
+    def remove(self, port, peer):
+        self.events.put(("remove", self.worker_id, port, peer))
+
+
+class ForwardingLogger:
+    # Worker-side TaskLogger: ships log batches to the parent process
+    def __init__(self, events, worker_id):
+        self.events = events
+        self.worker_id = worker_id
+
+    def log(self, port, peer, command, result):
+        self.log_many(port, peer, [(command, result)])
+
+    def log_many(self, port, peer, items):
+        self.events.put(("log", self.worker_id, port, peer, list(items)))
+
+
+def _worker_main(
+    worker_id, host, ports, engine, events, stop_event, pool_opts, metrics, opts
+):
+    shutdown = ShutdownSignal(stop_event)
+    pool = make_pool(engine, **pool_opts)
+    metrics = MCMS_metrics.Metrics() if metrics else None
+    servers = build_servers(
+        host,
+        ports,
+        engine,
+        ForwardingRegistry(events, worker_id),
+        shutdown,
+        ForwardingLogger(events, worker_id),
+        pool=pool,
+        metrics=metrics,
+        reuse_port=True,
+        **opts,
+    )
+    if pool:
+        pool.start()
+    for server in servers:
+        server.start()
+    try:
+        while not shutdown.is_set():
+            shutdown.wait(1)
+            status = {
+                "pool": pool.stats() if pool else None,
+                "metrics": metrics.snapshot() if metrics else None,
+            }
+            events.put(("status", worker_id, None, None, status))
+    except KeyboardInterrupt:
+        # Ctrl+C reaches the whole process group; the parent handles it
+        pass
+
+
+class WorkerProcesses:
+    def __init__(
+        self,
+        host,
+        ports,
+        engine,
+        count,
+        registry: ClientRegistry,
+        shutdown: ShutdownSignal,
+        logger: TaskLogger,
+        pool_opts=None,
+        metrics=True,
+        **opts,
+    ):
+        self.host = host
+        self.ports = list(ports)
+        self.engine = engine
+        self.count = count
+        self.registry = registry
+        self.shutdown = shutdown
+        self.logger = logger
+        self.pool_opts = pool_opts or {}
+        self.metrics = metrics
+        self.opts = opts
+        self._status = {}  # {worker_id: latest pool stats / metrics snapshot}
+
+        ctx = multiprocessing.get_context()
+        self._events = ctx.Queue()
+        self._stop = ctx.Event()
+        self._procs = [
+            ctx.Process(
+                target=_worker_main,
+                args=(
+                    i,
+                    self.host,
+                    self.ports,
+                    self.engine,
+                    self._events,
+                    self._stop,
+                    self.pool_opts,
+                    self.metrics,
+                    self.opts,
+                ),
+                daemon=True,
+            )
+            for i in range(count)
+        ]
+
+    def start(self):
+        for proc in self._procs:
+            proc.start()
+        threading.Thread(target=self._collect, daemon=True).start()
+
+    def stop(self):
+        self._stop.set()
+        for proc in self._procs:
+            proc.join(5)
+            if proc.is_alive():
+                proc.terminate()
+
+    def pool_stats(self):
+        return {
+            f"worker {w}": st["pool"]
+            for w, st in sorted(self._status.items())
+            if st["pool"]
+        }
+
+    def metrics_snapshot(self):
+        return MCMS_metrics.merge(
+            st["metrics"] for st in self._status.values() if st["metrics"]
+        )
+
+    def _collect(self):
+        # Merge worker events into the parent's registry and logger
+        while True:
+            try:
+                event = self._events.get(timeout=1)
+            except queue.Empty:
+                if self._stop.is_set():
+                    break
+                continue
+            except (EOFError, OSError):
+                break
+
+            kind, worker_id, port, peer = event[:4]
+            if kind == "add":
+                self.registry.add(port, peer)
+            elif kind == "remove":
+                self.registry.remove(port, peer)
+            elif kind == "log":
+                self.logger.log_many(port, f"{peer} [w{worker_id}]", event[4])
+            elif kind == "status":
+                self._status[worker_id] = event[4]
+
+
 # ---------------------------
 # Server manager (composition root)
 # ---------------------------
+ENGINES = ("threads", "asyncio")
+
+
+def make_pool(engine, pool_size=0, queue_size=0, admission="reject"):
+    # The bounded pool replaces thread-per-connection; the asyncio engine
+    # has no per-connection threads to bound
+    if engine != "threads" or not pool_size:
+        return None
+    return ConnectionPool(pool_size, queue_size, admission)
+
+
+def build_servers(host, ports, engine, registry, shutdown, logger, pool=None, **opts):
+    if engine == "asyncio":
+        # One event loop serves every port
+        return [AsyncServerGroup(host, ports, registry, shutdown, logger, **opts)]
+    # Create one server instance per port
+    return [
+        Server(host, p, registry, shutdown, logger, pool=pool, **opts) for p in ports
+    ]
+
+
 class ServerManager:
-    def __init__(self, ports):
+    def __init__(
+        self,
+        ports,
+        engine="threads",
+        workers=0,
+        pool_size=0,
+        queue_size=0,
+        admission="reject",
+        metrics=True,
+        metrics_port=None,
+        log_file=None,
+        log_rotate_bytes=DEFAULT_LOG_ROTATE_BYTES,
+        log_backups=DEFAULT_LOG_BACKUPS,
+        **opts,
+    ):
+        # opts: Server / AsyncServerGroup / ClientSession keyword options
+        if engine not in ENGINES:
+            raise ValueError(f"unknown engine: {engine}")
+        pool_opts = {
+            "pool_size": pool_size,
+            "queue_size": queue_size,
+            "admission": admission,
+        }
+
+        self.ports = list(ports)
+        self.engine = engine
         self.shutdown = ShutdownSignal()
         self.registry = ClientRegistry()
-        self.logger = TaskLogger()
-
-        # Create one server instance per port
-        self.servers = [
-            Server("0.0.0.0", p, self.registry, self.shutdown, self.logger)
-            for p in ports
-        ]
+        self.logger = TaskLogger(
+            path=log_file, rotate_bytes=log_rotate_bytes, backups=log_backups
+        )
+
+        if workers:
+            # N processes share the ports through SO_REUSEPORT and report
+            # back to this process, which only runs the admin console
+            self.workers = WorkerProcesses(
+                "0.0.0.0",
+                self.ports,
+                engine,
+                workers,
+                self.registry,
+                self.shutdown,
+                self.logger,
+                pool_opts=pool_opts,
+                metrics=metrics,
+                **opts,
+            )
+            self.pool = None
+            self.metrics = None
+            self.servers = [self.workers]
+            pool_stats = self.workers.pool_stats
+            stats = self.workers.metrics_snapshot if metrics else None
+        else:
+            self.workers = None
+            self.pool = make_pool(engine, **pool_opts)
+            self.metrics = MCMS_metrics.Metrics() if metrics else None
+            self.servers = build_servers(
+                "0.0.0.0",
+                self.ports,
+                engine,
+                self.registry,
+                self.shutdown,
+                self.logger,
+                pool=self.pool,
+                metrics=self.metrics,
+                **opts,
+            )
+            pool_stats = (lambda: {"pool": self.pool.stats()}) if self.pool else None
+            stats = self.metrics.snapshot if self.metrics else None
 
         # Admin console composed into manager
-        self.admin = AdminConsole(self.registry, self.logger, self.shutdown)
+        self.admin = AdminConsole(
+            self.registry,
+            self.logger,
+            self.shutdown,
+            pool_stats=pool_stats,
+            stats=stats,
+        )
+        self.endpoint = (
+            MCMS_metrics.MetricsEndpoint(stats, port=metrics_port)
+            if stats and metrics_port
+            else None
+        )
 
     def start(self):
+        if self.pool:
+            self.pool.start()
+
         # Start all servers
         for server in self.servers:
             server.start()
 
         # Start admin console
         self.admin.start()
+        if self.endpoint:
+            self.endpoint.start()
 
-        print("Servers running on ports:", [s.port for s in self.servers])
-        print("Admin commands: clients | logs [n] | clearlogs | exit")
+        mode = f"{self.workers.count} worker processes" if self.workers else "1 process"
+        print(f"Servers running on ports: {self.ports} (engine: {self.engine}, {mode})")
+        print("Admin commands: clients | logs [n] | clearlogs | pool | stats | exit")
 
         try:
             while not self.shutdown.is_set():
@@ -370,22 +1274,107 @@ class ServerManager:
             print("\nKeyboard interrupt received.")
             self.shutdown.stop()
 
+        if self.workers:
+            self.workers.stop()
+        self.logger.close()  # final flush of the log file, if any
+
         print("Shutdown complete.")
 
 
 def main():
     DEFAULT_PORTS = [5000, 5001]  # if no command line args this will be chosen
 
-    if len(sys.argv) > 1:
-        try:
-            ports = [int(p) for p in sys.argv[1:]]
-        except ValueError:
-            print("Usage: python server.py [port1 port2 ...]")
-            sys.exit(1)
-    else:
-        ports = DEFAULT_PORTS
-
-    ServerManager(ports).start()
+    parser = argparse.ArgumentParser(description="Multi-client multi-server (MCMS)")
+    parser.add_argument("ports", nargs="*", type=int, default=DEFAULT_PORTS)
+    parser.add_argument(
+        "--engine",
+        choices=ENGINES,
+        default="threads",
+        help="threads: one thread per connection; asyncio: one event loop for all ports",
+    )
+    parser.add_argument(
+        "--max-line",
+        type=int,
+        default=DEFAULT_MAX_LINE,
+        help="longest accepted command line in bytes",
+    )
+    parser.add_argument(
+        "--no-batching",
+        dest="batching",
+        action="store_false",
+        help="evaluate, log and answer every command separately",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=0,
+        help="fork N worker processes that share the ports via SO_REUSEPORT",
+    )
+    parser.add_argument(
+        "--pool-size",
+        type=int,
+        default=0,
+        help="threads engine: serve connections from N pooled threads (0 = unbounded)",
+    )
+    parser.add_argument(
+        "--admission",
+        choices=ADMISSION_POLICIES,
+        default="reject",
+        help="when every pooled thread is busy: answer BUSY or queue the connection",
+    )
+    parser.add_argument(
+        "--queue-size",
+        type=int,
+        default=64,
+        help="connections that may wait for a pooled thread (--admission queue)",
+    )
+    parser.add_argument("--backlog", type=int, default=DEFAULT_BACKLOG)
+    parser.add_argument(
+        "--idle-timeout",
+        type=float,
+        default=DEFAULT_IDLE_TIMEOUT,
+        help="seconds before an idle connection is closed",
+    )
+    parser.add_argument(
+        "--no-metrics",
+        dest="metrics",
+        action="store_false",
+        help="disable per-command counters and latency histograms",
+    )
+    parser.add_argument(
+        "--metrics-port",
+        type=int,
+        default=None,
+        help="serve /metrics (Prometheus) and /metrics.json on 127.0.0.1:PORT",
+    )
+    parser.add_argument(
+        "--log-file",
+        default=None,
+        help="append task logs to this file from a background thread",
+    )
+    parser.add_argument(
+        "--log-rotate-bytes", type=int, default=DEFAULT_LOG_ROTATE_BYTES
+    )
+    parser.add_argument("--log-backups", type=int, default=DEFAULT_LOG_BACKUPS)
+    args = parser.parse_args()
+
+    ServerManager(
+        args.ports,
+        engine=args.engine,
+        workers=args.workers,
+        pool_size=args.pool_size,
+        queue_size=args.queue_size,
+        admission=args.admission,
+        metrics=args.metrics,
+        metrics_port=args.metrics_port,
+        log_file=args.log_file,
+        log_rotate_bytes=args.log_rotate_bytes,
+        log_backups=args.log_backups,
+        backlog=args.backlog,
+        idle_timeout=args.idle_timeout,
+        max_line=args.max_line,
+        batching=args.batching,
+    ).start()
 
 
 if __name__ == "__main__":
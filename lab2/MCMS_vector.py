@@ -0,0 +1,183 @@
+import base64
+import binascii
+import operator
+import struct
+import sys
+from array import array
+
+try:
+    import numpy as np
+except ImportError:  # pure-Python fallback below
+    np = None
+
+# vadd 1 2 3 | 4 5 6        -> RESULT: 5 7 9
+# vadd @<base64 frames>     -> RESULT: @<base64 frame>
+# sum 1 2 3                 -> RESULT: 6
+ELEMENTWISE = {
+    "vadd": operator.add,
+    "vsub": operator.sub,
+    "vmul": operator.mul,
+    "vdiv": operator.truediv,
+}
+BINARY = set(ELEMENTWISE) | {"vdot"}
+REDUCTIONS = {"sum", "mean", "min", "max"}
+COMMANDS = BINARY | REDUCTIONS
+
+SEPARATOR = "|"
+BINARY_MARK = "@"
+
+# Binary frame: little-endian uint32 element count, then count float64 values
+_COUNT = struct.Struct("<I")
+
+
+class VectorError(ValueError):
+    pass
+
+
+# ---------------------------
+# Float64 frames
+# ---------------------------
+def pack_frame(values) -> bytes:
+    if np is not None:
+        data = np.asarray(values, dtype="<f8").tobytes()
+    else:
+        vec = values if isinstance(values, array) else array("d", values)
+        if sys.byteorder == "big":
+            vec = array("d", vec)
+            vec.byteswap()
+        data = vec.tobytes()
+    return _COUNT.pack(len(data) // 8) + data
+
+
+def unpack_frames(buf) -> list:
+    # Split a buffer of concatenated frames into vectors
+    view = memoryview(buf)
+    vectors = []
+    pos = 0
+    while pos < len(view):
+        if pos + _COUNT.size > len(view):
+            raise VectorError("truncated frame header")
+        (count,) = _COUNT.unpack_from(view, pos)
+        pos += _COUNT.size
+        end = pos + count * 8
+        if end > len(view):
+            raise VectorError("truncated frame payload")
+        vectors.append(_from_bytes(view[pos:end]))
+        pos = end
+    return vectors
+
+
+def _from_bytes(data):
+    if np is not None:
+        return np.frombuffer(data, dtype="<f8")
+    vec = array("d")
+    vec.frombytes(data)
+    if sys.byteorder == "big":
+        vec.byteswap()
+    return vec
+
+
+# ---------------------------
+# Operand parsing / result formatting
+# ---------------------------
+def _parse_numbers(tokens):
+    try:
+        if np is not None:
+            return np.array(tokens, dtype=np.float64)
+        return array("d", map(float, tokens))
+    except ValueError:
+        raise VectorError("operands must be numbers") from None
+
+
+def parse_operands(args: str) -> tuple:
+    # Returns (vectors, binary) where binary tells how to encode the reply
+    args = args.strip()
+    if args.startswith(BINARY_MARK):
+        try:
+            raw = base64.b64decode(args[1:], validate=True)
+        except binascii.Error:
+            raise VectorError("invalid base64 payload") from None
+        return unpack_frames(raw), True
+
+    return [_parse_numbers(part.split()) for part in args.split(SEPARATOR)], False
+
+
+def format_number(x):
+    return str(int(x) if x.is_integer() else x)
+
+
+def format_vector(vec, binary) -> str:
+    if binary:
+        return BINARY_MARK + base64.b64encode(pack_frame(vec)).decode("ascii")
+    if np is not None:
+        vec = vec.tolist()
+    return " ".join(map(format_number, vec))
+
+
+# ---------------------------
+# Kernels
+# ---------------------------
+def _elementwise(cmd, a, b):
+    if np is not None:
+        return {
+            "vadd": np.add,
+            "vsub": np.subtract,
+            "vmul": np.multiply,
+            "vdiv": np.divide,
+        }[cmd](a, b)
+    return array("d", map(ELEMENTWISE[cmd], a, b))
+
+
+def _dot(a, b):
+    if np is not None:
+        return float(np.dot(a, b))
+    return float(sum(map(operator.mul, a, b)))
+
+
+def _reduce(cmd, a):
+    if np is not None:
+        return float(
+            {"sum": np.sum, "mean": np.mean, "min": np.min, "max": np.max}[cmd](a)
+        )
+    if cmd == "sum":
+        return float(sum(a))
+    if cmd == "mean":
+        return sum(a) / len(a)
+    return float(min(a) if cmd == "min" else max(a))
+
+
+def compute(cmd, vectors):
+    # Returns a float for vdot and the reductions, otherwise a vector
+    if cmd in REDUCTIONS:
+        if len(vectors) != 1:
+            raise VectorError(f"{cmd} requires 1 vector")
+        (a,) = vectors
+        if not len(a):
+            raise VectorError(f"{cmd} requires at least 1 value")
+        return _reduce(cmd, a)
+
+    if len(vectors) != 2:
+        raise VectorError(f"{cmd} requires 2 vectors")
+    a, b = vectors
+    if len(a) != len(b):
+        raise VectorError("vectors must have the same length")
+
+    if cmd == "vdot":
+        return _dot(a, b)
+
+    if cmd == "vdiv" and (not np.all(b) if np is not None else 0.0 in b):
+        raise VectorError("division by zero")
+
+    return _elementwise(cmd, a, b)
+
+
+def handle(cmd: str, args: str) -> str:
+    try:
+        vectors, binary = parse_operands(args)
+        result = compute(cmd, vectors)
+    except VectorError as e:
+        return f"ERROR: {e}"
+
+    if isinstance(result, float):
+        return f"RESULT: {format_number(result)}"
+    return f"RESULT: {format_vector(result, binary)}"
@@ -0,0 +1,613 @@
+import asyncio
+import itertools
+import os
+import random
+import sys
+import time
+from collections import OrderedDict, defaultdict, deque
+
+from segment_log import FSYNC_INTERVAL, SegmentLog
+
+MAX_LINE = 64 * 1024  # longest accepted message (bytes, without newline)
+MAX_WRITE = 256 * 1024  # queued bytes coalesced into one write
+HIGH_WATER = 1024 * 1024  # pause senders once this much is queued for a peer
+LOW_WATER = 256 * 1024  # ...and resume them once the queue drains below this
+RECONNECT_DELAY = 0.5
+BACKOFF_MAX = 5.0  # durable links back off exponentially up to this delay
+WINDOW = 10_000  # unacked messages a durable link may have in flight
+DEFAULT_TTL = 16  # hops a routed message may travel
+SEEN_MAX = 100_000  # routed message ids remembered for de-duplication
+ROUTE_KINDS = (b"direct", b"all", b"topic")
+
+QUIET = False  # silence connection logging (used by the mesh harness)
+
+
+def log(text):
+    if not QUIET:
+        print(text)
+
+
+class PeerLink:
+    # Outbound queue + connection to one peer's server. Messages are framed
+    # by newline; whatever is queued when the writer wakes up goes out in a
+    # single write. Senders await wait_writable(), which blocks while the
+    # queue is above the high watermark, so a slow peer only stalls the
+    # connections that feed it.
+    def __init__(self, host, port, node_id=None, high_water=HIGH_WATER, low_water=LOW_WATER):
+        self.host = host
+        self.port = port
+        self.node_id = node_id
+        self.high_water = high_water
+        self.low_water = low_water
+        self.connected = False
+        self.messages = 0
+        self.writes = 0
+        self._queue = deque()
+        self._queued = 0
+        self._has_data = asyncio.Event()
+        self._writable = asyncio.Event()
+        self._writable.set()
+
+    @property
+    def queued_bytes(self):
+        return self._queued
+
+    @property
+    def writable(self):
+        # False while the queue is above the high watermark
+        return self._writable.is_set()
+
+    def send(self, line: bytes):
+        # line is a complete protocol line without its newline; the same
+        # bytes object can be queued on any number of links
+        self._queue.append(line)
+        self._queued += len(line) + 1
+        self._has_data.set()
+        if self._queued >= self.high_water:
+            self._writable.clear()
+
+    async def wait_writable(self):
+        await self._writable.wait()
+
+    async def run(self):
+        while True:
+            try:
+                _, writer = await asyncio.open_connection(self.host, self.port)
+            except OSError:
+                await asyncio.sleep(RECONNECT_DELAY)
+                continue
+
+            self.connected = True
+            log(f"[FORWARDER] Connected to peer server {self.host}:{self.port}")
+            try:
+                if self.node_id:
+                    writer.write(b"HELLO " + self.node_id.encode() + b"\n")
+                await self._pump(writer)
+            except (ConnectionError, OSError) as e:
+                log(f"[FORWARDER] Lost peer {self.host}:{self.port}: {e}")
+            finally:
+                self.connected = False
+                writer.close()
+
+    async def _pump(self, writer):
+        queue = self._queue
+        while True:
+            if not queue:
+                self._has_data.clear()
+                await self._has_data.wait()
+
+            chunks = []
+            size = 0
+            while queue and size < MAX_WRITE:
+                line = queue.popleft()
+                chunks.append(line)
+                size += len(line) + 1
+
+            chunks.append(b"")
+            writer.write(b"\n".join(chunks))
+            self.messages += len(chunks) - 1
+            self.writes += 1
+            # messages handed to a connection that then fails are lost
+            # (at-most-once, like the threaded Node)
+            try:
+                await writer.drain()
+            finally:
+                self._queued -= size
+            if self._queued <= self.low_water:
+                self._writable.set()
+
+
+class DurablePeerLink:
+    # At-least-once link backed by a SegmentLog. Messages are appended to
+    # the log and sent as "MSG <seq> <payload>" after a "HELLO <node id>"
+    # greeting; the peer answers with cumulative "ACK <seq>" lines. On every
+    # (re)connect sending restarts after the last acked sequence number, so
+    # anything lost with a connection, or with a restart of this node, is
+    # redelivered; the peer drops the duplicates.
+    def __init__(self, host, port, log_dir, node_id, fsync="batch", window=WINDOW, **_):
+        self.host = host
+        self.port = port
+        self.node_id = node_id
+        self.window = window
+        self.log = SegmentLog(log_dir, fsync=fsync)
+        self.connected = False
+        self.messages = 0
+        self.writes = 0
+        self.reconnects = 0
+        self._wake = asyncio.Event()
+        self._sync_timer = None
+
+    @property
+    def queued_bytes(self):
+        return 0  # the log on disk is the queue
+
+    writable = True
+
+    def send(self, line: bytes):
+        self.log.append(line)
+        if self.log.unsynced() and self._sync_timer is None:
+            # "batch" fsync for the tail of a burst, if no later append does it
+            self._sync_timer = asyncio.get_running_loop().call_later(FSYNC_INTERVAL, self._sync)
+        self._wake.set()
+
+    def _sync(self):
+        self._sync_timer = None
+        self.log.flush()
+
+    async def wait_writable(self):
+        pass  # never blocks: the log absorbs bursts and peer outages
+
+    def unacked(self):
+        return self.log.next_seq() - 1 - self.log.acked()
+
+    async def run(self):
+        delay = RECONNECT_DELAY
+        try:
+            while True:
+                try:
+                    reader, writer = await asyncio.open_connection(self.host, self.port)
+                except OSError:
+                    await asyncio.sleep(delay * random.uniform(0.5, 1.0))
+                    delay = min(delay * 2, BACKOFF_MAX)
+                    continue
+                delay = RECONNECT_DELAY
+
+                self.connected = True
+                self.reconnects += 1
+                log(
+                    f"[FORWARDER] Connected to peer server {self.host}:{self.port}"
+                    f" ({self.unacked()} unacked)"
+                )
+                acks = asyncio.create_task(self._read_acks(reader))
+                try:
+                    writer.write(b"HELLO " + self.node_id.encode() + b"\n")
+                    await self._pump(writer, acks)
+                except (ConnectionError, OSError) as e:
+                    log(f"[FORWARDER] Lost peer {self.host}:{self.port}: {e}")
+                finally:
+                    self.connected = False
+                    acks.cancel()
+                    writer.close()
+        finally:
+            if self._sync_timer is not None:
+                self._sync_timer.cancel()
+                self._sync_timer = None
+            self.log.close()
+
+    async def _read_acks(self, reader):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    return
+                if line.startswith(b"ACK "):
+                    self.log.ack(int(line[4:]))
+                    self._wake.set()
+        finally:
+            self._wake.set()  # let the pump notice a closed connection
+
+    async def _pump(self, writer, acks):
+        log = self.log
+        next_seq = log.acked() + 1
+        while True:
+            if acks.done():
+                raise ConnectionError("peer closed the connection")
+            room = self.window - (next_seq - 1 - log.acked())
+            if next_seq >= log.next_seq() or room <= 0:
+                self._wake.clear()
+                await self._wake.wait()
+                continue
+
+            records = log.read(next_seq, max_records=room)
+            writer.write(
+                b"".join(b"MSG %d %s\n" % (seq, payload) for seq, payload in records)
+            )
+            self.messages += len(records)
+            self.writes += 1
+            next_seq = records[-1][0] + 1
+            await writer.drain()
+
+
+class AsyncNode:
+    # Same behaviour as the threaded Node in messege_qu.py: lines typed on
+    # stdin (or sent by any client of this node) are relayed to the peers as
+    # "PEER:<msg>", and "PEER:" lines received from a peer are printed.
+    #
+    # A node can hold any number of peers (one persistent link each, reused
+    # by add_peer) and route messages through a mesh:
+    #   ROUTE <kind> <target> <origin> <counter> <ttl> <payload>
+    # kind is "direct" (target = node id), "all" (broadcast) or "topic".
+    # Every node remembers the (origin, counter) ids it has seen and drops
+    # repeats, which stops loops. Routes are learned on the fly: the first
+    # neighbour a node hears an origin through becomes its route back to
+    # that origin, and "SUB <topic>" announcements, passed on hop by hop,
+    # record which neighbours have subscribers behind them. Unknown
+    # destinations fall back to flooding. A forwarded line is serialized
+    # once and the same bytes are queued on every outgoing link. Routed
+    # traffic is at-most-once: a neighbour whose queue is above the high
+    # watermark is skipped (counted in stats["overflow"]) rather than
+    # stalling the connection the line came in on, and malformed frames are
+    # dropped (stats["malformed"]).
+    #
+    # With log_dir, every link is a DurablePeerLink logging under
+    # log_dir/<ip>_<port>.
+    def __init__(
+        self,
+        my_ip,
+        my_port,
+        peer_ip=None,
+        peer_port=None,
+        on_message=None,
+        log_dir=None,
+        peers=(),
+        subscriptions=(),
+        ttl=DEFAULT_TTL,
+        **link_opts,
+    ):
+        self.my_ip = my_ip
+        self.my_port = my_port
+        self.node_id = f"{my_ip}:{my_port}"
+        self._id = self.node_id.encode()
+        self.log_dir = log_dir
+        self.link_opts = link_opts
+        self.links = {}  # neighbour node id -> link
+        self.link_tasks = {}
+        self.on_message = on_message or self.print_message
+        self.ttl = ttl
+        self.received = 0
+        self.duplicates = 0
+        self.delivered = {}  # durable sender id -> last delivered seq
+
+        self.subscriptions = {t.encode() if isinstance(t, str) else t for t in subscriptions}
+        self.routes = {}  # origin node id -> neighbour it was first heard through
+        self.topic_routes = defaultdict(set)  # topic -> neighbours with subscribers
+        self.seen = OrderedDict()
+        # message counters start at the wall clock in ns, so a restarted
+        # node never reuses an id its neighbours still remember
+        self._counter = itertools.count(time.time_ns())
+        self.stats = {
+            "originated": 0,
+            "forwarded": 0,
+            "dropped": 0,
+            "routed_in": 0,
+            "overflow": 0,
+            "malformed": 0,
+        }
+
+        addrs = list(peers)
+        if peer_ip is not None:
+            addrs.insert(0, (peer_ip, peer_port))
+        for ip, port in addrs:
+            self.add_peer(ip, int(port))
+
+    @property
+    def link(self):
+        # The first peer's link (the only one in the classic two-node setup)
+        return next(iter(self.links.values()))
+
+    @staticmethod
+    def print_message(msg: bytes):
+        print(f"\n[FROM PEER] {msg.decode(errors='replace')}")
+
+    # ---------------------------
+    # Peers
+    # ---------------------------
+    def add_peer(self, ip, port):
+        # One persistent link per neighbour; asking again reuses it
+        peer_id = f"{ip}:{port}"
+        link = self.links.get(peer_id)
+        if link is not None:
+            return link
+        if self.log_dir:
+            directory = os.path.join(self.log_dir, f"{ip}_{port}")
+            link = DurablePeerLink(ip, port, directory, self.node_id, **self.link_opts)
+        else:
+            link = PeerLink(ip, port, self.node_id, **self.link_opts)
+        self.links[peer_id] = link
+        if hasattr(self, "server"):  # already running
+            self.link_tasks[peer_id] = asyncio.create_task(link.run())
+        return link
+
+    async def relay(self, msg: bytes):
+        # Classic one-hop relay to every neighbour
+        line = b"PEER:" + msg
+        for link in self.links.values():
+            await link.wait_writable()
+            link.send(line)
+
+    # ---------------------------
+    # Routing
+    # ---------------------------
+    def _remember(self, key):
+        seen = self.seen
+        if key in seen:
+            return False
+        seen[key] = None
+        if len(seen) > SEEN_MAX:
+            seen.popitem(last=False)
+        return True
+
+    def _next_hops(self, kind, target, exclude):
+        links = self.links
+        if kind == b"direct":
+            name = target.decode(errors="replace")
+            if name in links:
+                return [name]
+            hop = self.routes.get(name)
+            if hop in links and hop != exclude and links[hop].connected:
+                return [hop]
+        elif kind == b"topic":
+            return [n for n in self.topic_routes.get(target, ()) if n != exclude and n in links]
+        return [n for n in links if n != exclude]
+
+    def _fan_out(self, kind, target, origin, counter, ttl, payload, exclude=None):
+        hops = self._next_hops(kind, target, exclude)
+        if not hops:
+            return 0
+        # serialize once, queue the same bytes on every link
+        line = b"ROUTE %s %s %s %d %d %s" % (kind, target, origin, counter, ttl, payload)
+        links = self.links
+        sent = 0
+        for hop in hops:
+            link = links[hop]
+            if link.writable:
+                link.send(line)
+                sent += 1
+            else:
+                self.stats["overflow"] += 1
+        return sent
+
+    def publish(self, kind, target, payload: bytes):
+        # Originate a routed message; returns the number of links used
+        if isinstance(kind, str):
+            kind = kind.encode()
+        if isinstance(target, str):
+            target = target.encode()
+        if kind not in ROUTE_KINDS:
+            raise ValueError(f"unknown route kind: {kind!r}")
+        counter = next(self._counter)
+        self._remember((self._id, counter))
+        self.stats["originated"] += 1
+        return self._fan_out(kind, target, self._id, counter, self.ttl, payload)
+
+    def send_to(self, node_id, payload: bytes):
+        return self.publish(b"direct", node_id, payload)
+
+    def broadcast(self, payload: bytes):
+        return self.publish(b"all", b"*", payload)
+
+    def publish_topic(self, topic, payload: bytes):
+        return self.publish(b"topic", topic, payload)
+
+    def _reaches(self, topic, peer_id):
+        # Whether peer_id should route topic through us: we subscribe, or
+        # know a subscriber behind some other neighbour
+        if topic in self.subscriptions:
+            return True
+        return any(n != peer_id for n in self.topic_routes.get(topic, ()))
+
+    def _announce(self, topic, change, exclude=None):
+        # Apply change() to our subscriptions / routes, then send "SUB" to
+        # every neighbour that can route topic through us only now. A
+        # neighbour we already learned the topic from still hears about a
+        # new local subscriber, or it would never forward the topic to us.
+        before = {peer_id: self._reaches(topic, peer_id) for peer_id in self.links}
+        change()
+        for peer_id, link in self.links.items():
+            if peer_id != exclude and not before[peer_id] and self._reaches(topic, peer_id):
+                link.send(b"SUB " + topic)
+
+    def subscribe(self, topic):
+        if isinstance(topic, str):
+            topic = topic.encode()
+        if topic in self.subscriptions:
+            return
+        self._announce(topic, lambda: self.subscriptions.add(topic))
+
+    def _on_sub(self, topic, sender):
+        if sender is None or sender in self.topic_routes.get(topic, ()):
+            return  # repeated announcement
+        self._announce(topic, lambda: self.topic_routes[topic].add(sender), exclude=sender)
+
+    def _on_hello(self, sender):
+        # A (re)connected neighbour learns every topic reachable through us
+        link = self.links.get(sender)
+        if link is None:
+            return
+        for topic in self.subscriptions | set(self.topic_routes):
+            if self._reaches(topic, sender):
+                link.send(b"SUB " + topic)
+
+    def _on_route(self, line, sender):
+        try:
+            _, kind, target, origin, counter, ttl, payload = line.split(b" ", 6)
+            counter = int(counter)
+            ttl = int(ttl)
+        except ValueError:
+            kind = None
+        if kind not in ROUTE_KINDS or not target or not origin:
+            self.stats["malformed"] += 1
+            return
+        if not self._remember((origin, counter)):
+            self.stats["dropped"] += 1
+            return
+        self.stats["routed_in"] += 1
+        if sender is not None and origin != self._id:
+            self.routes.setdefault(origin.decode(errors="replace"), sender)
+
+        if kind == b"direct":
+            if target == self._id:
+                self.received += 1
+                self.on_message(payload)
+                return
+        elif kind == b"all" or target in self.subscriptions:
+            self.received += 1
+            self.on_message(payload)
+
+        if ttl > 1:
+            n = self._fan_out(kind, target, origin, counter, ttl - 1, payload, exclude=sender)
+            self.stats["forwarded"] += n
+
+    def dispatch(self, msg, sender):
+        # Handle a peer protocol line; False if it is not one
+        if msg.startswith(b"PEER:"):
+            self.received += 1
+            self.on_message(msg[5:])
+        elif msg.startswith(b"ROUTE "):
+            self._on_route(msg, sender)
+        elif msg.startswith(b"SUB ") and sender is not None:
+            self._on_sub(msg[4:], sender)
+        else:
+            return False
+        return True
+
+    def deliver(self, sender, line, ack):
+        # "MSG <seq> <payload>" from a durable link; duplicates are acked
+        # again but not dispatched twice
+        seq_text, _, payload = line[4:].partition(b" ")
+        try:
+            seq = int(seq_text)
+        except ValueError:
+            self.stats["malformed"] += 1
+            return  # no sequence number to ack
+        if seq <= self.delivered.get(sender, 0):
+            self.duplicates += 1
+        else:
+            self.delivered[sender] = seq
+            self.dispatch(payload, sender)
+        ack(seq)
+
+    # ---------------------------
+    # Connections
+    # ---------------------------
+    async def handle_connection(self, reader, writer):
+        addr = writer.get_extra_info("peername")
+        log(f"[SERVER] Connection from {addr}")
+        sender = None
+        pending_ack = None
+
+        def send_ack():
+            # scheduled with call_soon, so it runs once the lines already
+            # buffered are processed: one cumulative ACK per read
+            nonlocal pending_ack
+            if not writer.is_closing():
+                writer.write(b"ACK %d\n" % pending_ack)
+            pending_ack = None
+
+        def ack(seq):
+            nonlocal pending_ack
+            if pending_ack is None:
+                asyncio.get_running_loop().call_soon(send_ack)
+            pending_ack = seq
+
+        discarding = False  # dropping the rest of an over-long line
+        try:
+            while True:
+                try:
+                    line = await reader.readuntil(b"\n")
+                except asyncio.IncompleteReadError as e:
+                    # closed: an unterminated last line, or b""
+                    line = b"" if discarding else e.partial
+                except asyncio.LimitOverrunError as e:
+                    # longer than MAX_LINE: drop what is buffered, and keep
+                    # dropping until the newline that ends the line
+                    await reader.readexactly(e.consumed)
+                    if not discarding:
+                        log(f"[SERVER] Dropped an oversized message from {addr}")
+                        discarding = True
+                    continue
+                if discarding:
+                    discarding = False
+                    continue  # the tail of the oversized line
+                if not line:
+                    break
+
+                msg = line.strip()
+                if not msg:
+                    continue
+                if sender is not None and msg.startswith(b"MSG "):
+                    self.deliver(sender, msg, ack)
+                elif sender is None and msg.startswith(b"HELLO "):
+                    sender = msg[6:].decode(errors="replace")
+                    self._on_hello(sender)
+                elif not self.dispatch(msg, sender):
+                    await self.relay(msg)
+        except (ConnectionError, asyncio.CancelledError):
+            pass  # cancelled: the node is shutting down
+        finally:
+            writer.close()
+
+    async def read_stdin(self):
+        # "exit" / "quit" stops the node. Besides plain relay lines:
+        #   /all <msg>   /to <ip:port> <msg>   /pub <topic> <msg>   /sub <topic>
+        loop = asyncio.get_running_loop()
+        while True:
+            line = await loop.run_in_executor(None, sys.stdin.readline)
+            if not line:
+                await asyncio.Event().wait()  # no stdin: keep relaying
+            msg = line.strip()
+            if msg.lower() in ("exit", "quit"):
+                return
+            if not msg:
+                continue
+            cmd, _, rest = msg.partition(" ")
+            if cmd == "/all":
+                self.broadcast(rest.encode())
+            elif cmd in ("/to", "/pub", "/sub"):
+                target, _, text = rest.partition(" ")
+                if cmd == "/to":
+                    self.send_to(target, text.encode())
+                elif cmd == "/pub":
+                    self.publish_topic(target, text.encode())
+                else:
+                    self.subscribe(target)
+            else:
+                await self.relay(msg.encode())
+
+    async def start(self):
+        self.server = await asyncio.start_server(
+            self.handle_connection, self.my_ip, self.my_port, limit=MAX_LINE, reuse_address=True
+        )
+        log(f"[SERVER] Listening on {self.my_ip}:{self.my_port}")
+        for peer_id, link in self.links.items():
+            self.link_tasks[peer_id] = asyncio.create_task(link.run())
+
+    def close(self):
+        self.server.close()
+        for task in self.link_tasks.values():
+            task.cancel()
+
+    async def stop(self):
+        self.close()
+        for task in self.link_tasks.values():
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    async def run(self, interactive=True):
+        await self.start()
+        if interactive:
+            await self.read_stdin()
+        else:
+            await asyncio.Event().wait()
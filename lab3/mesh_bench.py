@@ -0,0 +1,238 @@
+"""Latency and fan-out throughput of a mesh of AsyncNodes on localhost.
+
+Starts N nodes in one event loop, wired as a ring, a full mesh or a random
+graph, and measures:
+  direct     one-at-a-time send_to() between random node pairs (p50/p99)
+  broadcast  messages from node 0 until every other node has all of them
+  topic      publish() from node 0 to the nodes subscribed to one topic
+
+    python lab3/mesh_bench.py
+    python lab3/mesh_bench.py -n 16 --topology random --degree 3 --messages 5000
+    python lab3/mesh_bench.py --check
+
+--check runs small routing scenarios instead: a node that subscribes after
+it has learned a route to the topic, a node that restarts, malformed
+ROUTE / MSG frames, an over-long line, and a neighbour that is down while traffic is routed
+towards it.
+"""
+
+import argparse
+import asyncio
+import random
+import time
+
+import async_node
+from async_node import AsyncNode
+
+TOPOLOGIES = ("ring", "mesh", "random")
+
+
+def edges(n, topology, degree, rng):
+    if topology == "ring":
+        pairs = {(i, (i + 1) % n) for i in range(n)}
+    elif topology == "mesh":
+        pairs = {(i, j) for i in range(n) for j in range(i + 1, n)}
+    else:
+        # a ring keeps the graph connected; chords bring it up to ~degree
+        pairs = {(i, (i + 1) % n) for i in range(n)}
+        for i in range(n):
+            for j in rng.sample(range(n), min(degree, n)):
+                if j != i:
+                    pairs.add((i, j))
+    return {(min(i, j), max(i, j)) for i, j in pairs if i != j}
+
+
+def percentile(sorted_values, p):
+    return sorted_values[min(len(sorted_values) - 1, int(p / 100 * len(sorted_values)))]
+
+
+async def wait_for(predicate, timeout):
+    deadline = time.perf_counter() + timeout
+    while not predicate():
+        if time.perf_counter() > deadline:
+            raise TimeoutError("mesh did not settle")
+        await asyncio.sleep(0.001)
+
+
+async def run(args):
+    rng = random.Random(args.seed)
+    n = args.nodes
+    ports = [args.port + i for i in range(n)]
+    counts = [0] * n
+    latencies = []
+    arrived = asyncio.Event()
+
+    def handler(i):
+        def on_message(payload):
+            counts[i] += 1
+            if payload.startswith(b"D "):
+                latencies.append(time.perf_counter_ns() - int(payload[2:]))
+                arrived.set()
+
+        return on_message
+
+    nodes = [AsyncNode("127.0.0.1", port, on_message=handler(i)) for i, port in enumerate(ports)]
+    graph = edges(n, args.topology, args.degree, rng)
+    for i, j in graph:
+        nodes[i].add_peer("127.0.0.1", ports[j])
+        nodes[j].add_peer("127.0.0.1", ports[i])
+    for node in nodes:
+        await node.start()
+    await wait_for(lambda: all(l.connected for node in nodes for l in node.links.values()), 10)
+    print(f"{n} nodes, {args.topology}, {len(graph)} links")
+
+    # direct: the first few sends flood and teach every node its routes
+    for _ in range(args.samples):
+        src, dst = rng.sample(range(n), 2)
+        arrived.clear()
+        nodes[src].send_to(nodes[dst].node_id, b"D %d" % time.perf_counter_ns())
+        await asyncio.wait_for(arrived.wait(), 5)
+    lat = sorted(latencies)
+    print(
+        f"{'direct':<10} {len(lat):>8} msgs  p50 {percentile(lat, 50) / 1000:>8.1f} us"
+        f"  p99 {percentile(lat, 99) / 1000:>8.1f} us"
+    )
+
+    payload = b"x" * args.size
+
+    async def fan_out(name, send, receivers):
+        before = [sum(node.stats[k] for node in nodes) for k in ("forwarded", "dropped")]
+        base = sum(counts[i] for i in receivers)
+        expected = base + args.messages * len(receivers)
+        start = time.perf_counter()
+        for k in range(args.messages):
+            send(payload)
+            if k % 100 == 0:
+                await asyncio.sleep(0)  # let the links write while we produce
+        await wait_for(lambda: sum(counts[i] for i in receivers) >= expected, 60)
+        elapsed = time.perf_counter() - start
+        forwarded, dropped = (
+            sum(node.stats[k] for node in nodes) - b for k, b in zip(("forwarded", "dropped"), before)
+        )
+        deliveries = args.messages * len(receivers)
+        print(
+            f"{name:<10} {args.messages:>8} msgs  {args.messages / elapsed:>10,.0f} msg/s"
+            f"  {deliveries / elapsed:>12,.0f} deliveries/s"
+            f"  forwarded {forwarded}  duplicates dropped {dropped}"
+        )
+
+    await fan_out("broadcast", nodes[0].broadcast, range(1, n))
+
+    subscribers = [i for i in range(1, n) if rng.random() < args.subscribe_ratio] or [n - 1]
+    for i in subscribers:
+        nodes[i].subscribe("bench")
+    await wait_for(lambda: b"bench" in nodes[0].topic_routes, 10)
+    await asyncio.sleep(0.2)  # let the announcements reach every branch
+    await fan_out("topic", lambda p: nodes[0].publish_topic("bench", p), subscribers)
+
+    for node in nodes:
+        await node.stop()
+
+
+async def check(args):
+    # Chain a - x - s: s subscribes first, so a learns "t" through x; then
+    # a subscribes too and must still be reached from x and from s
+    ports = [args.port + i for i in range(3)]
+    got = [[] for _ in ports]
+    a, x, s = nodes = [
+        AsyncNode("127.0.0.1", port, on_message=got[i].append) for i, port in enumerate(ports)
+    ]
+    for left, right in ((a, x), (x, s)):
+        left.add_peer(right.my_ip, right.my_port)
+        right.add_peer(left.my_ip, left.my_port)
+    for node in nodes:
+        await node.start()
+    await wait_for(lambda: all(l.connected for node in nodes for l in node.links.values()), 10)
+
+    s.subscribe("t")
+    await wait_for(lambda: a.topic_routes.get(b"t"), 5)
+    a.subscribe("t")
+    await wait_for(lambda: a.node_id in x.topic_routes.get(b"t", ()), 5)
+    x.publish_topic("t", b"from x")
+    s.publish_topic("t", b"from s")
+    await wait_for(lambda: got[0] == [b"from x", b"from s"], 5)
+    print("subscribe after learning a route: reached from both sides")
+
+    # a restarted node's message ids must not collide with its earlier run
+    a.broadcast(b"first run")
+    await wait_for(lambda: b"first run" in got[1], 5)
+    await a.stop()
+    a = nodes[0] = AsyncNode("127.0.0.1", ports[0], on_message=got[0].append)
+    a.add_peer(x.my_ip, x.my_port)
+    await a.start()
+    await wait_for(lambda: all(l.connected for l in a.links.values()), 10)
+    a.broadcast(b"second run")
+    await wait_for(lambda: b"second run" in got[1], 5)
+    print("restarted node: new messages not mistaken for duplicates")
+
+    # malformed frames are counted and dropped; the connection keeps working
+    reader, writer = await asyncio.open_connection(x.my_ip, x.my_port)
+    writer.write(
+        b"HELLO 127.0.0.1:1\n"
+        b"ROUTE direct\n"
+        b"ROUTE bogus * o 1 3 hi\n"
+        b"ROUTE all * o one 3 hi\n"
+        b"MSG nan hi\n"
+        b"ROUTE direct %s o 1 3 still alive\n" % x.node_id.encode()
+    )
+    await writer.drain()
+    await wait_for(lambda: b"still alive" in got[1], 5)
+    writer.close()
+    if x.stats["malformed"] != 4:
+        raise SystemExit(f"expected 4 malformed frames, counted {x.stats['malformed']}")
+    print("malformed frames: 4 dropped, connection still served")
+
+    # an over-long line is dropped through its newline, in whatever reads
+    # it arrives; nothing of it is relayed
+    reader, writer = await asyncio.open_connection(x.my_ip, x.my_port)
+    writer.write(b"Y" * (async_node.MAX_LINE + 4000))
+    await writer.drain()
+    await asyncio.sleep(0.05)
+    writer.write(b"Y" * 1000 + b"TAIL\nafter oversized\n")
+    await writer.drain()
+    await wait_for(lambda: b"after oversized" in got[0], 5)
+    writer.close()
+    if any(b"TAIL" in msg for msg in got[0]):
+        raise SystemExit("the tail of an oversized line was relayed")
+    print("oversized line: dropped whole, next line relayed")
+
+    # a neighbour that is down: its queue stops at the high watermark
+    dead = s.add_peer("127.0.0.1", args.port + 50)
+    payload = b"x" * 1000
+    for _ in range(5000):
+        s.broadcast(payload)
+    if dead.queued_bytes > dead.high_water + len(payload) + 64 or not s.stats["overflow"]:
+        raise SystemExit(f"queue for a dead peer grew to {dead.queued_bytes} bytes")
+    print(
+        f"dead neighbour: queue held at {dead.queued_bytes:,} bytes,"
+        f" {s.stats['overflow']} lines skipped"
+    )
+
+    for node in nodes:
+        await node.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Mesh routing benchmark",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__,
+    )
+    parser.add_argument("-n", "--nodes", type=int, default=8)
+    parser.add_argument("--topology", choices=TOPOLOGIES, default="mesh")
+    parser.add_argument("--degree", type=int, default=3, help="extra links per node for --topology random")
+    parser.add_argument("--messages", type=int, default=10_000, help="messages per fan-out test")
+    parser.add_argument("--size", type=int, default=128, help="payload bytes")
+    parser.add_argument("--samples", type=int, default=1000, help="direct latency samples")
+    parser.add_argument("--subscribe-ratio", type=float, default=0.5)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--port", type=int, default=7700)
+    parser.add_argument("--check", action="store_true", help="run the routing scenarios instead of timing")
+    args = parser.parse_args()
+
+    async_node.QUIET = True
+    asyncio.run(check(args) if args.check else run(args))
+
+
+if __name__ == "__main__":
+    main()
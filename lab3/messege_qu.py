@@ -1,8 +1,12 @@
+import argparse
+import asyncio
 import socket
-import sys
 import threading
 import time
 
+from async_node import AsyncNode
+from segment_log import FSYNC_POLICIES
+
 
 class Node:
     def __init__(self, my_ip, my_port, peer_ip, peer_port):
@@ -103,13 +107,60 @@ class Node:
 
 
 if __name__ == "__main__":
-    if len(sys.argv) != 5:
-        print("Usage: python node.py <my_ip> <my_port> <peer_ip> <peer_port>")
-        sys.exit(1)
-
-    my_ip = sys.argv[1]
-    my_port = int(sys.argv[2])
-    peer_ip = sys.argv[3]
-    peer_port = int(sys.argv[4])
-
-    Node(my_ip, my_port, peer_ip, peer_port).run()
+    parser = argparse.ArgumentParser(description="Message relay node")
+    parser.add_argument("my_ip")
+    parser.add_argument("my_port", type=int)
+    parser.add_argument("peer_ip")
+    parser.add_argument("peer_port", type=int)
+    parser.add_argument(
+        "--engine",
+        choices=("asyncio", "threads"),
+        default="asyncio",
+        help="asyncio: one event loop with queued, coalesced peer writes",
+    )
+    parser.add_argument(
+        "--log-dir",
+        help="asyncio engine: queue messages for the peer in a durable log here",
+    )
+    parser.add_argument("--fsync", choices=FSYNC_POLICIES, default="batch")
+    parser.add_argument(
+        "--peer",
+        action="append",
+        default=[],
+        metavar="IP:PORT",
+        help="asyncio engine: an extra neighbour (repeatable)",
+    )
+    parser.add_argument(
+        "--subscribe",
+        action="append",
+        default=[],
+        metavar="TOPIC",
+        help="asyncio engine: receive messages published to TOPIC (repeatable)",
+    )
+    args = parser.parse_args()
+
+    if args.engine == "threads":
+        if args.peer or args.subscribe:
+            parser.error("--peer and --subscribe need the asyncio engine")
+        Node(args.my_ip, args.my_port, args.peer_ip, args.peer_port).run()
+    else:
+        peers = []
+        for text in args.peer:
+            ip, _, port = text.rpartition(":")
+            if not ip or not port.isdigit():
+                parser.error(f"--peer expects IP:PORT, got {text!r}")
+            peers.append((ip, int(port)))
+        opts = {"log_dir": args.log_dir, "fsync": args.fsync} if args.log_dir else {}
+        node = AsyncNode(
+            args.my_ip,
+            args.my_port,
+            args.peer_ip,
+            args.peer_port,
+            peers=peers,
+            subscriptions=args.subscribe,
+            **opts,
+        )
+        try:
+            asyncio.run(node.run())
+        except KeyboardInterrupt:
+            pass
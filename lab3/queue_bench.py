@@ -0,0 +1,146 @@
+"""Throughput of the durable message queue under each fsync policy.
+
+For every policy, measures:
+  append   SegmentLog.append() of N messages plus a final flush
+  relay    N messages relayed from one AsyncNode to another over localhost
+           through a DurablePeerLink, until the last one is acked
+
+    python lab3/queue_bench.py
+    python lab3/queue_bench.py -n 200000 --size 512 --policies never batch
+    python lab3/queue_bench.py --crash
+
+--crash appends to a log in a child process that then kills itself with
+SIGKILL (no close, no flush) and checks that reopening the log recovers
+every appended record, for each policy.
+"""
+
+import argparse
+import asyncio
+import os
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+
+from async_node import AsyncNode
+from segment_log import FSYNC_POLICIES, SegmentLog
+
+
+def bench_append(directory, policy, n, payload):
+    log = SegmentLog(directory, fsync=policy)
+    start = time.perf_counter()
+    for _ in range(n):
+        log.append(payload)
+    log.flush()
+    elapsed = time.perf_counter() - start
+    log.close()
+    return elapsed
+
+
+async def bench_relay(directory, policy, n, payload, port):
+    done = asyncio.Event()
+    count = 0
+
+    def on_message(msg):
+        nonlocal count
+        count += 1
+        if count == n:
+            done.set()
+
+    sender = AsyncNode("127.0.0.1", port, "127.0.0.1", port + 1, on_message=lambda m: None, log_dir=directory, fsync=policy)
+    receiver = AsyncNode("127.0.0.1", port + 1, "127.0.0.1", port, on_message=on_message)
+    await receiver.start()
+    await sender.start()
+    start = time.perf_counter()
+    for i in range(n):
+        await sender.relay(payload)
+        if i % 1000 == 0:
+            await asyncio.sleep(0)  # let the link send while we produce
+    await done.wait()
+    while sender.link.unacked():
+        await asyncio.sleep(0.001)
+    elapsed = time.perf_counter() - start
+    await sender.stop()
+    await receiver.stop()
+    return elapsed
+
+
+def crash_child(directory, policy, n, size):
+    log = SegmentLog(directory, fsync=policy)
+    for i in range(n):
+        log.append(b"%d " % i + b"x" * size)
+    os.kill(os.getpid(), signal.SIGKILL)
+
+
+def crash(args):
+    # Appended records must outlive the process under every policy
+    n = min(args.messages, args.always_max)
+    for policy in args.policies:
+        directory = tempfile.mkdtemp(prefix="mq-crash-")
+        try:
+            child = subprocess.run(
+                [sys.executable, __file__, "--crash-child", directory, policy, "-n", str(n), "--size", str(args.size)]
+            )
+            if child.returncode != -signal.SIGKILL:
+                raise SystemExit(f"{policy}: writer exited with {child.returncode}, expected SIGKILL")
+            log = SegmentLog(directory, fsync=policy)
+            records = log.read(1, max_bytes=2**62, max_records=n + 1)
+            log.close()
+            expected = [(i + 1, b"%d " % i + b"x" * args.size) for i in range(n)]
+            if [(seq, bytes(payload)) for seq, payload in records] != expected:
+                raise SystemExit(f"{policy}: recovered {len(records)} of {n} records after SIGKILL")
+            print(f"{policy:<7} {n:>9} records appended, killed, all recovered")
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+
+
+def row(name, policy, n, size, elapsed):
+    rate = n / elapsed
+    mb = rate * size / 2**20
+    print(f"{name:<7} {policy:<7} {n:>9} {elapsed:>9.3f}s {rate:>12,.0f} msg/s {mb:>9.1f} MB/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Durable queue benchmark",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__,
+    )
+    parser.add_argument("-n", "--messages", type=int, default=100_000)
+    parser.add_argument("--size", type=int, default=128, help="payload bytes")
+    parser.add_argument("--policies", nargs="+", choices=FSYNC_POLICIES, default=list(FSYNC_POLICIES))
+    parser.add_argument("--always-max", type=int, default=5000, help="cap on messages for the 'always' policy")
+    parser.add_argument("--port", type=int, default=7600)
+    parser.add_argument("--crash", action="store_true", help="kill a writer with SIGKILL and check recovery")
+    parser.add_argument("--crash-child", nargs=2, metavar=("DIR", "POLICY"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.crash_child:
+        crash_child(*args.crash_child, args.messages, args.size)
+        return
+    if args.crash:
+        crash(args)
+        return
+
+    payload = b"x" * args.size
+    print(f"{'test':<7} {'fsync':<7} {'messages':>9} {'time':>10} {'throughput':>16} {'bandwidth':>14}")
+    for i, policy in enumerate(args.policies):
+        # one fsync per message is orders of magnitude slower; keep it short
+        n = min(args.messages, args.always_max) if policy == "always" else args.messages
+        for name in ("append", "relay"):
+            directory = tempfile.mkdtemp(prefix="mq-bench-")
+            try:
+                if name == "append":
+                    elapsed = bench_append(directory, policy, n, payload)
+                else:
+                    port = args.port + 10 * i
+                    elapsed = asyncio.run(bench_relay(directory, policy, n, payload, port))
+            finally:
+                shutil.rmtree(directory, ignore_errors=True)
+            row(name, policy, n, args.size, elapsed)
+
+
+if __name__ == "__main__":
+    main()
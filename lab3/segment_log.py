@@ -0,0 +1,236 @@
+import mmap
+import os
+import struct
+import time
+import zlib
+from array import array
+from bisect import bisect_right
+
+# Record: seq (u64), payload length (u32), crc32 of the payload (u32), payload
+RECORD = struct.Struct("<QII")
+ACK = struct.Struct("<Q")
+
+SEGMENT_BYTES = 64 * 1024 * 1024
+FSYNC_POLICIES = ("always", "batch", "never")
+FSYNC_INTERVAL = 0.05  # longest a record stays unsynced under the "batch" policy
+ACK_PERSIST_INTERVAL = 0.05
+
+
+class Segment:
+    def __init__(self, path, first_seq):
+        self.path = path
+        self.first_seq = first_seq
+        self.offsets = array("Q")  # offset of record first_seq + i
+        self.size = 0
+        self._map = None
+
+    @property
+    def last_seq(self):
+        return self.first_seq + len(self.offsets) - 1
+
+    def view(self):
+        # Read-only mapping of the file, remapped when it has grown
+        if self._map is None or len(self._map) < self.size:
+            self.close()
+            with open(self.path, "rb") as f:
+                self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._map
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+
+
+class SegmentLog:
+    # Append-only message log split into segment files named after their
+    # first sequence number. Sequence numbers start at 1; everything up to
+    # acked() has been confirmed by the consumer and is deleted a segment
+    # at a time. Segment files are unbuffered: append() hands every record
+    # to the OS in one write, so a record survives the process being
+    # killed; the fsync policy only decides when it is forced to disk.
+    def __init__(self, directory, segment_bytes=SEGMENT_BYTES, fsync="batch"):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"unknown fsync policy: {fsync}")
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.fsync = fsync
+        self.segments = []
+        self._first_seqs = []
+        self._file = None
+        self._unsynced = False  # written to the OS but not yet fsynced
+        self._last_sync = time.monotonic()
+        self._ack = 0
+        self._ack_saved = 0
+        self._ack_saved_at = 0.0
+        os.makedirs(directory, exist_ok=True)
+        self._recover()
+
+    # ---------------------------
+    # Startup
+    # ---------------------------
+    def _ack_path(self):
+        return os.path.join(self.directory, "ack")
+
+    def _recover(self):
+        try:
+            with open(self._ack_path(), "rb") as f:
+                (self._ack,) = ACK.unpack(f.read(ACK.size))
+        except (OSError, struct.error):
+            self._ack = 0
+        self._ack_saved = self._ack
+
+        names = sorted(n for n in os.listdir(self.directory) if n.endswith(".log"))
+        for name in names:
+            seg = Segment(os.path.join(self.directory, name), int(name[:-4]))
+            self._scan(seg)
+            self.segments.append(seg)
+            self._first_seqs.append(seg.first_seq)
+        if self.segments:
+            last = self.segments[-1]
+            self._file = open(last.path, "ab", buffering=0)
+        self._next_seq = max(self.last_seq() + 1, self._ack + 1)
+        self._drop_acked()
+
+    def _scan(self, seg):
+        # Rebuild the offset index; a torn or corrupt tail is truncated
+        size = os.path.getsize(seg.path)
+        pos = 0
+        with open(seg.path, "rb") as f:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+            try:
+                expected = seg.first_seq
+                while pos + RECORD.size <= size:
+                    seq, length, crc = RECORD.unpack_from(data, pos)
+                    end = pos + RECORD.size + length
+                    if seq != expected or end > size:
+                        break
+                    if zlib.crc32(data[pos + RECORD.size : end]) != crc:
+                        break
+                    seg.offsets.append(pos)
+                    expected += 1
+                    pos = end
+            finally:
+                if size:
+                    data.close()
+        if pos < size:
+            os.truncate(seg.path, pos)
+        seg.size = pos
+
+    # ---------------------------
+    # Writing
+    # ---------------------------
+    def _roll(self):
+        if self._file is not None:
+            self.flush()
+            self._file.close()
+        seg = Segment(os.path.join(self.directory, f"{self._next_seq:020d}.log"), self._next_seq)
+        self.segments.append(seg)
+        self._first_seqs.append(seg.first_seq)
+        self._file = open(seg.path, "ab", buffering=0)
+
+    def append(self, payload: bytes) -> int:
+        if not self.segments or self.segments[-1].size >= self.segment_bytes:
+            self._roll()
+        seg = self.segments[-1]
+        seq = self._next_seq
+        self._next_seq += 1
+        self._file.write(RECORD.pack(seq, len(payload), zlib.crc32(payload)) + payload)
+        seg.offsets.append(seg.size)
+        seg.size += RECORD.size + len(payload)
+        if self.fsync != "never":
+            self._unsynced = True
+            if self.fsync == "always" or time.monotonic() - self._last_sync >= FSYNC_INTERVAL:
+                self.flush()
+        return seq
+
+    def unsynced(self) -> bool:
+        # Records are waiting for a "batch" fsync; whoever owns the log
+        # should call flush() within FSYNC_INTERVAL if no append comes
+        return self._unsynced
+
+    def flush(self):
+        # fsync every record written so far (a no-op under "never")
+        if not self._unsynced:
+            return
+        os.fsync(self._file.fileno())
+        self._unsynced = False
+        self._last_sync = time.monotonic()
+
+    def last_seq(self) -> int:
+        return self.segments[-1].last_seq if self.segments else self._ack
+
+    def next_seq(self) -> int:
+        return self._next_seq
+
+    # ---------------------------
+    # Reading
+    # ---------------------------
+    def read(self, seq, max_bytes=256 * 1024, max_records=4096):
+        # Records seq, seq+1, ... as (seq, payload) up to the size limits
+        out = []
+        size = 0
+        i = max(bisect_right(self._first_seqs, seq) - 1, 0)
+        while i < len(self.segments) and size < max_bytes and len(out) < max_records:
+            seg = self.segments[i]
+            seq = max(seq, seg.first_seq)
+            if seq > seg.last_seq:
+                i += 1
+                continue
+            data = seg.view()
+            pos = seg.offsets[seq - seg.first_seq]
+            while pos < seg.size and size < max_bytes and len(out) < max_records:
+                _, length, _ = RECORD.unpack_from(data, pos)
+                start = pos + RECORD.size
+                out.append((seq, data[start : start + length]))
+                size += length
+                seq += 1
+                pos = start + length
+            i += 1
+        return out
+
+    # ---------------------------
+    # Acknowledgements
+    # ---------------------------
+    def acked(self) -> int:
+        return self._ack
+
+    def ack(self, seq):
+        # Cumulative: everything up to seq has been delivered
+        if seq <= self._ack:
+            return
+        self._ack = min(seq, self._next_seq - 1)
+        now = time.monotonic()
+        if now - self._ack_saved_at >= ACK_PERSIST_INTERVAL:
+            self._save_ack()
+        self._drop_acked()
+
+    def _save_ack(self):
+        if self._ack == self._ack_saved:
+            return
+        tmp = self._ack_path() + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(ACK.pack(self._ack))
+            if self.fsync != "never":
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp, self._ack_path())
+        self._ack_saved = self._ack
+        self._ack_saved_at = time.monotonic()
+
+    def _drop_acked(self):
+        # Delete segments whose every record is acked (never the active one)
+        while len(self.segments) > 1 and self.segments[0].last_seq <= self._ack:
+            seg = self.segments.pop(0)
+            self._first_seqs.pop(0)
+            seg.close()
+            os.remove(seg.path)
+
+    def close(self):
+        if self._file is not None:
+            self.flush()
+            self._file.close()
+            self._file = None
+        self._save_ack()
+        for seg in self.segments:
+            seg.close()
@@ -1,16 +1,62 @@
 from __future__ import annotations
 
+import argparse
 import json
+import logging
+import multiprocessing
+import os
+import sys
 import time
+from array import array
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, as_completed, wait
+from dataclasses import dataclass
+from heapq import heappop, heappush
+from itertools import compress, count
+from operator import gt, itemgetter
 from pathlib import Path
-from typing import List, Tuple
+from typing import Callable, List, Optional, Tuple
+
+import seed_io
+
+try:
+    import numpy as np
+except ImportError:  # array('q') backend only
+    np = None
 
 MOD = 9973
-N = 5
 DELAY_SECONDS = 0.25
+BATCH_INFLIGHT = 4  # scenarios queued per batch worker
+
+# Vector clocks are array('q') or int64 NumPy vectors; the number of nodes
+# is the number of clocks in the seed
+BACKENDS = ("auto", "array", "numpy")
+NUMPY_MIN_NODES = 32  # below this, per-call NumPy overhead outweighs the vector ops
+
+log = logging.getLogger("chronos")
+
+# Per-message lines are logged at DEBUG, per-node summaries at INFO.
+# An event sink, when set, receives one dict per receive / deliver / buffer
+# step and one "final" dict per node.
+EventSink = Callable[[dict], None]
+
+
+@dataclass
+class SimConfig:
+    delay: float = DELAY_SECONDS  # seconds slept per receive and delivery
+    on_event: Optional[EventSink] = None
+    backend: str = "auto"
 
 
-def load_seed() -> dict:
+DEMO = SimConfig()
+THROUGHPUT = SimConfig(delay=0.0)  # no artificial delays
+
+
+def load_seed(path: Optional[str] = None) -> dict:
+    # The whole seed.json as one dict; see open_seed for large seeds
+    if path is not None:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
     candidates = []
 
     if "__file__" in globals():
@@ -29,6 +75,28 @@ def load_seed() -> dict:
     )
 
 
+def open_seed(path: Optional[str] = None, stream: bool = False, backend: str = "auto") -> dict:
+    # Binary seeds are memory-mapped (one MessageQueue per node over the
+    # file); *.jsonl seeds, and seed.json with stream=True, hand their
+    # queues to simulate one node at a time. Anything else is load_seed.
+    if path is not None and seed_io.is_binary_seed(path):
+        seed = seed_io.load_binary_seed(path)
+    elif path is not None and (stream or path.endswith(".jsonl")):
+        seed = seed_io.stream_seed(path)
+    else:
+        return load_seed(path)
+    records = seed.pop("records", None)
+    if records is not None:
+        n = len(seed["clocks"])
+        backend = choose_backend(n, backend)
+        source = seed.pop("path", None)  # None for a spooled temporary seed
+        seed["queues"] = [
+            MessageQueue.from_records(words, n, backend, None if source is None else (source, i))
+            for i, words in enumerate(records)
+        ]
+    return seed
+
+
 def align_clocks(
     clocks: List[int], theta: int
 ) -> Tuple[List[int], int, List[int], List[int]]:
@@ -38,139 +106,585 @@ def align_clocks(
         raise ValueError("Trusted set is empty. Node 0 must always be trusted.")
 
     target = sum(clocks[i] for i in trusted) // len(trusted)
+    is_trusted = set(trusted)
 
     offsets: List[int] = []
     synced: List[int] = []
 
     for i, t in enumerate(clocks):
-        delta = target - t if i in trusted else 0
+        delta = target - t if i in is_trusted else 0
         offsets.append(delta)
         synced.append(t + delta)
 
     return trusted, target, offsets, synced
 
 
-def can_deliver(v_local: List[int], sender: int, v_msg: List[int]) -> bool:
-
+def choose_backend(n: int, backend: str = "auto") -> str:
+    if backend == "auto":
+        return "numpy" if np is not None and n >= NUMPY_MIN_NODES else "array"
+    if backend not in BACKENDS:
+        raise ValueError(f"unknown backend: {backend}")
+    if backend == "numpy" and np is None:
+        raise RuntimeError("numpy is not installed")
+    return backend
+
+
+def new_clock(n: int, backend: str):
+    if backend == "numpy":
+        return np.zeros(n, dtype=np.int64)
+    return array("q", bytes(8 * n))
+
+
+def as_list(v) -> List[int]:
+    return v if isinstance(v, list) else v.tolist()
+
+
+class MessageQueue:
+    # One node's queue in compact form: senders in an array('q') and the
+    # message vectors as the rows of one preallocated (messages x n) int64
+    # matrix (NumPy) or of one flat array('q'), row i starting at word
+    # i * stride. Iterating yields (sender, v_msg) with v_msg a view of its
+    # row. A queue over a binary seed file remembers (path, node) so that
+    # pickling it (spawned pool workers) re-maps the file instead of
+    # copying the records.
+    def __init__(
+        self, n: int, senders, vectors, backend: str, stride: Optional[int] = None, source=None
+    ):
+        self.n = n
+        self.senders = senders
+        self.vectors = vectors
+        self.backend = backend
+        self.stride = n if stride is None else stride
+        self.source = source
+
+    @classmethod
+    def from_messages(cls, messages, n: int, backend: str) -> "MessageQueue":
+        if not isinstance(messages, list):
+            messages = list(messages)
+        senders = array("q", [msg["sender"] for msg in messages])
+        if backend == "numpy":
+            vectors = np.empty((len(messages), n), dtype=np.int64)
+            for i, msg in enumerate(messages):
+                v_msg = msg["v_msg"]
+                if len(v_msg) != n:  # a length-1 vector would broadcast
+                    raise ValueError(f"Expected vectors of length {n}, got {len(v_msg)}.")
+                vectors[i] = v_msg
+        else:
+            vectors = array("q")
+            for msg in messages:
+                v_msg = msg["v_msg"]
+                if len(v_msg) != n:  # would shift every later row
+                    raise ValueError(f"Expected vectors of length {n}, got {len(v_msg)}.")
+                vectors.extend(v_msg)
+        return cls(n, senders, vectors, backend)
+
+    @classmethod
+    def from_records(cls, words, n: int, backend: str, source=None) -> "MessageQueue":
+        # Over the (sender, v_msg[0..n-1]) int64 records of a binary seed,
+        # without copying the vectors
+        if backend == "numpy":
+            matrix = np.frombuffer(words, dtype=np.int64).reshape(-1, n + 1)
+            return cls(n, array("q", matrix[:, 0].tolist()), matrix[:, 1:], backend, source=source)
+        return cls(n, words[:: n + 1], words[1:], backend, stride=n + 1, source=source)
+
+    def __reduce__(self):
+        if self.source is not None:
+            return _binary_queue, (*self.source, self.backend)
+        senders, vectors = self.senders, self.vectors
+        if isinstance(senders, memoryview):  # memoryviews cannot be pickled
+            senders = array("q", senders.tobytes())
+        if isinstance(vectors, memoryview):
+            vectors = array("q", vectors.tobytes())
+        return MessageQueue, (self.n, senders, vectors, self.backend, self.stride)
+
+    def __len__(self) -> int:
+        return len(self.senders)
+
+    def __iter__(self):
+        if self.backend == "numpy":
+            return zip(self.senders, self.vectors)
+        n, stride = self.n, self.stride
+        rows = memoryview(self.vectors)
+        return ((sender, rows[i * stride : i * stride + n]) for i, sender in enumerate(self.senders))
+
+
+def _binary_queue(path: str, node: int, backend: str) -> MessageQueue:
+    # Unpickle a binary seed queue by mapping the file again
+    seed = seed_io.load_binary_seed(path)
+    n = len(seed["clocks"])
+    return MessageQueue.from_records(seed["records"][node], n, backend, source=(path, node))
+
+
+def can_deliver(v_local, sender: int, v_msg) -> bool:
+    # v_msg must be the sender's next message, and everything else it has
+    # seen must already be delivered here: the sender's entry is then the
+    # only one ahead of v_local
     if v_msg[sender] != v_local[sender] + 1:
         return False
+    if np is not None and isinstance(v_msg, np.ndarray):
+        return np.count_nonzero(v_msg > v_local) == 1
+    return sum(map(gt, v_msg, v_local)) == 1
 
-    for k in range(N):
-        if k != sender and v_msg[k] > v_local[k]:
-            return False
-
-    return True
-
-
-def apply_message(v_local: List[int], v_msg: List[int]) -> None:
-    
-    for k in range(N):
-        v_local[k] = max(v_local[k], v_msg[k])
-
-
-def process_buffer(v_local: List[int], buffer: List[dict], node_id: int) -> None:
- 
-    changed = True
-    while changed:
-        changed = False
-        i = 0
-        while i < len(buffer):
-            msg = buffer[i]
-            sender = msg["sender"]
-            v_msg = msg["v_msg"]
 
-            if can_deliver(v_local, sender, v_msg):
-                print(
-                    f"[Node {node_id}] buffered message from {sender} is now deliverable -> processing"
-                )
-                time.sleep(DELAY_SECONDS)
+def apply_message(v_local, v_msg) -> None:
+    # Element-wise max, in place
+    if np is not None and isinstance(v_local, np.ndarray):
+        np.maximum(v_local, v_msg, out=v_local)
+    else:
+        # compare in C, write only the entries that are ahead
+        for k in compress(count(), map(gt, v_msg, v_local)):
+            v_local[k] = v_msg[k]
 
-                apply_message(v_local, v_msg)
 
-                print(f"[Node {node_id}] vector clock updated to {v_local}")
-                buffer.pop(i)
-                changed = True
-                i = 0  
-            else:
-                i += 1
+def first_missing(v_local, sender: int, v_msg) -> int:
+    # First k != sender whose entry is ahead of v_local (a dependency not
+    # yet delivered here), or -1
+    if np is not None and isinstance(v_msg, np.ndarray):
+        ahead = np.flatnonzero(v_msg > v_local)[:2]
+    else:
+        ahead = compress(count(), map(gt, v_msg, v_local))
+    for k in ahead:
+        if k != sender:
+            return int(k)
+    return -1
+
+
+class CausalBuffer:
+    # Messages waiting for their causal history, indexed by what they wait
+    # for. A message is parked under the first unmet condition of
+    # can_deliver as (k, value): "recheck once v_local[k] == value" (its
+    # sender's previous message for k == sender, a missing dependency
+    # otherwise). Delivering a message from k raises v_local[k] by exactly
+    # one, so it only wakes the messages parked under (k, v_local[k]).
+    # Messages that pass every check wait in a heap ordered by arrival, so
+    # they are delivered in the same order as a front-to-back rescan of the
+    # buffer would pick them.
+    def __init__(self, v_local):
+        self.v_local = v_local
+        self._waiting: dict = {}
+        self._ready: list = []  # heap of (arrival, sender, v_msg)
+        self._stale: list = []  # already-delivered sequence numbers
+        self._arrivals = 0
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def add(self, sender: int, v_msg) -> None:
+        self._arrivals += 1
+        self._size += 1
+        self._park((self._arrivals, sender, v_msg))
+
+    def _park(self, item: tuple) -> None:
+        _, sender, v_msg = item
+        v_local = self.v_local
+        seq = int(v_msg[sender])
+        have = int(v_local[sender])
+        if seq <= have:
+            self._stale.append(item)  # can never be delivered
+            return
+        if seq > have + 1:
+            key = (sender, seq - 1)
+        else:
+            k = first_missing(v_local, sender, v_msg)
+            if k < 0:
+                heappush(self._ready, item)
+                return
+            key = (k, int(v_msg[k]))
+        waiting = self._waiting.get(key)
+        if waiting is None:
+            self._waiting[key] = [item]
+        else:
+            waiting.append(item)
+
+    def advanced(self, k: int) -> None:
+        # v_local[k] has just gone up by one
+        woken = self._waiting.pop((k, int(self.v_local[k])), None)
+        if woken:
+            for item in woken:
+                self._park(item)
+
+    def pop_ready(self) -> Optional[tuple]:
+        # The earliest-arrived deliverable (sender, v_msg), or None
+        ready = self._ready
+        while ready:
+            item = heappop(ready)
+            if can_deliver(self.v_local, item[1], item[2]):
+                self._size -= 1
+                return item[1], item[2]
+            # a same-sequence duplicate was delivered first
+            self._stale.append(item)
+        return None
+
+    def messages(self) -> List[dict]:
+        # Undelivered messages in arrival order
+        left = self._ready + self._stale
+        for waiting in self._waiting.values():
+            left.extend(waiting)
+        left.sort(key=lambda item: item[0])
+        return [{"sender": sender, "v_msg": as_list(v_msg)} for _, sender, v_msg in left]
+
+
+def process_buffer(
+    v_local: List[int], buffer: CausalBuffer, node_id: int, config: SimConfig = DEMO
+) -> int:
+    # Deliver every buffered message that has become deliverable; returns
+    # how many were delivered
+    verbose = log.isEnabledFor(logging.DEBUG)
+    emit = config.on_event
+    delivered = 0
+    while True:
+        msg = buffer.pop_ready()
+        if msg is None:
+            return delivered
+        sender, v_msg = msg
+
+        if verbose:
+            log.debug(
+                f"[Node {node_id}] buffered message from {sender} is now deliverable -> processing"
+            )
+        if config.delay:
+            time.sleep(config.delay)
+
+        apply_message(v_local, v_msg)
+        buffer.advanced(sender)
+        delivered += 1
+
+        if verbose:
+            log.debug(f"[Node {node_id}] vector clock updated to {as_list(v_local)}")
+        if emit:
+            emit({"event": "deliver", "node": node_id, "sender": sender, "buffered": True, "v": as_list(v_local)})
 
 
 def process_node(
-    node_id: int, queue: List[dict], synced_clock: int
+    node_id: int, queue, synced_clock: int, config: SimConfig = DEMO, n: Optional[int] = None
 ) -> Tuple[List[int], int, List[dict]]:
-    v_local = [0] * N
-    buffer: List[dict] = []
-
-    print(f"\n=== Node {node_id} ===")
-    print(f"[Node {node_id}] aligned clock = {synced_clock}")
-    print(f"[Node {node_id}] starting vector clock = {v_local}")
-
-    for msg in queue:
-        sender = msg["sender"]
-        v_msg = msg["v_msg"]
-
-        print(f"[Node {node_id}] received message from {sender}: {v_msg}")
-        time.sleep(DELAY_SECONDS)
+    # queue is a MessageQueue or a list (or, with n given, any iterable) of
+    # {"sender", "v_msg"} dicts; n defaults to the length of the first
+    # vector. Dicts are packed into a
+    # NumPy matrix for the numpy backend; the array backend reads their
+    # lists as they are, since copying them would only add memory.
+    if isinstance(queue, MessageQueue):
+        n, backend = queue.n, queue.backend
+        messages = queue
+    else:
+        if n is None:
+            n = len(queue[0]["v_msg"]) if queue else 0
+        backend = choose_backend(n, config.backend)
+        if backend == "numpy":
+            messages = MessageQueue.from_messages(queue, n, backend)
+        else:
+            messages = map(itemgetter("sender", "v_msg"), queue)
+    v_local = new_clock(n, backend)
+    buffer = CausalBuffer(v_local)
+    verbose = log.isEnabledFor(logging.DEBUG)
+    emit = config.on_event
+    delay = config.delay
+
+    if verbose:
+        log.debug(f"\n=== Node {node_id} ===")
+        log.debug(f"[Node {node_id}] aligned clock = {synced_clock}")
+        log.debug(f"[Node {node_id}] starting vector clock = {as_list(v_local)}")
+
+    for sender, v_msg in messages:
+        if len(v_msg) != n:
+            raise ValueError(f"Expected vectors of length {n}, got {len(v_msg)}.")
+        if verbose:
+            log.debug(f"[Node {node_id}] received message from {sender}: {as_list(v_msg)}")
+        if delay:
+            time.sleep(delay)
+        if emit:
+            emit({"event": "receive", "node": node_id, "sender": sender, "v_msg": as_list(v_msg)})
 
         if can_deliver(v_local, sender, v_msg):
             apply_message(v_local, v_msg)
-            print(f"[Node {node_id}] processed immediately -> {v_local}")
-            process_buffer(v_local, buffer, node_id)
+            if verbose:
+                log.debug(f"[Node {node_id}] processed immediately -> {as_list(v_local)}")
+            if emit:
+                emit({"event": "deliver", "node": node_id, "sender": sender, "buffered": False, "v": as_list(v_local)})
+            if buffer:
+                buffer.advanced(sender)
+                process_buffer(v_local, buffer, node_id, config)
         else:
-            buffer.append(msg)
-            print(f"[Node {node_id}] buffered (causal history missing)")
-
-    process_buffer(v_local, buffer, node_id)
-
-    if buffer:
-        print(
-            f"[Node {node_id}] WARNING: {len(buffer)} message(s) could not be delivered and remain buffered."
+            buffer.add(sender, v_msg)
+            if verbose:
+                log.debug(f"[Node {node_id}] buffered (causal history missing)")
+            if emit:
+                emit({"event": "buffer", "node": node_id, "sender": sender, "pending": len(buffer)})
+
+    process_buffer(v_local, buffer, node_id, config)
+    left = buffer.messages()
+
+    if left:
+        log.warning(
+            f"[Node {node_id}] WARNING: {len(left)} message(s) could not be delivered and remain buffered."
         )
-    else:
-        print(f"[Node {node_id}] buffer emptied.")
-
-    payload = (synced_clock * sum(v_local)) % MOD
-    print(
-        f"[Node {node_id}] final payload = ({synced_clock} * {sum(v_local)}) mod {MOD} = {payload}"
-    )
-    return v_local, payload, buffer
-
-
-def main() -> None:
-    seed = load_seed()
-
+    elif verbose:
+        log.debug(f"[Node {node_id}] buffer emptied.")
+
+    v_final = as_list(v_local)
+    total = sum(v_final)
+    payload = (synced_clock * total) % MOD
+    if verbose:
+        log.debug(
+            f"[Node {node_id}] final payload = ({synced_clock} * {total}) mod {MOD} = {payload}"
+        )
+    if emit:
+        emit({"event": "final", "node": node_id, "v": v_final, "payload": payload, "buffered_left": len(left)})
+    return v_final, payload, left
+
+
+_QUEUES: Optional[list] = None  # the seed's queues, inherited by forked node workers
+
+
+def _node_task(task: tuple) -> Tuple[List[int], int, List[dict]]:
+    node_id, queue, synced_clock, config, n = task
+    if queue is None:
+        queue = _QUEUES[node_id]
+    return process_node(node_id, queue, synced_clock, config, n)
+
+
+def _process_parallel(queues: list, synced: List[int], config: SimConfig, workers: int) -> list:
+    # Every node's queue is independent once the clocks are aligned, so
+    # each one runs in its own pool worker. Forked workers read the queues
+    # inherited from this process instead of receiving a pickled copy.
+    global _QUEUES
+    fork = multiprocessing.get_start_method() == "fork"
+    _QUEUES = queues if fork else None
+    n = len(queues)
+    try:
+        tasks = [(i, None if fork else queues[i], synced[i], config, n) for i in range(n)]
+        with multiprocessing.Pool(min(workers, n)) as pool:
+            return pool.map(_node_task, tasks, chunksize=1)
+    finally:
+        _QUEUES = None
+
+
+def simulate(
+    seed: dict, config: SimConfig = DEMO, workers: int = 1
+) -> List[Tuple[int, List[int], int, List[dict]]]:
+    # Align the clocks, then run every node's queue (on a process pool when
+    # workers > 1); returns (node_id, v_local, payload, buffer) per node.
+    # seed["queues"] may be an iterator (open_seed): with workers=1 each
+    # queue is then read while its node runs and dropped afterwards.
     theta = int(seed["theta"])
     clocks = list(seed["clocks"])
-    queues = list(seed["queues"])
+    queues = seed["queues"]
+    if not isinstance(queues, list) and workers > 1:
+        queues = [q if isinstance(q, MessageQueue) else list(q) for q in queues]
 
-    if len(clocks) != N or len(queues) != N:
-        raise ValueError(f"Expected exactly {N} clocks and {N} queues.")
+    n = len(clocks)
+    if n == 0 or (isinstance(queues, list) and len(queues) != n):
+        raise ValueError(f"Expected one queue per clock, got {n} clocks and {len(queues)} queues.")
 
-    print("Project Chronos simulation starting...")
-    print(f"Initial clocks: {clocks}")
-    print(f"Theta: {theta}")
+    log.info("Project Chronos simulation starting...")
+    log.info(f"Initial clocks: {clocks}")
+    log.info(f"Theta: {theta}")
 
     trusted, target, offsets, synced = align_clocks(clocks, theta)
 
-    print("\n=== Clock Alignment ===")
-    print(f"Trusted nodes: {trusted}")
-    print(f"Target time (floor average): {target}")
-    print(f"Offsets: {offsets}")
-    print(f"Synchronized clocks: {synced}")
+    log.info("\n=== Clock Alignment ===")
+    log.info(f"Trusted nodes: {trusted}")
+    log.info(f"Target time (floor average): {target}")
+    log.info(f"Offsets: {offsets}")
+    log.info(f"Synchronized clocks: {synced}")
+
+    if workers > 1:
+        if config.on_event is not None:
+            raise ValueError("structured events need workers=1")
+        done = _process_parallel(queues, synced, config, workers)
+        return [(node_id, *result) for node_id, result in enumerate(done)]
 
     results = []
-    for node_id in range(N):
-        v_local, payload, buffer = process_node(
-            node_id, queues[node_id], synced[node_id]
-        )
+    for node_id, queue in enumerate(queues):
+        if node_id >= n:
+            raise ValueError(f"Expected one queue per clock, got {n} clocks and more queues.")
+        v_local, payload, buffer = process_node(node_id, queue, synced[node_id], config, n)
         results.append((node_id, v_local, payload, buffer))
+    if len(results) != n:
+        raise ValueError(f"Expected one queue per clock, got {n} clocks and {len(results)} queues.")
+    return results
+
+
+def iter_scenarios(source: str):
+    # (name, kind, data) per scenario: every *.json / *.bin seed of a directory, or
+    # every line of a JSONL file ("-" reads stdin). Lines are handed out
+    # unparsed so the workers do the JSON decoding.
+    if source != "-" and os.path.isdir(source):
+        for name in sorted(os.listdir(source)):
+            if name.endswith((".json", ".bin")):
+                yield name, "path", os.path.join(source, name)
+        return
+
+    stream = sys.stdin if source == "-" else open(source, "r", encoding="utf-8")
+    try:
+        for lineno, line in enumerate(stream, 1):
+            if line.strip():
+                yield f"{source}:{lineno}", "text", line
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+
+
+def run_scenario(item: tuple, config: SimConfig = THROUGHPUT) -> dict:
+    name, kind, data = item
+    start = time.perf_counter()
+    try:
+        seed = open_seed(data, backend=config.backend) if kind == "path" else json.loads(data)
+        results = simulate(seed, config)
+    except (OSError, ValueError, KeyError, TypeError, IndexError) as e:
+        return {"seed": name, "error": f"{type(e).__name__}: {e}"}
+    return {
+        "seed": name,
+        "elapsed": round(time.perf_counter() - start, 6),
+        "nodes": [
+            {"node": node_id, "v": v_local, "payload": payload, "buffered_left": len(buffer)}
+            for node_id, v_local, payload, buffer in results
+        ],
+    }
+
+
+def run_batch(source: str, workers: Optional[int] = None, config: SimConfig = THROUGHPUT):
+    # Yield one result dict per scenario as soon as it finishes (not in
+    # input order). At most workers * BATCH_INFLIGHT scenarios are read
+    # ahead, so arbitrarily long streams run in constant memory.
+    workers = workers or os.cpu_count() or 1
+    scenarios = iter_scenarios(source)
+    if workers < 2:
+        for item in scenarios:
+            yield run_scenario(item, config)
+        return
+
+    limit = workers * BATCH_INFLIGHT
+    with ProcessPoolExecutor(workers) as pool:
+        pending = set()
+        for item in scenarios:
+            pending.add(pool.submit(run_scenario, item, config))
+            if len(pending) >= limit:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+        for future in as_completed(pending):
+            yield future.result()
+
+
+def json_lines(stream) -> EventSink:
+    # Event sink writing one JSON object per line
+    dumps = json.dumps
+    write = stream.write
+
+    def emit(event: dict) -> None:
+        write(dumps(event) + "\n")
+
+    return emit
+
 
-    print("\n=== Final Results ===")
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Project Chronos simulation")
+    parser.add_argument("seed", nargs="?", help="seed file (default: seed.json next to the script or in the cwd)")
+    parser.add_argument(
+        "--mode",
+        choices=("demo", "throughput"),
+        default="demo",
+        help="demo: sleep DELAY_SECONDS per step and log every message; throughput: no delays, summaries only",
+    )
+    parser.add_argument("--delay", type=float, help="seconds per receive / delivery (overrides --mode)")
+    parser.add_argument(
+        "--log-level",
+        choices=("DEBUG", "INFO", "WARNING", "ERROR"),
+        help="DEBUG logs every message (default: DEBUG in demo mode, INFO in throughput mode)",
+    )
+    parser.add_argument("--events", metavar="FILE", help="write structured JSONL events to FILE ('-' for stdout)")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="process pool size: nodes run in parallel, or scenarios with --batch (0 = one per CPU)",
+    )
+    parser.add_argument(
+        "--batch",
+        metavar="SOURCE",
+        help="run every seed of a directory (*.json, *.bin) or JSONL file ('-' for stdin) in throughput mode",
+    )
+    parser.add_argument("--out", metavar="FILE", help="--batch: write the JSONL results to FILE instead of stdout")
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="read seed.json incrementally, one node's queue at a time (always on for *.jsonl seeds)",
+    )
+    parser.add_argument(
+        "--convert",
+        metavar="OUT",
+        help="write the seed (JSON or JSONL) as a memory-mappable binary seed to OUT and exit",
+    )
+    parser.add_argument(
+        "--backend",
+        choices=BACKENDS,
+        default="auto",
+        help=f"vector clocks as array('q') or NumPy (auto: NumPy from {NUMPY_MIN_NODES} nodes when installed)",
+    )
+    args = parser.parse_args()
+
+    if args.workers == 0:
+        args.workers = os.cpu_count() or 1
+    if args.events and args.workers > 1:
+        parser.error("--events needs --workers 1")
+    if args.backend == "numpy" and np is None:
+        parser.error("--backend numpy needs NumPy installed")
+
+    if args.convert:
+        if args.seed is None:
+            parser.error("--convert needs a seed path")
+        seed_io.convert_seed(args.seed, args.convert)
+        return
+
+    if args.batch:
+        logging.basicConfig(level=args.log_level or "ERROR", format="%(message)s", stream=sys.stderr)
+        out = open(args.out, "w", encoding="utf-8") if args.out else sys.stdout
+        try:
+            config = SimConfig(delay=0.0, backend=args.backend)
+            for result in run_batch(args.batch, args.workers, config):
+                out.write(json.dumps(result) + "\n")
+                out.flush()
+        finally:
+            if out is not sys.stdout:
+                out.close()
+        return
+
+    level = args.log_level or ("DEBUG" if args.mode == "demo" else "INFO")
+    logging.basicConfig(level=level, format="%(message)s", stream=sys.stdout)
+
+    base = DEMO if args.mode == "demo" else THROUGHPUT
+    config = SimConfig(delay=base.delay if args.delay is None else args.delay, backend=args.backend)
+
+    events = None
+    if args.events:
+        events = sys.stdout if args.events == "-" else open(args.events, "w", encoding="utf-8")
+        config.on_event = json_lines(events)
+
+    seed = open_seed(args.seed, args.stream, args.backend)
+    start = time.perf_counter()
+    try:
+        results = simulate(seed, config, args.workers)
+    finally:
+        if events is not None and events is not sys.stdout:
+            events.close()
+    elapsed = time.perf_counter() - start
+
+    log.info("\n=== Final Results ===")
     for node_id, v_local, payload, buffer in results:
-        print(
+        log.info(
             f"Node {node_id}: V={v_local}, payload={payload}, buffered_left={len(buffer)}"
         )
 
+    messages = seed.get("messages")
+    if messages is None:
+        if isinstance(seed["queues"], list):
+            messages = sum(len(q) for q in seed["queues"])
+        else:  # streamed: every delivered or leftover message
+            messages = sum(sum(v_local) + len(buffer) for _, v_local, _, buffer in results)
+    log.info(f"\n{messages} messages in {elapsed:.3f}s")
+
 
 if __name__ == "__main__":
     main()
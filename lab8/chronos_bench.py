@@ -0,0 +1,309 @@
+"""Throughput of the Chronos simulation on generated seeds.
+
+Seeds are causal broadcast histories: every node sends messages whose
+vector clocks merge what it has already seen, every node's queue holds
+all messages, and a small fraction of each queue is locally reordered so
+some messages wait in the buffer. Runs in throughput mode (no delays,
+no per-message logging) and reports delivered messages/sec.
+
+--stress reorders whole queues (block-reversed or shuffled) and times the
+indexed CausalBuffer against the original front-to-back rescan, checking
+that both end with the same vector clocks.
+
+    python lab8/chronos_bench.py
+    python lab8/chronos_bench.py --sizes 1000 100000 --reorder 0.05
+    python lab8/chronos_bench.py --write seed.json --sizes 10000
+    python lab8/chronos_bench.py --stress --sizes 1000 10000 100000
+    python lab8/chronos_bench.py --write-batch sweep.jsonl --count 5000 --sizes 1000
+    python lab8/chronos_bench.py --nodes 5 64 512 4096 --sizes 100000 --backends array numpy
+    python lab8/chronos_bench.py --io --sizes 100000 1000000
+    python lab8/chronos_bench.py --check
+
+--io writes each seed as seed.json, seed.jsonl and a binary seed, then runs
+every input format in a fresh process and reports the time to load it,
+the total run time and the peak RSS.
+
+--check runs one seed through every input format, serially and on a
+2-worker pool under both the fork and the spawn start method, and checks
+that every run ends in the same state.
+"""
+
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import chronos
+import seed_io
+
+NODES = 5
+SIZES = (10**3, 10**4, 10**5, 10**6, 10**7)
+STRESS_SIZES = (10**3, 10**4, 10**5)
+IO_SIZES = (10**5, 10**6)
+IO_MODES = ("json", "json-stream", "jsonl", "binary")
+PATTERNS = ("swap", "reverse", "shuffle")
+
+
+def make_seed(messages, nodes=NODES, reorder=0.01, window=4, lookback=16, seed=0, pattern="swap"):
+    # messages counts queue entries over all nodes (each broadcast is
+    # queued once per node); message dicts are shared between the queues.
+    # pattern: "swap" moves a fraction `reorder` of entries up to `window`
+    # places, "reverse" / "shuffle" reorder every block of `window` entries
+    rng = random.Random(seed)
+    broadcasts = max(1, messages // nodes)
+    known = {}  # sender -> what it has seen
+    history = []
+    for _ in range(broadcasts):
+        s = rng.randrange(nodes)
+        view = known.get(s)
+        if view is None:
+            view = known[s] = [0] * nodes
+        if history:
+            # s has delivered a recent message and therefore its causal past
+            seen = history[rng.randrange(max(0, len(history) - lookback), len(history))]["v_msg"]
+            for k in range(nodes):
+                if seen[k] > view[k]:
+                    view[k] = seen[k]
+        view[s] += 1
+        history.append({"sender": s, "v_msg": list(view)})
+
+    queues = []
+    last = len(history) - 1
+    for _ in range(nodes):
+        q = list(history)
+        if pattern == "swap":
+            for i in range(last):
+                if rng.random() < reorder:
+                    j = min(last, i + rng.randint(1, window))
+                    q[i], q[j] = q[j], q[i]
+        else:
+            for i in range(0, len(q), window):
+                block = q[i : i + window]
+                if pattern == "reverse":
+                    block.reverse()
+                else:
+                    rng.shuffle(block)
+                q[i : i + window] = block
+        queues.append(q)
+
+    clocks = [rng.randint(1000, 1100) for _ in range(nodes)]
+    return {"theta": 50, "clocks": clocks, "queues": queues}
+
+
+def write_jsonl(seed, path):
+    # Header line, then one {"node", "sender", "v_msg"} line per queued message
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(json.dumps({"theta": seed["theta"], "clocks": seed["clocks"]}) + "\n")
+        for node, queue in enumerate(seed["queues"]):
+            for msg in queue:
+                f.write(json.dumps({"node": node, "sender": msg["sender"], "v_msg": msg["v_msg"]}) + "\n")
+
+
+def io_child(mode, path):
+    # One --io measurement, run in its own process so peak RSS is its own
+    start = time.perf_counter()
+    seed = chronos.open_seed(path, stream=mode == "json-stream")
+    loaded = time.perf_counter() - start
+    results = chronos.simulate(seed, chronos.THROUGHPUT)
+    total = time.perf_counter() - start
+    delivered = sum(sum(v_local) for _, v_local, _, _ in results)
+    rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # KiB on Linux
+    print(json.dumps({"load": loaded, "total": total, "delivered": delivered, "rss_mb": rss_mb}))
+
+
+def io_bench(args):
+    print(
+        f"{'messages':>10} {'format':>12} {'size':>9} {'load':>9} {'total':>9}"
+        f" {'delivered':>10} {'peak RSS':>10}"
+    )
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.sizes:
+            seed = make_seed(size, args.nodes[0], reorder=args.reorder, window=args.window, seed=args.seed)
+            paths = {mode: os.path.join(tmp, name) for mode, name in (
+                ("json", "seed.json"), ("jsonl", "seed.jsonl"), ("binary", "seed.bin"),
+            )}
+            paths["json-stream"] = paths["json"]
+            with open(paths["json"], "w", encoding="utf-8") as f:
+                json.dump(seed, f)
+            write_jsonl(seed, paths["jsonl"])
+            del seed
+            seed_io.convert_seed(paths["json"], paths["binary"])
+
+            for mode in IO_MODES:
+                out = subprocess.run(
+                    [sys.executable, __file__, "--io-child", mode, paths[mode]],
+                    check=True, capture_output=True, text=True,
+                ).stdout
+                r = json.loads(out)
+                mb = os.path.getsize(paths[mode]) / 2**20
+                print(
+                    f"{size:>10} {mode:>12} {mb:>7.1f}MB {r['load']:>8.2f}s {r['total']:>8.2f}s"
+                    f" {r['delivered']:>10} {r['rss_mb']:>8.0f}MB"
+                )
+
+
+def check(args):
+    size = args.sizes[0] if args.sizes else 10**4
+    seed = make_seed(size, args.nodes[0], reorder=0.05, seed=args.seed)
+    expected = chronos.simulate(seed, chronos.THROUGHPUT)
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = {name: os.path.join(tmp, name) for name in ("seed.json", "seed.jsonl", "queues-first.json", "seed.bin")}
+        with open(paths["seed.json"], "w", encoding="utf-8") as f:
+            json.dump(seed, f)
+        with open(paths["queues-first.json"], "w", encoding="utf-8") as f:
+            json.dump({"queues": seed["queues"], "theta": seed["theta"], "clocks": seed["clocks"]}, f)
+        write_jsonl(seed, paths["seed.jsonl"])
+        seed_io.convert_seed(paths["seed.json"], paths["seed.bin"])
+
+        runs = 0
+        for method in ("fork", "spawn"):
+            multiprocessing.set_start_method(method, force=True)
+            for name, path in paths.items():
+                for stream in (False, True):
+                    for workers in (1, 2):
+                        opened = chronos.open_seed(path, stream=stream)
+                        if chronos.simulate(opened, chronos.THROUGHPUT, workers) != expected:
+                            raise SystemExit(f"{name} (stream={stream}, workers={workers}, {method}) diverged")
+                        runs += 1
+    print(f"{runs} runs over JSON, JSONL, spooled and binary seeds (fork and spawn) match")
+
+
+def rescan_node(queue):
+    # The original process_node / process_buffer loop without output:
+    # rescan the buffer from the front after every delivery
+    v_local = [0] * (len(queue[0]["v_msg"]) if queue else 0)
+    buffer = []
+
+    def drain():
+        changed = True
+        while changed:
+            changed = False
+            i = 0
+            while i < len(buffer):
+                msg = buffer[i]
+                if chronos.can_deliver(v_local, msg["sender"], msg["v_msg"]):
+                    chronos.apply_message(v_local, msg["v_msg"])
+                    buffer.pop(i)
+                    changed = True
+                    i = 0
+                else:
+                    i += 1
+
+    for msg in queue:
+        if chronos.can_deliver(v_local, msg["sender"], msg["v_msg"]):
+            chronos.apply_message(v_local, msg["v_msg"])
+            drain()
+        else:
+            buffer.append(msg)
+    drain()
+    return v_local, buffer
+
+
+def stress(args):
+    print(f"{'messages':>10} {'pattern':>8} {'window':>7} {'rescan':>10} {'indexed':>10} {'speedup':>8}")
+    for size in args.sizes:
+        seed = make_seed(size, pattern=args.pattern, window=args.window, seed=args.seed)
+        start = time.perf_counter()
+        indexed = [chronos.process_node(i, q, 0, chronos.THROUGHPUT) for i, q in enumerate(seed["queues"])]
+        fast = time.perf_counter() - start
+        if size > args.rescan_max:
+            print(f"{size:>10} {args.pattern:>8} {args.window:>7} {'-':>10} {fast:>9.3f}s {'-':>8}")
+            continue
+        start = time.perf_counter()
+        rescanned = [rescan_node(q) for q in seed["queues"]]
+        slow = time.perf_counter() - start
+        for (v_fast, _, left_fast), (v_slow, left_slow) in zip(indexed, rescanned):
+            if v_fast != v_slow or left_fast != left_slow:
+                raise SystemExit(f"indexed buffer diverged from the rescan at {size} messages")
+        print(f"{size:>10} {args.pattern:>8} {args.window:>7} {slow:>9.3f}s {fast:>9.3f}s {slow / fast:>7.1f}x")
+
+
+def run(seed, backend="auto"):
+    start = time.perf_counter()
+    results = chronos.simulate(seed, chronos.SimConfig(delay=0.0, backend=backend))
+    elapsed = time.perf_counter() - start
+    delivered = sum(sum(v_local) for _, v_local, _, _ in results)
+    left = sum(len(buffer) for _, _, _, buffer in results)
+    return elapsed, delivered, left
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Chronos throughput benchmark",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__,
+    )
+    parser.add_argument("--sizes", type=int, nargs="+", help="messages per seed")
+    parser.add_argument("--nodes", type=int, nargs="+", default=[NODES], help="cluster sizes (vector clock length)")
+    parser.add_argument("--backends", nargs="+", choices=chronos.BACKENDS, default=["auto"])
+    parser.add_argument("--reorder", type=float, default=0.01, help="fraction of queue entries swapped forward")
+    parser.add_argument("--window", type=int, help="how far a swapped entry moves / reordered block size (default 4, 2000 with --stress)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--write", metavar="PATH", help="save the (last) generated seed as JSON")
+    parser.add_argument("--write-batch", metavar="PATH", help="write --count seeds of the first size as JSONL for chronos.py --batch")
+    parser.add_argument("--count", type=int, default=1000)
+    parser.add_argument("--stress", action="store_true", help="compare the indexed buffer with the original rescan")
+    parser.add_argument("--pattern", choices=PATTERNS, default="reverse", help="--stress reordering")
+    parser.add_argument("--rescan-max", type=int, default=10**5, help="largest --stress size timed with the rescan")
+    parser.add_argument("--io", action="store_true", help="compare loading JSON, streamed JSON, JSONL and binary seeds")
+    parser.add_argument("--check", action="store_true", help="check every seed format and pool start method agree")
+    parser.add_argument("--io-child", nargs=2, metavar=("MODE", "PATH"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING, format="%(message)s")
+    if args.io_child:
+        io_child(*args.io_child)
+        return
+    if args.window is None:
+        args.window = 2000 if args.stress else 4
+    if args.sizes is None:
+        args.sizes = list(STRESS_SIZES if args.stress else IO_SIZES if args.io else SIZES)
+    if args.check:
+        check(args)
+        return
+    if args.io:
+        io_bench(args)
+        return
+    if args.stress:
+        stress(args)
+        return
+    if args.write_batch:
+        with open(args.write_batch, "w", encoding="utf-8") as f:
+            for i in range(args.count):
+                seed = make_seed(args.sizes[0], reorder=args.reorder, window=args.window, seed=args.seed + i)
+                f.write(json.dumps(seed) + "\n")
+        return
+
+    print(
+        f"{'nodes':>6} {'backend':>8} {'messages':>10} {'generate':>10} {'simulate':>10}"
+        f" {'delivered':>10} {'left':>6} {'throughput':>16}"
+    )
+    for nodes in args.nodes:
+        for size in args.sizes:
+            start = time.perf_counter()
+            seed = make_seed(size, nodes, reorder=args.reorder, window=args.window, seed=args.seed)
+            generated = time.perf_counter() - start
+            for backend in args.backends:
+                try:
+                    elapsed, delivered, left = run(seed, backend)
+                except RuntimeError as e:  # numpy not installed
+                    print(f"{nodes:>6} {backend:>8} {size:>10} {e}")
+                    continue
+                print(
+                    f"{nodes:>6} {chronos.choose_backend(nodes, backend):>8} {size:>10} {generated:>9.2f}s"
+                    f" {elapsed:>9.2f}s {delivered:>10} {left:>6} {delivered / elapsed:>12,.0f} msg/s"
+                )
+            if args.write:
+                with open(args.write, "w", encoding="utf-8") as f:
+                    json.dump(seed, f)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,314 @@
+import json
+import mmap
+import os
+import re
+import struct
+import sys
+import tempfile
+from array import array
+from itertools import chain
+
+# Streaming readers and a binary format for Chronos seeds.
+#
+# Text seeds come in two layouts, both read incrementally:
+#   seed.json   the classic {"theta": ..., "clocks": [...], "queues": [[...], ...]}
+#               document, scanned one value at a time
+#   seed.jsonl  a {"theta": ..., "clocks": [...]} header line, then one
+#               {"node": i, "sender": s, "v_msg": [...]} line per message,
+#               grouped by node in ascending order
+#
+# Binary seed (little-endian int64 words, memory-mapped when read):
+#   header   magic, theta, n, byte offset of the index
+#   records  per node, one record per message: sender, v_msg[0..n-1]
+#   index    clocks[0..n-1], then the message count of every node
+BINARY_MAGIC = b"CHRONOS1"
+HEADER = struct.Struct("<8sqQQ")
+STREAM_CHUNK = 1 << 20  # characters read from a text seed at a time
+WRITE_WORDS = 1 << 16  # int64 words buffered per write while converting
+
+_SPACE = re.compile(r"[ \t\r\n]*")
+
+
+class _JsonScanner:
+    # Pulls JSON values one at a time out of a text stream, keeping only
+    # the unread part of the current chunk in memory
+    def __init__(self, stream, chunk_size=STREAM_CHUNK):
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+        self._decode = json.JSONDecoder().raw_decode
+
+    def _fill(self, size):
+        if self.eof:
+            return False
+        data = self.stream.read(size)
+        if not data:
+            self.eof = True
+            return False
+        self.buf = self.buf[self.pos :] + data
+        self.pos = 0
+        return True
+
+    def peek(self):
+        # Next non-whitespace character ("" at the end of the stream)
+        while True:
+            self.pos = _SPACE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill(self.chunk_size):
+                return ""
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise ValueError(f"malformed seed: expected {char!r} at character {self.pos}")
+        self.pos += 1
+
+    def separator(self, close):
+        # After an item: True if another one follows, False at `close`
+        char = self.peek()
+        self.pos += 1
+        if char == ",":
+            return True
+        if char != close:
+            raise ValueError(f"malformed seed: expected ',' or {close!r}, got {char!r}")
+        return False
+
+    def value(self):
+        self.peek()
+        size = self.chunk_size
+        while True:
+            try:
+                obj, end = self._decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                # the value runs past the chunk; read more (doubling, so a
+                # huge value is not re-parsed once per chunk)
+                if not self._fill(size):
+                    raise
+                size *= 2
+                continue
+            if end == len(self.buf) and self._fill(size):
+                continue  # a number may go on in the next chunk
+            self.pos = end
+            return obj
+
+    def items(self):
+        # The items of a JSON array, one at a time
+        self.expect("[")
+        if self.peek() == "]":
+            self.pos += 1
+            return
+        while True:
+            yield self.value()
+            if not self.separator("]"):
+                return
+
+
+def _json_events(stream):
+    # ("theta" | "clocks" | any other key, value) and ("queue", messages)
+    # in document order; each queue must be consumed before the next event
+    scan = _JsonScanner(stream)
+    scan.expect("{")
+    if scan.peek() == "}":
+        return
+    while True:
+        key = scan.value()
+        scan.expect(":")
+        if key == "queues":
+            scan.expect("[")
+            if scan.peek() == "]":
+                scan.pos += 1
+            else:
+                while True:
+                    queue = scan.items()
+                    yield "queue", queue
+                    for _ in queue:  # whatever the consumer left unread
+                        pass
+                    if not scan.separator("]"):
+                        break
+        else:
+            yield key, scan.value()
+        if not scan.separator("}"):
+            return
+
+
+def _jsonl_events(stream):
+    lines = (line for line in stream if line.strip())
+    header = json.loads(next(lines, "{}"))
+    yield "theta", header.get("theta")
+    yield "clocks", header.get("clocks")
+
+    messages = map(json.loads, lines)
+    ahead = []  # first message of a later node
+
+    def queue(node):
+        if ahead:
+            if ahead[0]["node"] != node:
+                return
+            yield ahead.pop()
+        for msg in messages:
+            if msg["node"] != node:
+                if msg["node"] < node:
+                    raise ValueError("JSONL seed messages must be grouped by node in ascending order")
+                ahead.append(msg)
+                return
+            yield msg
+
+    for node in range(len(header.get("clocks") or ())):
+        messages_of_node = queue(node)
+        yield "queue", messages_of_node
+        for _ in messages_of_node:
+            pass
+    if ahead or next(messages, None) is not None:
+        raise ValueError("JSONL seed has messages for a node without a clock")
+
+
+def _events(path, stream):
+    return _jsonl_events(stream) if path.endswith(".jsonl") else _json_events(stream)
+
+
+def is_binary_seed(path):
+    try:
+        with open(path, "rb") as f:
+            return f.read(len(BINARY_MAGIC)) == BINARY_MAGIC
+    except OSError:
+        return False
+
+
+def stream_seed(path):
+    # {"theta", "clocks", "queues"} with queues a generator that reads one
+    # node's messages at a time while it is processed. A JSON document that
+    # lists "queues" before "theta" / "clocks" is first spooled into a
+    # temporary binary seed instead (see load_binary_seed).
+    stream = open(path, "r", encoding="utf-8")
+    events = _events(path, stream)
+    header = {}
+    try:
+        for event in events:
+            if event[0] == "queue":
+                with tempfile.NamedTemporaryFile(suffix=".bin", delete=False) as tmp:
+                    spool = tmp.name
+                try:
+                    write_binary_seed(spool, chain([event], events), header)
+                    seed = load_binary_seed(spool)
+                finally:
+                    os.unlink(spool)  # the mapping stays valid
+                    stream.close()
+                del seed["path"]  # deleted above
+                return seed
+            header[event[0]] = event[1]
+            if "theta" in header and "clocks" in header:
+                break
+        else:
+            raise ValueError(f"{path} has no theta / clocks")
+    except BaseException:
+        stream.close()
+        raise
+
+    def queues():
+        try:
+            for kind, value in events:
+                if kind == "queue":
+                    yield value
+        finally:
+            stream.close()
+
+    return {"theta": header["theta"], "clocks": header["clocks"], "queues": queues()}
+
+
+# ---------------------------
+# Binary seeds
+# ---------------------------
+def _write_words(f, words):
+    if sys.byteorder != "little":
+        words = array("q", words)
+        words.byteswap()
+    words.tofile(f)
+
+
+def write_binary_seed(path, events, header=None):
+    # Write a binary seed from ("theta" / "clocks" / "queue", value) events,
+    # one queue at a time; theta and clocks may come in any position
+    header = dict(header or {})
+    counts = []
+    n = None
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(BINARY_MAGIC, 0, 0, 0))
+        for kind, value in events:
+            if kind != "queue":
+                header[kind] = value
+                continue
+            records = array("q")
+            count = 0
+            for msg in value:
+                v_msg = msg["v_msg"]
+                if n is None:
+                    n = len(v_msg)
+                elif len(v_msg) != n:
+                    raise ValueError(f"Expected vectors of length {n}, got {len(v_msg)}.")
+                records.append(msg["sender"])
+                records.extend(v_msg)
+                count += 1
+                if len(records) >= WRITE_WORDS:
+                    _write_words(f, records)
+                    records = array("q")
+            _write_words(f, records)
+            counts.append(count)
+
+        if header.get("theta") is None or header.get("clocks") is None:
+            raise ValueError("seed has no theta / clocks")
+        clocks = header["clocks"]
+        if n is not None and n != len(clocks):
+            raise ValueError(f"Expected vectors of length {len(clocks)}, got {n}.")
+        if len(counts) != len(clocks):
+            raise ValueError(
+                f"Expected one queue per clock, got {len(clocks)} clocks and {len(counts)} queues."
+            )
+        index = f.tell()
+        _write_words(f, array("q", clocks))
+        _write_words(f, array("q", counts))
+        f.seek(0)
+        f.write(HEADER.pack(BINARY_MAGIC, int(header["theta"]), len(clocks), index))
+
+
+def convert_seed(src, dst):
+    # seed.json / seed.jsonl -> binary seed, without loading src
+    with open(src, "r", encoding="utf-8") as stream:
+        write_binary_seed(dst, _events(src, stream))
+
+
+def load_binary_seed(path):
+    # {"theta", "clocks", "records", "messages", "path"}: records holds one
+    # int64 memoryview per node (n + 1 words per message) straight over the
+    # mapped file, so nothing is read before it is used
+    with open(path, "rb") as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    magic, theta, n, index = HEADER.unpack_from(mapped, 0)
+    if magic != BINARY_MAGIC:
+        raise ValueError(f"{path} is not a binary Chronos seed")
+
+    if sys.byteorder == "little":
+        words = memoryview(mapped)[HEADER.size :].cast("q")
+    else:
+        swapped = array("q")
+        swapped.frombytes(mapped[HEADER.size :])
+        swapped.byteswap()
+        words = memoryview(swapped)
+
+    meta = (index - HEADER.size) // 8
+    clocks = words[meta : meta + n].tolist()
+    counts = words[meta + n : meta + 2 * n].tolist()
+    records = []
+    pos = 0
+    for count in counts:
+        end = pos + count * (n + 1)
+        records.append(words[pos:end])
+        pos = end
+    return {
+        "theta": theta,
+        "clocks": clocks,
+        "records": records,
+        "messages": sum(counts),
+        "path": os.path.abspath(path),
+    }